@@ -0,0 +1,373 @@
+"""Shared image-op runtime for KikoTools image nodes.
+
+ComfyUI images are BHWC tensors, while torch resampling works on NCHW.
+A contiguous BHWC tensor permuted to NCHW is already a channels-last
+tensor, and interpolate() keeps that layout, so images can move between
+the two views without copies. This module keeps tensors in that form
+across chained ops and optionally runs them in half precision.
+"""
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from torch import Tensor
+
+# Precision options exposed by image nodes
+PRECISIONS = ["fp32", "auto", "fp16", "bf16"]
+
+_PRECISION_DTYPES = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+}
+
+# Device types where "auto" selects half precision; CPU kernels are
+# usually faster in float32
+_HALF_PRECISION_DEVICES = ("cuda", "mps", "xpu")
+
+# Resampling modes: antialiased/plain bilinear, or box averaging over each
+# output pixel's footprint (downscaling only)
+RESIZE_MODES = ["bilinear", "area"]
+
+
+def validate_precision(precision: str) -> None:
+    """Check that a precision option is known.
+
+    Args:
+        precision: One of PRECISIONS
+
+    Raises:
+        ValueError: If precision is not a known option
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}, got {precision}")
+
+
+@lru_cache(maxsize=None)
+def _device_supports(device: torch.device, dtype: torch.dtype, antialias: bool) -> bool:
+    """Probe whether bilinear interpolation runs for a device and dtype."""
+    try:
+        probe = torch.zeros(1, 1, 4, 4, device=device, dtype=dtype)
+        F.interpolate(
+            probe,
+            size=(2, 2),
+            mode="bilinear",
+            align_corners=False,
+            antialias=antialias,
+        )
+        return True
+    except (RuntimeError, TypeError):
+        return False
+
+
+def resolve_compute_dtype(
+    device: torch.device,
+    precision: str = "fp32",
+    input_dtype: torch.dtype = torch.float32,
+    antialias: bool = False,
+) -> torch.dtype:
+    """Pick the dtype image ops should run in.
+
+    Half precision is only used where the device implements the resampling
+    kernels; otherwise the ops fall back to float32.
+
+    Args:
+        device: Device holding the image
+        precision: "fp32", "auto" (half precision on GPUs), "fp16" or "bf16"
+        input_dtype: Dtype of the incoming image; non-float32 inputs keep
+            their dtype when precision is "fp32"
+        antialias: Whether antialiased resampling will be used
+
+    Returns:
+        Compute dtype
+
+    Raises:
+        ValueError: If precision is not a known option
+    """
+    validate_precision(precision)
+
+    if precision == "fp32":
+        return input_dtype if input_dtype.is_floating_point else torch.float32
+
+    if precision == "auto":
+        if torch.device(device).type not in _HALF_PRECISION_DEVICES:
+            return torch.float32
+        dtype = torch.float16
+    else:
+        dtype = _PRECISION_DTYPES[precision]
+
+    if _device_supports(torch.device(device), dtype, antialias):
+        return dtype
+    return torch.float32
+
+
+def to_nchw(image: Tensor) -> Tensor:
+    """View a BHWC image as a channels-last NCHW tensor.
+
+    Args:
+        image: Tensor of shape (batch, height, width, channels)
+
+    Returns:
+        Tensor of shape (batch, channels, height, width); a view when the
+        input is contiguous, otherwise a single channels-last copy
+    """
+    nchw = image.permute(0, 3, 1, 2)
+    if not nchw.is_contiguous(memory_format=torch.channels_last):
+        nchw = nchw.contiguous(memory_format=torch.channels_last)
+    return nchw
+
+
+def to_bhwc(tensor: Tensor) -> Tensor:
+    """View an NCHW tensor as a BHWC image.
+
+    Args:
+        tensor: Tensor of shape (batch, channels, height, width)
+
+    Returns:
+        Tensor of shape (batch, height, width, channels); contiguous without
+        a copy when the input is channels-last
+    """
+    return tensor.permute(0, 2, 3, 1)
+
+
+def integer_factor(in_size: Tuple[int, int], out_size: Tuple[int, int]) -> int:
+    """Common integer downscale factor between two sizes, if there is one.
+
+    Args:
+        in_size: (height, width) of the input
+        out_size: (height, width) of the output
+
+    Returns:
+        Factor k with in_size == k * out_size on both axes, or 0
+    """
+    factor = in_size[0] // out_size[0]
+    if factor >= 2 and in_size == (out_size[0] * factor, out_size[1] * factor):
+        return factor
+    return 0
+
+
+def resize_nchw(
+    tensor: Tensor,
+    height: int,
+    width: int,
+    antialias: bool = False,
+    mode: str = "bilinear",
+) -> Tensor:
+    """Resize a channels-last NCHW tensor.
+
+    Area mode averages each output pixel's footprint. Exact integer factors
+    (1/2, 1/4, ...) run as a strided average pool, the cheapest downscale
+    available; other sizes use adaptive pooling.
+
+    Args:
+        tensor: Tensor of shape (batch, channels, h, w)
+        height: Target height
+        width: Target width
+        antialias: Low-pass filter when downscaling (bilinear mode)
+        mode: "bilinear" or "area"
+
+    Returns:
+        Channels-last tensor of shape (batch, channels, height, width)
+    """
+    if tensor.shape[2] == height and tensor.shape[3] == width:
+        return tensor
+
+    if mode == "area":
+        factor = integer_factor(tuple(tensor.shape[2:]), (height, width))
+        if factor:
+            return F.avg_pool2d(tensor, factor)
+        return F.interpolate(tensor, size=(height, width), mode="area")
+
+    return F.interpolate(
+        tensor,
+        size=(height, width),
+        mode="bilinear",
+        align_corners=False,
+        antialias=antialias,
+    )
+
+
+class ImageOps:
+    """Chain of image ops on one channels-last tensor.
+
+    The image is converted to NCHW and the compute dtype once, each op works
+    on that tensor, and result() converts back once. Crops are views, and
+    resizes keep the channels-last layout, so no permute/contiguous copies
+    happen between ops.
+
+    Example:
+        ImageOps(image, precision="auto").crop(0, 0, 512, 512).resize(256, 256).result()
+    """
+
+    def __init__(self, image: Tensor, precision: str = "fp32", antialias: bool = False):
+        """Initialize the chain.
+
+        Args:
+            image: Tensor of shape (batch, height, width, channels)
+            precision: Compute precision, one of PRECISIONS
+            antialias: Whether antialiased resizes will be chained
+
+        Raises:
+            ValueError: If precision is not a known option
+        """
+        self.output_dtype = image.dtype
+        self.compute_dtype = resolve_compute_dtype(
+            image.device, precision, image.dtype, antialias
+        )
+        self.tensor = to_nchw(image).to(self.compute_dtype)
+
+    @property
+    def height(self) -> int:
+        """Current image height."""
+        return self.tensor.shape[2]
+
+    @property
+    def width(self) -> int:
+        """Current image width."""
+        return self.tensor.shape[3]
+
+    def resize(
+        self, height: int, width: int, antialias: bool = False, mode: str = "bilinear"
+    ) -> "ImageOps":
+        """Resize the image.
+
+        Args:
+            height: Target height
+            width: Target width
+            antialias: Low-pass filter when downscaling (bilinear mode)
+            mode: "bilinear" or "area"
+
+        Returns:
+            This chain
+        """
+        self.tensor = resize_nchw(self.tensor, height, width, antialias, mode)
+        return self
+
+    def crop(self, top: int, left: int, height: int, width: int) -> "ImageOps":
+        """Crop the image to a window (a view, no copy).
+
+        Args:
+            top: First row
+            left: First column
+            height: Window height
+            width: Window width
+
+        Returns:
+            This chain
+        """
+        self.tensor = self.tensor[:, :, top : top + height, left : left + width]
+        return self
+
+    def result(self, dtype: Optional[torch.dtype] = None) -> Tensor:
+        """Finish the chain and return a BHWC image.
+
+        Args:
+            dtype: Output dtype; defaults to the input image dtype
+
+        Returns:
+            Tensor of shape (batch, height, width, channels)
+        """
+        return to_bhwc(self.tensor).to(dtype or self.output_dtype)
+
+
+def frame_working_bytes(
+    in_size: Tuple[int, int],
+    out_size: Tuple[int, int],
+    channels: int,
+    dtype: torch.dtype,
+) -> int:
+    """Estimate the temporary memory one frame needs while being resized.
+
+    Counts a compute-dtype copy of the input frame, the separable
+    intermediate (output height by input width) and the resized frame.
+
+    Args:
+        in_size: (height, width) of the input
+        out_size: (height, width) of the output
+        channels: Number of channels
+        dtype: Compute dtype
+
+    Returns:
+        Estimated bytes per frame
+    """
+    pixels = (
+        in_size[0] * in_size[1] + out_size[0] * in_size[1] + out_size[0] * out_size[1]
+    )
+    return pixels * channels * torch.empty(0, dtype=dtype).element_size()
+
+
+def batch_chunk_size(batch_size: int, frame_bytes: int, max_memory_mb: float) -> int:
+    """Number of frames that fit a working memory budget.
+
+    Args:
+        batch_size: Number of frames in the batch
+        frame_bytes: Working memory per frame
+        max_memory_mb: Budget in MB; 0 or less processes the whole batch
+
+    Returns:
+        Frames per chunk, at least 1
+    """
+    if max_memory_mb <= 0:
+        return max(1, batch_size)
+    frames = int(max_memory_mb * 1024 * 1024 // max(1, frame_bytes))
+    return max(1, min(batch_size, frames))
+
+
+def resize_image(
+    image: Tensor,
+    height: int,
+    width: int,
+    antialias: bool = False,
+    mode: str = "bilinear",
+    precision: str = "fp32",
+    max_memory_mb: float = 0,
+) -> Tensor:
+    """Resize a BHWC batch, optionally a few frames at a time.
+
+    With a budget, frames are resized in chunks whose temporaries fit in
+    max_memory_mb and written into one preallocated output, so only the
+    input, the output and a single chunk's temporaries are resident.
+
+    Args:
+        image: Tensor of shape (batch, height, width, channels)
+        height: Target height
+        width: Target width
+        antialias: Low-pass filter when downscaling (bilinear mode)
+        mode: "bilinear" or "area"
+        precision: Compute precision, one of PRECISIONS
+        max_memory_mb: Working memory budget in MB (0 = whole batch at once)
+
+    Returns:
+        Resized tensor of shape (batch, height, width, channels) with the
+        input dtype
+
+    Raises:
+        ValueError: If mode or precision is not a known option
+    """
+    if mode not in RESIZE_MODES:
+        raise ValueError(f"mode must be one of {RESIZE_MODES}, got {mode}")
+
+    batch_size, in_height, in_width, channels = image.shape
+    compute_dtype = resolve_compute_dtype(
+        image.device, precision, image.dtype, antialias
+    )
+    frame_bytes = frame_working_bytes(
+        (in_height, in_width), (height, width), channels, compute_dtype
+    )
+    chunk = batch_chunk_size(batch_size, frame_bytes, max_memory_mb)
+
+    def resize_chunk(frames: Tensor) -> Tensor:
+        ops = ImageOps(frames, precision, antialias)
+        return ops.resize(height, width, antialias, mode).result()
+
+    if chunk >= batch_size:
+        return resize_chunk(image)
+
+    output = torch.empty(
+        batch_size, height, width, channels, dtype=image.dtype, device=image.device
+    )
+    for start in range(0, batch_size, chunk):
+        output[start : start + chunk].copy_(resize_chunk(image[start : start + chunk]))
+    return output
@@ -1,25 +1,100 @@
 """Logic for creating empty latent tensors with batch support."""
 
 import torch
-from typing import Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import comfy.model_management as mm
+
+    COMFY_AVAILABLE = True
+except ImportError:
+    COMFY_AVAILABLE = False
+
+# Latent channels and VAE downscale factor per model family
+LATENT_FORMATS = {
+    "SD1.5 / SDXL": (4, 8),
+    "SD3 / SD3.5": (16, 8),
+    "Flux": (16, 8),
+}
+DEFAULT_LATENT_FORMAT = "SD1.5 / SDXL"
+
+# fresh: newly allocated zeros; shared: zero-copy view of a single zero
+ALLOCATION_MODES = ["fresh", "shared"]
+
+
+def get_latent_device_and_dtype() -> Tuple[torch.device, torch.dtype]:
+    """
+    Get the device and dtype ComfyUI uses for intermediate latents.
+
+    Returns:
+        Tuple of (device, dtype); CPU float32 outside ComfyUI
+    """
+    if not COMFY_AVAILABLE:
+        return torch.device("cpu"), torch.float32
+
+    device = mm.intermediate_device()
+    intermediate_dtype = getattr(mm, "intermediate_dtype", None)
+    dtype = intermediate_dtype() if intermediate_dtype else torch.float32
+    return device, dtype
+
+
+def get_model_latent_format(model: Any) -> Optional[Tuple[int, int]]:
+    """
+    Read the latent channel count and downscale factor from a model.
+
+    Args:
+        model: ComfyUI MODEL (ModelPatcher)
+
+    Returns:
+        Tuple of (channels, downscale factor), or None if the model does not
+        expose a latent format
+    """
+    latent_format = None
+    if hasattr(model, "get_model_object"):
+        try:
+            latent_format = model.get_model_object("latent_format")
+        except (AttributeError, KeyError):
+            latent_format = None
+    if latent_format is None:
+        latent_format = getattr(getattr(model, "model", None), "latent_format", None)
+
+    channels = getattr(latent_format, "latent_channels", None)
+    if not isinstance(channels, int):
+        return None
+    downscale = getattr(latent_format, "spacial_downscale_ratio", 8)
+    return channels, downscale if isinstance(downscale, int) else 8
 
 
 def create_empty_latent_batch(
-    width: int, height: int, batch_size: int = 1
+    width: int,
+    height: int,
+    batch_size: int = 1,
+    channels: int = 4,
+    downscale: int = 8,
+    device: Optional[torch.device] = None,
+    dtype: Optional[torch.dtype] = None,
+    allocation: str = "fresh",
 ) -> Dict[str, torch.Tensor]:
     """
     Create empty latent tensor with batch support.
 
     Args:
-        width: Width in pixels (will be divided by 8 for latent space)
-        height: Height in pixels (will be divided by 8 for latent space)
+        width: Width in pixels (will be divided by downscale for latent space)
+        height: Height in pixels (will be divided by downscale for latent space)
         batch_size: Number of latents in the batch
+        channels: Latent channels (4 for SD1.5/SDXL, 16 for SD3/Flux)
+        downscale: VAE spatial downscale factor
+        device: Target device; defaults to ComfyUI's intermediate device
+        dtype: Target dtype; defaults to ComfyUI's intermediate dtype
+        allocation: "fresh" allocates zeros; "shared" returns a zero-copy
+            view of one zero element that must be copied before in-place
+            writes
 
     Returns:
         Dictionary containing the latent samples tensor
 
     Raises:
-        ValueError: If dimensions are invalid
+        ValueError: If dimensions or options are invalid
     """
     # Validate inputs
     if width <= 0 or height <= 0:
@@ -28,31 +103,49 @@ def create_empty_latent_batch(
     if batch_size <= 0:
         raise ValueError(f"Batch size must be positive, got {batch_size}")
 
-    # Ensure dimensions are divisible by 8 (VAE requirement)
-    if width % 8 != 0 or height % 8 != 0:
+    if channels <= 0 or downscale <= 0:
         raise ValueError(
-            f"Width and height must be divisible by 8, got {width}x{height}"
+            f"Channels and downscale must be positive, got {channels}, {downscale}"
         )
 
-    # Convert pixel dimensions to latent space (divide by 8)
-    latent_width = width // 8
-    latent_height = height // 8
+    if allocation not in ALLOCATION_MODES:
+        raise ValueError(
+            f"allocation must be one of {ALLOCATION_MODES}, got {allocation}"
+        )
+
+    # Ensure dimensions are divisible by the downscale factor (VAE requirement)
+    if width % downscale != 0 or height % downscale != 0:
+        raise ValueError(
+            f"Width and height must be divisible by {downscale}, got {width}x{height}"
+        )
+
+    if device is None or dtype is None:
+        default_device, default_dtype = get_latent_device_and_dtype()
+        device = default_device if device is None else device
+        dtype = default_dtype if dtype is None else dtype
 
-    # Create empty latent tensor
     # ComfyUI latent format: [batch, channels, height, width]
-    # Standard VAE uses 4 channels
-    latent_tensor = torch.zeros(batch_size, 4, latent_height, latent_width)
+    shape = (batch_size, channels, height // downscale, width // downscale)
+
+    if allocation == "shared":
+        # Every element aliases one zero, so torch rejects in-place writes.
+        # The zero is allocated per call, so a write through a single-element
+        # view cannot leak into other latents.
+        latent_tensor = torch.zeros((), device=device, dtype=dtype).expand(shape)
+    else:
+        latent_tensor = torch.zeros(shape, device=device, dtype=dtype)
 
     return {"samples": latent_tensor}
 
 
-def validate_dimensions(width: int, height: int) -> bool:
+def validate_dimensions(width: int, height: int, multiple: int = 8) -> bool:
     """
     Validate that dimensions are suitable for latent creation.
 
     Args:
         width: Width in pixels
         height: Height in pixels
+        multiple: Required divisor (the VAE downscale factor)
 
     Returns:
         True if dimensions are valid
@@ -61,8 +154,8 @@ def validate_dimensions(width: int, height: int) -> bool:
     if width <= 0 or height <= 0:
         return False
 
-    # Check divisibility by 8
-    if width % 8 != 0 or height % 8 != 0:
+    # Check divisibility by the downscale factor
+    if width % multiple != 0 or height % multiple != 0:
         return False
 
     # Check reasonable size limits (64x64 to 8192x8192)
@@ -75,13 +168,14 @@ def validate_dimensions(width: int, height: int) -> bool:
     return True
 
 
-def sanitize_dimensions(width: int, height: int) -> Tuple[int, int]:
+def sanitize_dimensions(width: int, height: int, multiple: int = 8) -> Tuple[int, int]:
     """
     Sanitize dimensions to ensure they meet latent requirements.
 
     Args:
         width: Input width
         height: Input height
+        multiple: Required divisor (the VAE downscale factor)
 
     Returns:
         Tuple of (sanitized_width, sanitized_height)
@@ -94,8 +188,8 @@ def sanitize_dimensions(width: int, height: int) -> Tuple[int, int]:
     width = min(8192, width)
     height = min(8192, height)
 
-    # Round to nearest multiple of 8
-    width = (width + 7) // 8 * 8
-    height = (height + 7) // 8 * 8
+    # Round up to the next multiple, staying within the maximum
+    width = min(-(-width // multiple) * multiple, 8192 // multiple * multiple)
+    height = min(-(-height // multiple) * multiple, 8192 // multiple * multiple)
 
     return width, height
@@ -5,7 +5,12 @@ from typing import Dict, Tuple
 
 from ...base.base_node import ComfyAssetsBaseNode
 from .logic import (
+    ALLOCATION_MODES,
+    DEFAULT_LATENT_FORMAT,
+    LATENT_FORMATS,
     create_empty_latent_batch,
+    get_latent_device_and_dtype,
+    get_model_latent_format,
     validate_dimensions,
     sanitize_dimensions,
 )
@@ -22,6 +27,8 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
 
     Creates empty latent tensors with specified dimensions and batch size,
     compatible with ComfyUI's latent format for use with VAE and diffusion models.
+    Latents are built directly on ComfyUI's intermediate device and dtype, with
+    the channel count and downscale factor of the selected or connected model.
     """
 
     @classmethod
@@ -90,7 +97,35 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
                         "Useful for batch processing workflows.",
                     },
                 ),
-            }
+            },
+            "optional": {
+                "latent_format": (
+                    list(LATENT_FORMATS),
+                    {
+                        "default": DEFAULT_LATENT_FORMAT,
+                        "tooltip": "Latent channels of the target model: 4 for "
+                        "SD1.5/SDXL, 16 for SD3 and Flux. Ignored when a model "
+                        "is connected.",
+                    },
+                ),
+                "model": (
+                    "MODEL",
+                    {
+                        "tooltip": "Optional model to take the latent channels "
+                        "and downscale factor from.",
+                    },
+                ),
+                "allocation": (
+                    ALLOCATION_MODES,
+                    {
+                        "default": "fresh",
+                        "tooltip": "fresh: allocate a new zero tensor. shared: "
+                        "zero-copy view of a single zero (no memory per batch), "
+                        "for workflows whose nodes never modify the latent in "
+                        "place; in-place writes raise an error.",
+                    },
+                ),
+            },
         }
 
     RETURN_TYPES = ("LATENT", "INT", "INT")
@@ -99,7 +134,14 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
     CATEGORY = "🫶 ComfyAssets/📦 Latents"
 
     def create_empty_latent(
-        self, preset: str, width: int, height: int, batch_size: int
+        self,
+        preset: str,
+        width: int,
+        height: int,
+        batch_size: int,
+        latent_format: str = DEFAULT_LATENT_FORMAT,
+        model=None,
+        allocation: str = "fresh",
     ) -> Tuple[Dict[str, torch.Tensor], int, int]:
         """
         Create empty latent tensor with specified dimensions and batch size.
@@ -109,6 +151,9 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
             width: Custom width value
             height: Custom height value
             batch_size: Number of latents in the batch
+            latent_format: Model family defining channels and downscale
+            model: Optional MODEL whose latent format overrides latent_format
+            allocation: "fresh" or "shared" (zero-copy view of one zero)
 
         Returns:
             Tuple containing (latent dictionary with 'samples' tensor, width, height)
@@ -122,8 +167,12 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
                 original_preset, width, height
             )
 
+            channels, downscale = self._resolve_latent_format(latent_format, model)
+
             # Sanitize dimensions to ensure they meet requirements
-            final_width, final_height = sanitize_dimensions(base_width, base_height)
+            final_width, final_height = sanitize_dimensions(
+                base_width, base_height, downscale
+            )
 
             # Log if dimensions were changed from the base dimensions
             if final_width != base_width or final_height != base_height:
@@ -133,7 +182,7 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
                 )
 
             # Validate final dimensions
-            if not validate_dimensions(final_width, final_height):
+            if not validate_dimensions(final_width, final_height, downscale):
                 self.handle_error(
                     f"Invalid dimensions after sanitization: {final_width}×{final_height}"
                 )
@@ -147,16 +196,25 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
                     f"Large batch size ({batch_size}) may use significant memory"
                 )
 
-            # Create the empty latent batch
+            # Create the empty latent batch on ComfyUI's intermediate device
+            device, dtype = get_latent_device_and_dtype()
             latent_dict = create_empty_latent_batch(
-                final_width, final_height, batch_size
+                final_width,
+                final_height,
+                batch_size,
+                channels=channels,
+                downscale=downscale,
+                device=device,
+                dtype=dtype,
+                allocation=allocation,
             )
 
             # Log the operation
-            latent_height = final_height // 8
-            latent_width = final_width // 8
+            latent_height = final_height // downscale
+            latent_width = final_width // downscale
             self.log_info(
-                f"Created empty latent batch: {batch_size}×4×{latent_height}×{latent_width} "
+                f"Created empty latent batch: {batch_size}×{channels}×"
+                f"{latent_height}×{latent_width} "
                 f"(pixel dims: {final_width}×{final_height})"
             )
 
@@ -167,6 +225,30 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
             error_msg = f"Error creating empty latent batch: {str(e)}"
             self.handle_error(error_msg, e)
 
+    def _resolve_latent_format(self, latent_format: str, model=None) -> Tuple[int, int]:
+        """
+        Get the latent channels and downscale factor to build latents with.
+
+        Args:
+            latent_format: Selected model family
+            model: Optional MODEL; its latent format takes precedence
+
+        Returns:
+            Tuple of (channels, downscale factor)
+        """
+        if model is not None:
+            model_format = get_model_latent_format(model)
+            if model_format is not None:
+                return model_format
+            self.log_info(f"Model has no latent format, using {latent_format} settings")
+
+        if latent_format not in LATENT_FORMATS:
+            raise ValueError(
+                f"latent_format must be one of {list(LATENT_FORMATS)}, "
+                f"got {latent_format}"
+            )
+        return LATENT_FORMATS[latent_format]
+
     def _extract_preset_name(self, formatted_preset: str) -> str:
         """
         Extract the original preset name from a formatted preset string.
@@ -234,7 +316,13 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
 
         return True
 
-    def get_latent_info(self, width: int, height: int, batch_size: int) -> str:
+    def get_latent_info(
+        self,
+        width: int,
+        height: int,
+        batch_size: int,
+        latent_format: str = DEFAULT_LATENT_FORMAT,
+    ) -> str:
         """
         Get descriptive information about the latent that will be created.
 
@@ -242,37 +330,55 @@ class EmptyLatentBatchNode(ComfyAssetsBaseNode):
             width: Width in pixels
             height: Height in pixels
             batch_size: Batch size
+            latent_format: Model family defining channels and downscale
 
         Returns:
             Description string for the latent
         """
-        sanitized_width, sanitized_height = sanitize_dimensions(width, height)
-        latent_width = sanitized_width // 8
-        latent_height = sanitized_height // 8
+        channels, downscale = LATENT_FORMATS[latent_format]
+        sanitized_width, sanitized_height = sanitize_dimensions(
+            width, height, downscale
+        )
+        latent_width = sanitized_width // downscale
+        latent_height = sanitized_height // downscale
 
         return (
-            f"Empty latent batch: {batch_size} × 4 × {latent_height} × {latent_width} "
+            f"Empty latent batch: {batch_size} × {channels} × {latent_height} × "
+            f"{latent_width} "
             f"(pixel dimensions: {sanitized_width}×{sanitized_height})"
         )
 
-    def get_memory_estimate(self, width: int, height: int, batch_size: int) -> str:
+    def get_memory_estimate(
+        self,
+        width: int,
+        height: int,
+        batch_size: int,
+        latent_format: str = DEFAULT_LATENT_FORMAT,
+    ) -> str:
         """
         Estimate memory usage for the latent batch.
 
+        This is the size once materialized; a shared latent occupies no
+        memory until a consumer copies it.
+
         Args:
             width: Width in pixels
             height: Height in pixels
             batch_size: Batch size
+            latent_format: Model family defining channels and downscale
 
         Returns:
             Memory estimate string
         """
-        sanitized_width, sanitized_height = sanitize_dimensions(width, height)
-        latent_width = sanitized_width // 8
-        latent_height = sanitized_height // 8
+        channels, downscale = LATENT_FORMATS[latent_format]
+        sanitized_width, sanitized_height = sanitize_dimensions(
+            width, height, downscale
+        )
+        latent_width = sanitized_width // downscale
+        latent_height = sanitized_height // downscale
 
         # Calculate tensor size in bytes (float32 = 4 bytes per element)
-        elements = batch_size * 4 * latent_height * latent_width
+        elements = batch_size * channels * latent_height * latent_width
         bytes_size = elements * 4  # 4 bytes per float32
 
         # Convert to human-readable format
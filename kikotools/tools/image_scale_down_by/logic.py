@@ -1,18 +1,37 @@
 """Core logic for ImageScaleDownBy tool."""
 
-import torch.nn.functional as F
 from torch import Tensor
 
+from ...core.image_ops import resize_image
 
-def scale_down_image(image: Tensor, scale_by: float) -> Tensor:
+# "bilinear" is antialiased bilinear; "area" averages pixel blocks and takes
+# a fast average-pool path for exact 1/2, 1/4, ... factors
+SCALE_METHODS = ["bilinear", "area"]
+
+
+def scale_down_image(
+    image: Tensor,
+    scale_by: float,
+    precision: str = "fp32",
+    method: str = "bilinear",
+    max_memory_mb: float = 0,
+) -> Tensor:
     """Scale down an image by a given factor.
 
     Args:
         image: Input image tensor of shape (batch, height, width, channels)
         scale_by: Scale factor between 0.01 and 1.0
+        precision: Compute precision ("fp32", "auto", "fp16" or "bf16");
+            half precision is used only where the device supports it
+        method: "bilinear" (antialiased) or "area" (block average)
+        max_memory_mb: Resize the batch in chunks whose temporaries fit this
+            budget, writing into one preallocated output (0 = whole batch)
 
     Returns:
         Scaled down image tensor
+
+    Raises:
+        ValueError: If method or precision is not a known option
     """
     batch, height, width, channels = image.shape
 
@@ -24,17 +43,14 @@ def scale_down_image(image: Tensor, scale_by: float) -> Tensor:
     new_height = max(1, new_height)
     new_width = max(1, new_width)
 
-    # Convert from BHWC to BCHW for interpolation
-    image_chw = image.permute(0, 3, 1, 2)
-
-    # Scale down the image using bilinear interpolation
-    scaled = F.interpolate(
-        image_chw,
-        size=(new_height, new_width),
-        mode="bilinear",
-        align_corners=False,
-        antialias=True,
+    # Resample as a channels-last view of the BHWC tensor, so the permutes
+    # on either side of the interpolation do not copy
+    return resize_image(
+        image,
+        new_height,
+        new_width,
+        antialias=method == "bilinear",
+        mode=method,
+        precision=precision,
+        max_memory_mb=max_memory_mb,
     )
-
-    # Convert back to BHWC
-    return scaled.permute(0, 2, 3, 1)
@@ -5,7 +5,8 @@ from typing import Dict, Any, Tuple
 from torch import Tensor
 
 from ...base import ComfyAssetsBaseNode
-from .logic import scale_down_image
+from ...core.image_ops import PRECISIONS, validate_precision
+from .logic import SCALE_METHODS, scale_down_image
 
 
 class ImageScaleDownByNode(ComfyAssetsBaseNode):
@@ -13,7 +14,9 @@ class ImageScaleDownByNode(ComfyAssetsBaseNode):
     Scales down images by a specified factor.
 
     Reduces image dimensions proportionally using bilinear interpolation
-    with antialiasing for smooth downscaling.
+    with antialiasing for smooth downscaling, or block averaging for a
+    faster path at exact integer factors. Large batches can be resized in
+    chunks under a memory budget.
     """
 
     @classmethod
@@ -31,7 +34,36 @@ class ImageScaleDownByNode(ComfyAssetsBaseNode):
                         "display": "number",
                     },
                 ),
-            }
+            },
+            "optional": {
+                "precision": (
+                    PRECISIONS,
+                    {
+                        "default": "fp32",
+                        "tooltip": "Compute precision; auto and fp16/bf16 use "
+                        "half precision where the device supports it",
+                    },
+                ),
+                "method": (
+                    SCALE_METHODS,
+                    {
+                        "default": "bilinear",
+                        "tooltip": "bilinear: antialiased bilinear; area: block "
+                        "average, fastest for exact 1/2, 1/4, ... scales",
+                    },
+                ),
+                "max_memory_mb": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 65536,
+                        "step": 64,
+                        "tooltip": "Resize the batch a few frames at a time so "
+                        "temporaries fit this budget (0 = whole batch at once)",
+                    },
+                ),
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
@@ -39,22 +71,40 @@ class ImageScaleDownByNode(ComfyAssetsBaseNode):
     RETURN_NAMES = ("images",)
     FUNCTION = "scale_down"
 
-    def scale_down(self, images: Tensor, scale_by: float) -> Tuple[Tensor]:
+    def scale_down(
+        self,
+        images: Tensor,
+        scale_by: float,
+        precision: str = "fp32",
+        method: str = "bilinear",
+        max_memory_mb: int = 0,
+    ) -> Tuple[Tensor]:
         """
         Scale down images by the specified factor.
 
         Args:
             images: Input image tensor
             scale_by: Scale factor between 0.01 and 1.0
+            precision: Compute precision ("fp32", "auto", "fp16" or "bf16")
+            method: Resampling method ("bilinear" or "area")
+            max_memory_mb: Chunked resize budget in MB (0 = off)
 
         Returns:
             Tuple containing scaled down image tensor
         """
         try:
-            self.validate_inputs(images=images, scale_by=scale_by)
+            self.validate_inputs(
+                images=images,
+                scale_by=scale_by,
+                precision=precision,
+                method=method,
+                max_memory_mb=max_memory_mb,
+            )
 
             # Scale down the images
-            scaled_images = scale_down_image(images, scale_by)
+            scaled_images = scale_down_image(
+                images, scale_by, precision, method, max_memory_mb
+            )
 
             _, new_height, new_width, _ = scaled_images.shape
             _, orig_height, orig_width, _ = images.shape
@@ -85,3 +135,13 @@ class ImageScaleDownByNode(ComfyAssetsBaseNode):
 
         if scale_by <= 0 or scale_by > 1.0:
             raise ValueError(f"scale_by must be between 0.01 and 1.0, got {scale_by}")
+
+        validate_precision(kwargs.get("precision", "fp32"))
+
+        method = kwargs.get("method", "bilinear")
+        if method not in SCALE_METHODS:
+            raise ValueError(f"method must be one of {SCALE_METHODS}, got {method}")
+
+        max_memory_mb = kwargs.get("max_memory_mb", 0)
+        if max_memory_mb < 0:
+            raise ValueError(f"max_memory_mb must be >= 0, got {max_memory_mb}")
@@ -2,9 +2,18 @@
 
 from typing import Tuple
 
+import torch
 import torch.nn.functional as F
 from torch import Tensor
 
+from ...core.image_ops import resize_image, to_bhwc, to_nchw
+
+METHODS = ["center crop", "rescale", "pad reflect", "pad constant"]
+
+# "view" returns crops as zero-copy strided views; "contiguous" hands
+# downstream nodes a packed tensor, copying only when the result is strided
+CONTIGUITY_POLICIES = ["view", "contiguous"]
+
 
 def calculate_dimensions_to_multiple(
     height: int, width: int, multiple_of: int
@@ -24,15 +33,119 @@ def calculate_dimensions_to_multiple(
     return new_height, new_width
 
 
+def calculate_padded_dimensions(
+    height: int, width: int, multiple_of: int
+) -> Tuple[int, int]:
+    """Calculate the smallest dimensions at or above the original size that
+    are multiples of the specified value.
+
+    Args:
+        height: Original height
+        width: Original width
+        multiple_of: Value that dimensions should be multiple of
+
+    Returns:
+        Tuple of (new_height, new_width)
+    """
+    new_height = -(-height // multiple_of) * multiple_of
+    new_width = -(-width // multiple_of) * multiple_of
+    return new_height, new_width
+
+
+def reflect_indices(size: int, before: int, after: int, device: torch.device) -> Tensor:
+    """Source indices that mirror an axis outwards without repeating the edge.
+
+    Unlike F.pad(mode="reflect"), the padding may be wider than the axis;
+    the mirror pattern then repeats.
+
+    Args:
+        size: Length of the axis
+        before: Padding before the first element
+        after: Padding after the last element
+        device: Device for the returned tensor
+
+    Returns:
+        Long tensor of length before + size + after
+    """
+    positions = torch.arange(-before, size + after, device=device)
+    if size == 1:
+        return torch.zeros_like(positions)
+
+    period = 2 * (size - 1)
+    positions = positions.remainder(period)
+    return torch.where(positions < size, positions, period - positions)
+
+
+def pad_image_to_multiple_of(
+    image: Tensor, multiple_of: int, mode: str = "reflect", value: float = 0.0
+) -> Tensor:
+    """Pad an image up to dimensions that are multiples of a value.
+
+    The padding is split evenly around the image (the extra pixel goes to
+    the bottom/right), and the output is built in a single allocation with
+    no resampling. Reflection uses the native padding kernel on a
+    channels-last view, falling back to an index gather when the padding is
+    wider than the image.
+
+    Args:
+        image: Input image tensor of shape (batch, height, width, channels)
+        multiple_of: Value that dimensions should be multiple of
+        mode: "reflect" mirrors the image edges, "constant" fills with value
+        value: Fill value for constant padding
+
+    Returns:
+        Padded image tensor
+    """
+    batch, height, width, channels = image.shape
+    new_height, new_width = calculate_padded_dimensions(height, width, multiple_of)
+    if (new_height, new_width) == (height, width):
+        return image
+
+    top = (new_height - height) // 2
+    left = (new_width - width) // 2
+    bottom = new_height - height - top
+    right = new_width - width - left
+
+    if mode == "reflect":
+        if max(top, bottom) < height and max(left, right) < width:
+            padded = F.pad(to_nchw(image), (left, right, top, bottom), mode="reflect")
+            return to_bhwc(padded)
+
+        rows = reflect_indices(height, top, bottom, image.device)
+        cols = reflect_indices(width, left, right, image.device)
+        return image[:, rows[:, None], cols]
+
+    padded = image.new_full((batch, new_height, new_width, channels), value)
+    padded[:, top : top + height, left : left + width] = image
+    return padded
+
+
 def process_image_to_multiple_of(
-    image: Tensor, multiple_of: int, method: str
+    image: Tensor,
+    multiple_of: int,
+    method: str,
+    precision: str = "fp32",
+    antialias: bool = False,
+    max_memory_mb: float = 0,
+    pad_value: float = 0.0,
+    contiguity: str = "view",
 ) -> Tensor:
     """Process image to ensure dimensions are multiples of specified value.
 
     Args:
         image: Input image tensor of shape (batch, height, width, channels)
         multiple_of: Value that dimensions should be multiple of
-        method: Processing method - "center crop" or "rescale"
+        method: Processing method - "center crop", "rescale", "pad reflect"
+            or "pad constant"
+        precision: Compute precision for rescaling ("fp32", "auto", "fp16"
+            or "bf16"); half precision is used only where supported
+        antialias: Low-pass filter when rescaling down (off matches the
+            original plain bilinear rescale)
+        max_memory_mb: Rescale the batch in chunks whose temporaries fit this
+            budget, writing into one preallocated output (0 = whole batch)
+        pad_value: Fill value for "pad constant"
+        contiguity: "view" keeps center crops as zero-copy views;
+            "contiguous" always returns a packed tensor
 
     Returns:
         Processed image tensor
@@ -41,21 +154,27 @@ def process_image_to_multiple_of(
     new_height, new_width = calculate_dimensions_to_multiple(height, width, multiple_of)
 
     if method == "rescale":
-        # Rescale the image to the new dimensions
-        # Convert from BHWC to BCHW for interpolation
-        image_chw = image.permute(0, 3, 1, 2)
-        rescaled = F.interpolate(
-            image_chw,
-            size=(new_height, new_width),
-            mode="bilinear",
-            align_corners=False,
+        # Rescale the image to the new dimensions as a channels-last view,
+        # so no BHWC <-> BCHW copies are made
+        result = resize_image(
+            image,
+            new_height,
+            new_width,
+            antialias=antialias,
+            precision=precision,
+            max_memory_mb=max_memory_mb,
         )
-        # Convert back to BHWC
-        return rescaled.permute(0, 2, 3, 1)
+    elif method in ("pad reflect", "pad constant"):
+        mode = method.split()[1]
+        result = pad_image_to_multiple_of(image, multiple_of, mode, pad_value)
     else:  # center crop
         # Calculate crop offsets to center the crop
         top = (height - new_height) // 2
         left = (width - new_width) // 2
         bottom = top + new_height
         right = left + new_width
-        return image[:, top:bottom, left:right, :]
+        result = image[:, top:bottom, left:right, :]
+
+    if contiguity == "contiguous":
+        return result.contiguous()
+    return result
@@ -5,7 +5,8 @@ from typing import Dict, Any, Tuple
 from torch import Tensor
 
 from ...base import ComfyAssetsBaseNode
-from .logic import process_image_to_multiple_of
+from ...core.image_ops import PRECISIONS, validate_precision
+from .logic import CONTIGUITY_POLICIES, METHODS, process_image_to_multiple_of
 
 
 class ImageToMultipleOfNode(ComfyAssetsBaseNode):
@@ -13,7 +14,8 @@ class ImageToMultipleOfNode(ComfyAssetsBaseNode):
     Adjusts image dimensions to be multiples of a specified value.
 
     Useful for models that require specific dimension constraints.
-    Supports both center cropping and rescaling methods.
+    Supports center cropping, rescaling, and padding up to the next
+    multiple with mirrored edges or a constant fill.
     """
 
     @classmethod
@@ -31,8 +33,55 @@ class ImageToMultipleOfNode(ComfyAssetsBaseNode):
                         "display": "number",
                     },
                 ),
-                "method": (["center crop", "rescale"],),
-            }
+                "method": (METHODS,),
+            },
+            "optional": {
+                "precision": (
+                    PRECISIONS,
+                    {
+                        "default": "fp32",
+                        "tooltip": "Compute precision for rescale; auto and "
+                        "fp16/bf16 use half precision where the device supports it",
+                    },
+                ),
+                "antialias": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Low-pass filter when rescaling down; reduces "
+                        "aliasing but changes pixels compared with plain bilinear",
+                    },
+                ),
+                "max_memory_mb": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 65536,
+                        "step": 64,
+                        "tooltip": "Rescale the batch a few frames at a time so "
+                        "temporaries fit this budget (0 = whole batch at once)",
+                    },
+                ),
+                "pad_value": (
+                    "FLOAT",
+                    {
+                        "default": 0.0,
+                        "min": 0.0,
+                        "max": 1.0,
+                        "step": 0.01,
+                        "tooltip": "Fill value for pad constant",
+                    },
+                ),
+                "contiguity": (
+                    CONTIGUITY_POLICIES,
+                    {
+                        "default": "view",
+                        "tooltip": "view: center crops are zero-copy views; "
+                        "contiguous: always output a packed tensor",
+                    },
+                ),
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
@@ -40,23 +89,56 @@ class ImageToMultipleOfNode(ComfyAssetsBaseNode):
     RETURN_NAMES = ("image",)
     FUNCTION = "process"
 
-    def process(self, image: Tensor, multiple_of: int, method: str) -> Tuple[Tensor]:
+    def process(
+        self,
+        image: Tensor,
+        multiple_of: int,
+        method: str,
+        precision: str = "fp32",
+        antialias: bool = False,
+        max_memory_mb: int = 0,
+        pad_value: float = 0.0,
+        contiguity: str = "view",
+    ) -> Tuple[Tensor]:
         """
         Process image to ensure dimensions are multiples of specified value.
 
         Args:
             image: Input image tensor
             multiple_of: Value that dimensions should be multiple of
-            method: Processing method - "center crop" or "rescale"
+            method: Processing method - "center crop", "rescale",
+                "pad reflect" or "pad constant"
+            precision: Compute precision for rescale ("fp32", "auto", "fp16"
+                or "bf16")
+            antialias: Low-pass filter when rescaling down
+            max_memory_mb: Chunked rescale budget in MB (0 = off)
+            pad_value: Fill value for "pad constant"
+            contiguity: "view" or "contiguous" output policy
 
         Returns:
             Tuple containing processed image tensor
         """
         try:
-            self.validate_inputs(image=image, multiple_of=multiple_of, method=method)
+            self.validate_inputs(
+                image=image,
+                multiple_of=multiple_of,
+                method=method,
+                precision=precision,
+                max_memory_mb=max_memory_mb,
+                contiguity=contiguity,
+            )
 
             # Process the image
-            processed_image = process_image_to_multiple_of(image, multiple_of, method)
+            processed_image = process_image_to_multiple_of(
+                image,
+                multiple_of,
+                method,
+                precision,
+                antialias=antialias,
+                max_memory_mb=max_memory_mb,
+                pad_value=pad_value,
+                contiguity=contiguity,
+            )
 
             _, new_height, new_width, _ = processed_image.shape
             self.log_info(
@@ -88,9 +170,15 @@ class ImageToMultipleOfNode(ComfyAssetsBaseNode):
         if multiple_of <= 0:
             raise ValueError(f"multiple_of must be positive, got {multiple_of}")
 
-        if method not in ["center crop", "rescale"]:
+        if method not in METHODS:
             raise ValueError(f"Invalid method: {method}")
 
+        self._validate_options(**kwargs)
+
+        # Padding only grows the image, so any size works
+        if method.startswith("pad"):
+            return
+
         # Check if resulting dimensions would be too small
         _, height, width, _ = image.shape
         new_height = height - (height % multiple_of)
@@ -101,3 +189,17 @@ class ImageToMultipleOfNode(ComfyAssetsBaseNode):
                 f"Image dimensions ({height}x{width}) are too small "
                 f"to be adjusted to multiple of {multiple_of}"
             )
+
+    def _validate_options(self, **kwargs) -> None:
+        """Validate the optional execution settings."""
+        validate_precision(kwargs.get("precision", "fp32"))
+
+        max_memory_mb = kwargs.get("max_memory_mb", 0)
+        if max_memory_mb < 0:
+            raise ValueError(f"max_memory_mb must be >= 0, got {max_memory_mb}")
+
+        contiguity = kwargs.get("contiguity", "view")
+        if contiguity not in CONTIGUITY_POLICIES:
+            raise ValueError(
+                f"contiguity must be one of {CONTIGUITY_POLICIES}, got {contiguity}"
+            )
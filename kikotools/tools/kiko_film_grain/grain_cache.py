@@ -0,0 +1,128 @@
+"""
+KikoFilmGrain atlas cache
+LRU store for precomputed grain tiles, bounded by a byte budget
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+import torch
+
+# Default budget for cached grain atlases across all parameter sets
+DEFAULT_CACHE_BYTES = 128 * 1024 * 1024
+
+
+class GrainAtlasCache:
+    """
+    Least-recently-used cache of grain atlas tensors
+
+    Entries are evicted oldest first once the summed tensor sizes exceed
+    max_bytes. An entry larger than the whole budget is returned to the
+    caller but not kept.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Maximum total size of cached tensors in bytes
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, torch.Tensor]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current_bytes(self) -> int:
+        """Total size of cached tensors in bytes"""
+        with self._lock:
+            return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[torch.Tensor]:
+        """
+        Look up an atlas, marking it as recently used
+
+        Args:
+            key: Parameter-set key
+
+        Returns:
+            Cached tensor, or None
+        """
+        with self._lock:
+            atlas = self._entries.get(key)
+            if atlas is not None:
+                self._entries.move_to_end(key)
+            return atlas
+
+    def put(self, key: Hashable, atlas: torch.Tensor) -> None:
+        """
+        Store an atlas and evict older entries beyond the byte budget
+
+        Args:
+            key: Parameter-set key
+            atlas: Tensor to cache
+        """
+        size = atlas.numel() * atlas.element_size()
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.numel() * previous.element_size()
+
+            self._entries[key] = atlas
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.numel() * evicted.element_size()
+
+    def get_or_build(
+        self, key: Hashable, builder: Callable[[], torch.Tensor]
+    ) -> torch.Tensor:
+        """
+        Return the cached atlas for key, building and storing it on a miss
+
+        Args:
+            key: Parameter-set key
+            builder: Callable producing the atlas
+
+        Returns:
+            Atlas tensor
+        """
+        atlas = self.get(key)
+        if atlas is None:
+            atlas = builder()
+            self.put(key, atlas)
+        return atlas
+
+    def clear(self) -> None:
+        """Drop all cached atlases"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_atlas_cache: Optional[GrainAtlasCache] = None
+_atlas_cache_lock = threading.Lock()
+
+
+def get_grain_atlas_cache() -> GrainAtlasCache:
+    """
+    Get the shared atlas cache, creating it on first use
+
+    Returns:
+        Process-wide GrainAtlasCache instance
+    """
+    global _atlas_cache
+    with _atlas_cache_lock:
+        if _atlas_cache is None:
+            _atlas_cache = GrainAtlasCache()
+        return _atlas_cache
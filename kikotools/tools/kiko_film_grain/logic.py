@@ -1,6 +1,81 @@
+import functools
+import hashlib
+import math
+from typing import Iterator, List, Optional, Tuple, Union
+
 import torch
 import torch.nn.functional as F
 
+from ...core.image_ops import resize_nchw, resolve_compute_dtype, to_bhwc, to_nchw
+from .grain_cache import get_grain_atlas_cache
+
+# ITU-R BT.709 coefficients
+RGB_TO_YCBCR = (
+    (0.2126, 0.7152, 0.0722),  # Y
+    (-0.1146, -0.3854, 0.5),  # Cb
+    (0.5, -0.4542, -0.0458),  # Cr
+)
+YCBCR_TO_RGB = (
+    (1.0, 0.0, 1.5748),  # R
+    (1.0, -0.1873, -0.4681),  # G
+    (1.0, 1.8556, 0.0),  # B
+)
+
+# Blur kernel sizes for the Y, Cb and Cr grain channels
+GRAIN_BLUR_SIZES = (3, 15, 11)
+
+# Kernels at or above this size are blurred via FFT instead of convolution
+FFT_BLUR_MIN_KERNEL = 31
+
+BLUR_METHODS = ["auto", "separable", "fft", "box"]
+BOX_BLUR_PASSES = 3
+
+# exact: Gaussian grain blurs; fast: at or above COARSE_GRAIN_SCALE the wide
+# chroma blurs use the box approximation, whose small difference is hidden
+# by upsampling the grain afterwards
+BLUR_QUALITIES = ["exact", "fast"]
+COARSE_GRAIN_SCALE = 1.5
+BOX_BLUR_MIN_KERNEL = 9
+
+# per_frame: fresh noise for every image; atlas: cached tileable grain tiles
+# sampled with random offsets and flips; temporal: atlas grain evolved
+# frame to frame with controlled correlation, for video
+GRAIN_MODES = ["per_frame", "atlas", "temporal"]
+
+# Correlation between consecutive frames in temporal mode
+DEFAULT_TEMPORAL_COHERENCE = 0.8
+
+# Grain-resolution size and count of the tiles in one atlas
+ATLAS_TILE_SIZE = 512
+ATLAS_TILES = 4
+
+# Fraction of a tile over which neighbouring atlas cells cross-fade
+ATLAS_BLEND_FRACTION = 8
+
+# Film grain is typically stronger in blue channel, moderate in red
+GRAIN_CHANNEL_WEIGHTS = (2.0, 1.0, 3.0)
+
+
+def _apply_color_matrix(
+    tensor: torch.Tensor, matrix: Tuple[Tuple[float, ...], ...]
+) -> torch.Tensor:
+    """
+    Multiply the first three channels by a 3x3 matrix in a single pass.
+
+    Args:
+        tensor: Tensor of shape [B, H, W, C] with C >= 3
+        matrix: Row-major 3x3 color matrix
+
+    Returns:
+        New tensor of same shape; channels beyond the third are copied through
+    """
+    weights = torch.tensor(matrix, dtype=tensor.dtype, device=tensor.device)
+    converted = torch.matmul(tensor[..., :3], weights.t())
+
+    if tensor.shape[-1] > 3:
+        converted = torch.cat([converted, tensor[..., 3:]], dim=-1)
+    return converted
+
 
 def rgb_to_ycbcr(rgb: torch.Tensor) -> torch.Tensor:
     """
@@ -12,15 +87,7 @@ def rgb_to_ycbcr(rgb: torch.Tensor) -> torch.Tensor:
     Returns:
         YCbCr tensor of same shape
     """
-    ycbcr = rgb.detach().clone()
-    r, g, b = rgb[:, :, :, 0], rgb[:, :, :, 1], rgb[:, :, :, 2]
-
-    # ITU-R BT.709 coefficients
-    ycbcr[:, :, :, 0] = 0.2126 * r + 0.7152 * g + 0.0722 * b  # Y
-    ycbcr[:, :, :, 1] = -0.1146 * r - 0.3854 * g + 0.5 * b  # Cb
-    ycbcr[:, :, :, 2] = 0.5 * r - 0.4542 * g - 0.0458 * b  # Cr
-
-    return ycbcr
+    return _apply_color_matrix(rgb, RGB_TO_YCBCR)
 
 
 def ycbcr_to_rgb(ycbcr: torch.Tensor) -> torch.Tensor:
@@ -33,59 +100,246 @@ def ycbcr_to_rgb(ycbcr: torch.Tensor) -> torch.Tensor:
     Returns:
         RGB tensor of same shape in range [0, 1]
     """
-    rgb = ycbcr.detach().clone()
-    y, cb, cr = ycbcr[:, :, :, 0], ycbcr[:, :, :, 1], ycbcr[:, :, :, 2]
+    return _apply_color_matrix(ycbcr, YCBCR_TO_RGB).clamp_(0, 1)
+
+
+@functools.lru_cache(maxsize=32)
+def gaussian_kernel_1d(
+    kernel_size: int, dtype: torch.dtype, device: torch.device
+) -> torch.Tensor:
+    """
+    Build a normalized 1D Gaussian kernel, cached per (size, dtype, device).
 
-    rgb[:, :, :, 0] = y + 1.5748 * cr  # R
-    rgb[:, :, :, 1] = y - 0.1873 * cb - 0.4681 * cr  # G
-    rgb[:, :, :, 2] = y + 1.8556 * cb  # B
+    The returned tensor is shared between calls and must not be modified.
 
-    return torch.clamp(rgb, 0, 1)
+    Args:
+        kernel_size: Number of taps (odd)
+        dtype: Kernel dtype
+        device: Kernel device
 
+    Returns:
+        Tensor of shape [kernel_size]
+    """
+    sigma = kernel_size / 3.0
+    x = torch.arange(kernel_size, dtype=torch.float64) - kernel_size // 2
+    gauss = torch.exp(-x.pow(2) / (2 * sigma**2))
+    gauss = gauss / gauss.sum()
+    return gauss.to(device=device, dtype=dtype)
 
-def apply_gaussian_blur(tensor: torch.Tensor, kernel_size: int) -> torch.Tensor:
+
+def box_blur_widths(sigma: float, passes: int = BOX_BLUR_PASSES) -> List[int]:
     """
-    Apply Gaussian blur to a tensor using PyTorch operations.
+    Odd box widths whose repeated application approximates a Gaussian.
 
     Args:
-        tensor: Tensor of shape [B, H, W, C]
-        kernel_size: Size of the Gaussian kernel (must be odd)
+        sigma: Standard deviation of the Gaussian to approximate
+        passes: Number of box passes
+
+    Returns:
+        List of box widths, one per pass
+    """
+    ideal = math.sqrt(12 * sigma**2 / passes + 1)
+    lower = int(ideal)
+    if lower % 2 == 0:
+        lower -= 1
+    upper = lower + 2
+
+    lower_count = round(
+        (12 * sigma**2 - passes * lower**2 - 4 * passes * lower - 3 * passes)
+        / (-4 * lower - 4)
+    )
+    return [lower if index < lower_count else upper for index in range(passes)]
+
+
+def _separable_blur(planes: torch.Tensor, kernel_size: int) -> torch.Tensor:
+    """Vertical then horizontal 1D convolution over [N, C, H, W] planes."""
+    gauss = gaussian_kernel_1d(kernel_size, planes.dtype, planes.device)
+    batch_size, channels, h, w = planes.shape
+    padding = kernel_size // 2
+
+    # Every plane shares one kernel, so fold channels into the batch
+    flat = planes.reshape(batch_size * channels, 1, h, w)
+    flat = F.conv2d(flat, gauss.view(1, 1, kernel_size, 1), padding=(padding, 0))
+    flat = F.conv2d(flat, gauss.view(1, 1, 1, kernel_size), padding=(0, padding))
+    return flat.view(batch_size, channels, h, w)
+
+
+def _fft_blur_1d(planes: torch.Tensor, gauss: torch.Tensor, dim: int) -> torch.Tensor:
+    """Zero-padded linear convolution along one axis via the real FFT."""
+    size = planes.shape[dim]
+    kernel_size = gauss.numel()
+    length = size + kernel_size - 1
+
+    kernel_spectrum = torch.fft.rfft(gauss, n=length)
+    if dim == -2:
+        kernel_spectrum = kernel_spectrum.unsqueeze(-1)
+
+    spectrum = torch.fft.rfft(planes, n=length, dim=dim) * kernel_spectrum
+    full = torch.fft.irfft(spectrum, n=length, dim=dim)
+    return full.narrow(dim, kernel_size // 2, size)
+
+
+def _fft_blur(planes: torch.Tensor, kernel_size: int) -> torch.Tensor:
+    """Separable Gaussian blur of [N, C, H, W] planes in the frequency domain."""
+    # Half-precision FFTs are not supported on every device
+    work = planes if planes.dtype == torch.float64 else planes.float()
+    gauss = gaussian_kernel_1d(kernel_size, work.dtype, work.device)
+
+    blurred = _fft_blur_1d(_fft_blur_1d(work, gauss, -2), gauss, -1)
+    return blurred.to(planes.dtype)
+
+
+def _box_blur_1d(planes: torch.Tensor, width: int, dim: int) -> torch.Tensor:
+    """Zero-padded moving average along one axis using a running sum."""
+    radius = width // 2
+    padding = (radius + 1, radius) if dim == -1 else (0, 0, radius + 1, radius)
+    sums = F.pad(planes, padding).cumsum(dim)
+
+    size = planes.shape[dim]
+    return (sums.narrow(dim, width, size) - sums.narrow(dim, 0, size)) / width
+
+
+def _box_blur(planes: torch.Tensor, kernel_size: int) -> torch.Tensor:
+    """Approximate Gaussian blur of [N, C, H, W] planes with repeated boxes."""
+    work = planes if planes.dtype == torch.float64 else planes.float()
+    for width in box_blur_widths(kernel_size / 3.0):
+        work = _box_blur_1d(_box_blur_1d(work, width, -2), width, -1)
+    return work.to(planes.dtype)
+
+
+def blur_reach(kernel_size: int, method: str) -> int:
+    """
+    Number of pixels on each side that influence one blurred output pixel.
+
+    Args:
+        kernel_size: Size of the Gaussian kernel
+        method: Resolved blur method ("separable", "fft" or "box")
+
+    Returns:
+        Filter radius in pixels
+    """
+    if kernel_size <= 1:
+        return 0
+    kernel_size = kernel_size if kernel_size % 2 == 1 else kernel_size + 1
+    if method == "box":
+        return sum(width // 2 for width in box_blur_widths(kernel_size / 3.0))
+    return kernel_size // 2
+
+
+def blur_planes(
+    planes: torch.Tensor,
+    kernel_size: int,
+    method: str = "auto",
+    padding: str = "zeros",
+) -> torch.Tensor:
+    """
+    Gaussian blur [N, C, H, W] planes.
+
+    Args:
+        planes: Tensor of shape [N, C, H, W]
+        kernel_size: Size of the Gaussian kernel (even sizes are rounded up)
+        method: "separable", "fft", "box" (approximate) or "auto", which uses
+            FFT for kernels of FFT_BLUR_MIN_KERNEL taps or more
+        padding: "zeros", or "circular" to wrap around the borders so the
+            result tiles seamlessly
 
     Returns:
         Blurred tensor of same shape
+
+    Raises:
+        ValueError: If method is unknown
     """
+    if method not in BLUR_METHODS:
+        raise ValueError(f"Blur method must be one of {BLUR_METHODS}, got {method}")
+
     if kernel_size <= 1:
-        return tensor
+        return planes
 
     # Ensure kernel size is odd
     kernel_size = kernel_size if kernel_size % 2 == 1 else kernel_size + 1
 
-    # Create Gaussian kernel
-    sigma = kernel_size / 3.0
-    x = torch.arange(kernel_size, dtype=torch.float32) - kernel_size // 2
-    gauss = torch.exp(-x.pow(2) / (2 * sigma**2))
-    gauss = gauss / gauss.sum()
+    if method == "auto":
+        method = "fft" if kernel_size >= FFT_BLUR_MIN_KERNEL else "separable"
 
-    # Create 2D kernel
-    kernel = gauss.unsqueeze(0) * gauss.unsqueeze(1)
-    kernel = kernel.unsqueeze(0).unsqueeze(0)
+    if padding == "circular":
+        # Wrap by the filter's reach, blur, then crop the wrapped border away
+        reach = blur_reach(kernel_size, method)
+        wrapped = F.pad(planes, (reach, reach, reach, reach), mode="circular")
+        blurred = blur_planes(wrapped, kernel_size, method)
+        return blurred[..., reach:-reach, reach:-reach]
 
-    # Apply blur per channel
-    batch_size, h, w, channels = tensor.shape
-    tensor_reshaped = tensor.permute(0, 3, 1, 2)  # [B, C, H, W]
+    if method == "fft":
+        return _fft_blur(planes, kernel_size)
+    if method == "box":
+        return _box_blur(planes, kernel_size)
+    return _separable_blur(planes, kernel_size)
 
-    # Expand kernel for all channels
-    kernel = kernel.repeat(channels, 1, 1, 1)
 
-    # Apply convolution with padding
-    padding = kernel_size // 2
-    blurred = F.conv2d(tensor_reshaped, kernel, padding=padding, groups=channels)
+def apply_gaussian_blur(
+    tensor: torch.Tensor, kernel_size: int, method: str = "auto"
+) -> torch.Tensor:
+    """
+    Apply Gaussian blur to a tensor using PyTorch operations.
 
+    Args:
+        tensor: Tensor of shape [B, H, W, C]
+        kernel_size: Size of the Gaussian kernel (must be odd)
+        method: Blur implementation (see blur_planes)
+
+    Returns:
+        Blurred tensor of same shape
+    """
+    blurred = blur_planes(tensor.permute(0, 3, 1, 2), kernel_size, method)
     return blurred.permute(0, 2, 3, 1)  # Back to [B, H, W, C]
 
 
+def make_generator(
+    seed: int, device: Optional[Union[str, torch.device]] = None
+) -> torch.Generator:
+    """
+    Create a seeded generator local to one call.
+
+    Using a private generator keeps grain reproducible without resetting
+    the global RNG that samplers and other nodes rely on.
+
+    Args:
+        seed: Random seed
+        device: Device the random numbers are generated on (default: CPU)
+
+    Returns:
+        Seeded torch.Generator
+    """
+    generator = torch.Generator(device=device or "cpu")
+    generator.manual_seed(seed)
+    return generator
+
+
+def derive_seed(seed: int, *indices: int) -> int:
+    """
+    Derive an independent seed for one frame, tile or cell.
+
+    Sub-seeds depend only on the user seed and the indices, so results do
+    not change with how frames or tiles are grouped for processing.
+
+    Args:
+        seed: User seed
+        *indices: Frame/cell indices identifying the sub-stream
+
+    Returns:
+        63-bit seed for make_generator()
+    """
+    key = ":".join(str(value) for value in (seed,) + indices).encode("ascii")
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
 def generate_grain_texture(
-    batch_size: int, height: int, width: int, scale: float, seed: int
+    batch_size: int,
+    height: int,
+    width: int,
+    scale: float,
+    seed: int,
+    device: Optional[Union[str, torch.device]] = None,
 ) -> torch.Tensor:
     """
     Generate base grain texture at specified scale.
@@ -96,21 +350,546 @@ def generate_grain_texture(
         width: Target width
         scale: Scale factor for grain size (larger = coarser grain)
         seed: Random seed for reproducibility
+        device: Device to generate the noise on (default: CPU)
 
     Returns:
         Grain texture tensor of shape [B, H/scale, W/scale, 3]
     """
-    torch.manual_seed(seed)
-
     grain_height = max(1, int(height / scale))
     grain_width = max(1, int(width / scale))
 
     # Generate random noise
-    grain = torch.rand(batch_size, grain_height, grain_width, 3)
+    return torch.rand(
+        batch_size,
+        grain_height,
+        grain_width,
+        3,
+        generator=make_generator(seed, device),
+        device=device,
+    )
+
+
+def grain_affine(
+    strength: float, saturation: float, toe: float, device: torch.device
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Fold grain strength, channel weights, saturation and toe into one affine map.
+
+    Each of those steps is linear in the grain color, so together they are
+    grain @ A.T + b. Toe is included because the screen blend followed by
+    the toe lift simplifies to 1 - (1 - image) * grain * (1 - toe).
+
+    Args:
+        strength: Grain intensity
+        saturation: Color saturation of grain
+        toe: Shadow lift amount
+        device: Device for the returned tensors
+
+    Returns:
+        Tuple of (A [3, 3], b [3]) float32 tensors
+    """
+    gain = torch.tensor(GRAIN_CHANNEL_WEIGHTS, dtype=torch.float64) * strength
+
+    # Saturation mixes each channel with green (used as the luminance proxy)
+    mix = torch.eye(3, dtype=torch.float64) * saturation
+    mix[:, 1] += 1 - saturation
+
+    matrix = mix * gain * (1 - toe)
+    offset = (1 - toe) * (1 - 0.5 * (mix @ gain))
+
+    return (
+        matrix.to(device=device, dtype=torch.float32),
+        offset.to(device=device, dtype=torch.float32),
+    )
+
+
+def use_box_grain_blur(scale: float, blur_quality: str) -> bool:
+    """
+    Whether grain at this scale is blurred with the box approximation.
+
+    Args:
+        scale: Grain size
+        blur_quality: One of BLUR_QUALITIES
+
+    Returns:
+        True for "fast" quality at coarse grain scales
+
+    Raises:
+        ValueError: If blur_quality is unknown
+    """
+    if blur_quality not in BLUR_QUALITIES:
+        raise ValueError(
+            f"blur_quality must be one of {BLUR_QUALITIES}, got {blur_quality}"
+        )
+    return blur_quality == "fast" and scale >= COARSE_GRAIN_SCALE
+
+
+def grain_blur_method(kernel_size: int, coarse: bool) -> str:
+    """
+    Pick the blur method for one grain channel.
+
+    The grain kernels (GRAIN_BLUR_SIZES) are all small enough that the
+    separable convolution beats FFT.
+
+    Args:
+        kernel_size: Channel blur kernel size
+        coarse: Use the box approximation for wide kernels
+
+    Returns:
+        Method name for blur_planes
+    """
+    if coarse and kernel_size >= BOX_BLUR_MIN_KERNEL:
+        return "box"
+    return "separable"
+
+
+def grain_blur_reach(coarse: bool) -> int:
+    """
+    Widest reach of the per-channel grain blurs.
+
+    Args:
+        coarse: Whether the grain scale is coarse
+
+    Returns:
+        Margin in grain pixels needed around a region to blur it exactly
+    """
+    return max(
+        blur_reach(size, grain_blur_method(size, coarse)) for size in GRAIN_BLUR_SIZES
+    )
+
+
+def blur_grain(
+    grain: torch.Tensor, coarse: bool = False, padding: str = "zeros"
+) -> torch.Tensor:
+    """
+    Shape raw noise into grain by blurring each YCbCr channel separately.
+
+    Args:
+        grain: Noise tensor of shape [B, h, w, 3] in range [0, 1]
+        coarse: Use the box approximation for the wide chroma blurs
+        padding: Border handling passed to blur_planes
+
+    Returns:
+        Blurred RGB grain of shape [B, h, w, 3] in range [0, 1]
+    """
+    # Convert to YCbCr for better grain application
+    planes = rgb_to_ycbcr(grain).permute(0, 3, 1, 2)
+
+    # Apply different blur kernels to each channel for more realistic grain:
+    # Y - fine detail, Cb - medium blur for color noise, Cr - slightly less blur
+    blurred = torch.cat(
+        [
+            blur_planes(
+                planes[:, index : index + 1],
+                size,
+                grain_blur_method(size, coarse),
+                padding,
+            )
+            for index, size in enumerate(GRAIN_BLUR_SIZES)
+        ],
+        dim=1,
+    )
+
+    return ycbcr_to_rgb(blurred.permute(0, 2, 3, 1))
+
+
+def grain_to_multiplier(
+    rgb: torch.Tensor, strength: float, saturation: float, toe: float
+) -> torch.Tensor:
+    """
+    Apply the folded strength/saturation/toe map to blurred grain.
+
+    Args:
+        rgb: Blurred grain of shape [B, h, w, 3]
+        strength: Grain intensity
+        saturation: Color saturation of grain
+        toe: Shadow lift amount
+
+    Returns:
+        Multiplier tensor of shape [B, h, w, 3]
+    """
+    matrix, offset = grain_affine(strength, saturation, toe, rgb.device)
+    flat = torch.addmm(offset, rgb.reshape(-1, 3), matrix.t())
+    return flat.view(rgb.shape)
+
+
+def build_grain_multiplier(
+    grain: torch.Tensor,
+    strength: float,
+    saturation: float,
+    toe: float,
+    coarse: bool = False,
+) -> torch.Tensor:
+    """
+    Turn raw grain noise into the per-pixel multiplier used by the blend.
+
+    Args:
+        grain: Noise tensor of shape [B, h, w, 3] in range [0, 1]
+        strength: Grain intensity
+        saturation: Color saturation of grain
+        toe: Shadow lift amount
+        coarse: Use the box approximation for the wide chroma blurs
+
+    Returns:
+        Multiplier tensor of shape [B, h, w, 3]
+    """
+    return grain_to_multiplier(blur_grain(grain, coarse), strength, saturation, toe)
+
+
+def build_grain_atlas(
+    seed: int,
+    coarse: bool,
+    device: torch.device,
+    tile_size: int = ATLAS_TILE_SIZE,
+    tiles: int = ATLAS_TILES,
+) -> torch.Tensor:
+    """
+    Synthesize a set of seamlessly tileable, already-blurred grain tiles.
+
+    Args:
+        seed: Random seed for the tile noise
+        coarse: Use the box approximation for the wide chroma blurs
+        device: Device to build the tiles on
+        tile_size: Tile edge length at grain resolution
+        tiles: Number of tiles
+
+    Returns:
+        Blurred RGB grain tiles of shape [tiles, tile_size, tile_size, 3]
+    """
+    noise = torch.rand(
+        tiles,
+        tile_size,
+        tile_size,
+        3,
+        generator=make_generator(seed, device),
+        device=device,
+    )
+    return blur_grain(noise, coarse, padding="circular")
+
+
+def get_grain_atlas(seed: int, coarse: bool, device: torch.device) -> torch.Tensor:
+    """
+    Get the cached grain atlas for a parameter set, building it on a miss.
+
+    Strength, saturation and toe are applied after sampling, so one atlas
+    serves every setting of those controls.
+
+    Args:
+        seed: Random seed
+        coarse: Use the box approximation for the wide chroma blurs
+        device: Device the atlas lives on
+
+    Returns:
+        Atlas tensor from build_grain_atlas()
+    """
+    key = (seed, coarse, ATLAS_TILE_SIZE, ATLAS_TILES, str(device))
+    return get_grain_atlas_cache().get_or_build(
+        key, lambda: build_grain_atlas(seed, coarse, device)
+    )
+
+
+def _atlas_cells(
+    start: int, length: int, size: int
+) -> List[Tuple[int, int, int, torch.Tensor]]:
+    """
+    Atlas cells covering one axis of a grain field.
+
+    Cell k spans [k * pitch, k * pitch + size) with pitch = size - band, so
+    neighbours overlap by band pixels, across which their weights ramp
+    linearly and sum to one. The grid is absolute, so spatial tiles of a
+    field see the same cells as the whole field.
+
+    Args:
+        start: First coordinate of the field along this axis
+        length: Field extent along this axis
+        size: Atlas tile size
+
+    Returns:
+        List of (cell index, first coordinate, end coordinate, weights)
+    """
+    band = max(1, size // ATLAS_BLEND_FRACTION)
+    pitch = size - band
+    end = start + length
+
+    cells = []
+    for cell in range(max(0, (start - size) // pitch + 1), (end - 1) // pitch + 1):
+        first = max(start, cell * pitch)
+        last = min(end, cell * pitch + size)
+        offset = torch.arange(first - cell * pitch, last - cell * pitch) + 0.5
+        weights = torch.minimum(offset, size - offset).div_(band).clamp_(max=1.0)
+        cells.append((cell, first, last, weights))
+    return cells
+
+
+def _atlas_weight_norm(
+    cells: List[Tuple[int, int, int, torch.Tensor]], start: int, length: int
+) -> torch.Tensor:
+    """Square root of the summed squared cell weights along one axis."""
+    total = torch.zeros(length)
+    for _, first, last, weights in cells:
+        total[first - start : last - start] += weights**2
+    return total.sqrt_()
+
+
+def _sample_atlas_cell(
+    atlas: torch.Tensor, seed: int, rows: torch.Tensor, cols: torch.Tensor
+) -> torch.Tensor:
+    """Gather one cell with its own tile, wrap-around offset and flips."""
+    tiles, size = atlas.shape[0], atlas.shape[1]
+    generator = make_generator(seed)
+    choice = int(torch.randint(tiles, (1,), generator=generator))
+    offsets = torch.randint(size, (2,), generator=generator)
+    flips = torch.randint(2, (2,), generator=generator).bool()
+
+    rows = (rows + offsets[0]) % size
+    cols = (cols + offsets[1]) % size
+    if flips[0]:
+        rows = size - 1 - rows
+    if flips[1]:
+        cols = size - 1 - cols
+
+    return atlas[choice][rows.to(atlas.device)[:, None], cols.to(atlas.device)[None, :]]
+
+
+def sample_grain_atlas(
+    atlas: torch.Tensor,
+    batch_size: int,
+    height: int,
+    width: int,
+    seed: int,
+    first_frame: int = 0,
+    row_start: int = 0,
+    col_start: int = 0,
+) -> torch.Tensor:
+    """
+    Assemble per-frame grain fields from atlas tiles.
+
+    The field is covered by tile-sized cells, each with its own tile, random
+    wrap-around offset and random horizontal/vertical flips, so the grain
+    does not repeat across large frames and neighbouring frames are
+    decorrelated. Overlapping cells are cross-faded around the grain mean
+    with weights normalized to keep the grain variance constant. A field
+    within one tile is a single gather per frame.
+
+    Args:
+        atlas: Tiles of shape [tiles, size, size, 3]
+        batch_size: Number of frames
+        height: Grain field height
+        width: Grain field width
+        seed: Random seed for tile choice, offsets and flips
+        first_frame: Index of the first frame within the whole sequence
+        row_start: First grain row to sample (for spatial tiles)
+        col_start: First grain column to sample (for spatial tiles)
+
+    Returns:
+        Grain tensor of shape [batch_size, height, width, 3]
+    """
+    size = atlas.shape[1]
+    row_cells = _atlas_cells(row_start, height, size)
+    col_cells = _atlas_cells(col_start, width, size)
+    single = len(row_cells) == 1 and len(col_cells) == 1
+
+    grain = torch.empty(
+        batch_size, height, width, 3, dtype=atlas.dtype, device=atlas.device
+    )
+    if not single:
+        # Normalizer sqrt(sum of squared weights), separable over the axes
+        norm = _atlas_weight_norm(row_cells, row_start, height)[:, None, None]
+        norm = norm * _atlas_weight_norm(col_cells, col_start, width)[:, None]
+        norm = norm.to(atlas.device, atlas.dtype)
+
+    for frame in range(batch_size):
+        # Per-frame layout, independent of how frames are chunked
+        frame_seed = derive_seed(seed, first_frame + frame)
+        if not single:
+            grain[frame] = 0.0
+
+        for row_cell, row_first, row_last, row_weights in row_cells:
+            for col_cell, col_first, col_last, col_weights in col_cells:
+                # Cell (0, 0) keeps the frame seed, so small fields are unchanged
+                cell_seed = frame_seed
+                if row_cell or col_cell:
+                    cell_seed = derive_seed(frame_seed, row_cell, col_cell)
+                sample = _sample_atlas_cell(
+                    atlas,
+                    cell_seed,
+                    torch.arange(row_first, row_last),
+                    torch.arange(col_first, col_last),
+                )
+                if single:
+                    grain[frame] = sample
+                    continue
+
+                weights = row_weights[:, None, None] * col_weights[None, :, None]
+                grain[
+                    frame,
+                    row_first - row_start : row_last - row_start,
+                    col_first - col_start : col_last - col_start,
+                ].add_(sample.sub_(0.5).mul_(weights.to(atlas.device, atlas.dtype)))
+
+        if not single:
+            grain[frame].div_(norm).add_(0.5)
 
     return grain
 
 
+def resize_grain(grain: torch.Tensor, height: int, width: int) -> torch.Tensor:
+    """
+    Bilinearly resize a grain multiplier to the image size.
+
+    The BHWC tensor is viewed as channels-last NCHW, which interpolate()
+    preserves, so neither permute copies. Half-precision grain is resized
+    in its own dtype.
+
+    Args:
+        grain: Tensor of shape [B, h, w, 3]
+        height: Target height
+        width: Target width
+
+    Returns:
+        Tensor of shape [B, height, width, 3]
+    """
+    return to_bhwc(resize_nchw(to_nchw(grain), height, width))
+
+
+def blend_grain_(rgb: torch.Tensor, grain: torch.Tensor) -> torch.Tensor:
+    """
+    Screen-blend a grain multiplier into RGB values in place.
+
+    Computes clamp(1 - (1 - rgb) * grain, 0, 1), which is lerp(1, rgb, grain),
+    as one lerp kernel writing into rgb followed by one clamp, with no
+    temporaries. Grain of a lower precision than rgb is not accepted as a
+    lerp weight and falls back to four in-place passes. Screen blending
+    preserves highlights better than multiply.
+
+    Args:
+        rgb: Tensor of shape [..., 3] holding image values, modified in place
+        grain: Multiplier broadcastable to rgb
+
+    Returns:
+        The modified rgb tensor
+    """
+    if grain.dtype != rgb.dtype:
+        return rgb.sub_(1).mul_(grain).add_(1).clamp_(0, 1)
+    one = torch.ones((), dtype=rgb.dtype, device=rgb.device)
+    return torch.lerp(one, rgb, grain, out=rgb).clamp_(0, 1)
+
+
+def iter_temporal_grain(
+    atlas: torch.Tensor,
+    frames: int,
+    height: int,
+    width: int,
+    seed: int,
+    coherence: float,
+    row_start: int = 0,
+    col_start: int = 0,
+) -> Iterator[torch.Tensor]:
+    """
+    Evolve one persistent grain field across a frame sequence.
+
+    The field follows a first-order autoregressive process around the grain
+    mean: field = mean + c * (field - mean) + sqrt(1 - c^2) * (sample - mean),
+    where each new sample is a cheap atlas lookup. The weights keep the
+    grain variance constant, so grain strength does not drift over time,
+    and only one field is held regardless of sequence length.
+
+    Args:
+        atlas: Grain atlas from get_grain_atlas()
+        frames: Number of frames
+        height: Field height in grain pixels
+        width: Field width in grain pixels
+        seed: Random seed for the atlas samples
+        coherence: Correlation between consecutive frames (0 = independent)
+        row_start: First grain row (for spatial tiles)
+        col_start: First grain column (for spatial tiles)
+
+    Yields:
+        Field of shape [1, height, width, 3] for each frame; the same tensor
+        is updated in place, so use it before advancing the iterator
+    """
+    innovation = math.sqrt(1 - coherence**2)
+    field = None
+
+    for frame in range(frames):
+        sample = sample_grain_atlas(
+            atlas, 1, height, width, seed, frame, row_start, col_start
+        )
+        if field is None:
+            field = sample
+        else:
+            field.sub_(0.5).mul_(coherence)
+            field.add_(sample.sub_(0.5), alpha=innovation).add_(0.5)
+        yield field
+
+
+def validate_grain_mode(grain_mode: str, temporal_coherence: float) -> None:
+    """
+    Check the grain mode options.
+
+    Args:
+        grain_mode: Grain synthesis mode
+        temporal_coherence: Frame-to-frame correlation for temporal mode
+
+    Raises:
+        ValueError: If either value is out of range
+    """
+    if grain_mode not in GRAIN_MODES:
+        raise ValueError(f"grain_mode must be one of {GRAIN_MODES}, got {grain_mode}")
+    if not 0.0 <= temporal_coherence < 1.0:
+        raise ValueError(
+            f"temporal_coherence must be in [0, 1), got {temporal_coherence}"
+        )
+
+
+def _apply_temporal_grain(
+    result: torch.Tensor,
+    atlas: torch.Tensor,
+    scale: float,
+    strength: float,
+    saturation: float,
+    toe: float,
+    seed: int,
+    coherence: float,
+    grain_dtype: torch.dtype,
+) -> torch.Tensor:
+    """Blend temporally evolving grain into result frame by frame."""
+    frames, height, width = result.shape[:3]
+    fields = iter_temporal_grain(
+        atlas,
+        frames,
+        max(1, int(height / scale)),
+        max(1, int(width / scale)),
+        seed,
+        coherence,
+    )
+
+    for frame, field in enumerate(fields):
+        grain = grain_to_multiplier(field, strength, saturation, toe)
+        grain = resize_grain(grain.to(grain_dtype), height, width)
+        blend_grain_(result[frame : frame + 1, ..., :3], grain)
+    return result
+
+
+def prepare_output(image: torch.Tensor, inplace: bool) -> torch.Tensor:
+    """
+    Get the tensor grain is blended into.
+
+    Args:
+        image: Input tensor of shape [B, H, W, C]
+        inplace: Reuse image itself as the output
+
+    Returns:
+        image when inplace, otherwise a new tensor holding a copy of it
+    """
+    if inplace:
+        return image
+
+    result = torch.empty_like(image)
+    result.copy_(image)
+    return result
+
+
 def apply_film_grain(
     image: torch.Tensor,
     scale: float = 0.5,
@@ -118,16 +897,25 @@ def apply_film_grain(
     saturation: float = 0.7,
     toe: float = 0.0,
     seed: int = 0,
+    inplace: bool = False,
+    grain_mode: str = "per_frame",
+    temporal_coherence: float = DEFAULT_TEMPORAL_COHERENCE,
+    precision: str = "fp32",
+    blur_quality: str = "exact",
 ) -> torch.Tensor:
     """
     Apply film grain effect to an image with improved algorithms.
 
     Improvements over original:
     - Better color space conversion using ITU-R BT.709 coefficients
-    - More efficient Gaussian blur using PyTorch convolutions
+    - Separable Gaussian blur with cached kernels (optional box
+      approximation for coarse grain)
     - Improved grain mixing with better channel weighting
     - Preserves alpha channel if present
-    - Better memory efficiency
+    - Noise is generated on the image's device with a local generator
+    - Grain weighting, saturation and toe are folded into one color matrix
+      at grain resolution; the blend is one lerp and one clamp over the
+      output, with no full-size copies beyond the output and the grain
 
     Args:
         image: Input tensor of shape [B, H, W, C] in range [0, 1]
@@ -136,10 +924,30 @@ def apply_film_grain(
         saturation: Color saturation of grain (0.0-2.0)
         toe: Lift blacks/shadows (-0.2-0.5)
         seed: Random seed for reproducibility
+        inplace: Write the result into image instead of a new tensor
+        grain_mode: "per_frame" synthesizes fresh grain for every image;
+            "atlas" samples cached tileable grain tiles, which is much
+            cheaper for repeated settings and video; "temporal" treats the
+            batch as a video and evolves the atlas grain between frames
+        temporal_coherence: Frame-to-frame grain correlation in temporal
+            mode (0.0-0.99)
+        precision: Dtype for the full-size grain multiplier ("fp32", "auto",
+            "fp16" or "bf16"); half precision halves the memory traffic of
+            the resize and blend where the device supports it
+        blur_quality: "exact", or "fast" to approximate the chroma blurs
+            of coarse grain (scale >= COARSE_GRAIN_SCALE) with box filters
 
     Returns:
         Image with film grain applied
+
+    Raises:
+        ValueError: If grain_mode, temporal_coherence, precision or
+            blur_quality is invalid
     """
+    validate_grain_mode(grain_mode, temporal_coherence)
+    grain_dtype = resolve_compute_dtype(image.device, precision, image.dtype)
+    coarse = use_box_grain_blur(scale, blur_quality)
+
     if strength == 0.0:
         return image
 
@@ -147,75 +955,41 @@ def apply_film_grain(
     if image.shape[0] == 0:
         return image
 
-    result = image.detach().clone()
-    has_alpha = image.shape[-1] == 4
-
-    # Generate grain texture
-    grain = generate_grain_texture(
-        image.shape[0], image.shape[1], image.shape[2], scale, seed
-    )
-
-    # Convert to YCbCr for better grain application
-    grain_ycbcr = rgb_to_ycbcr(grain)
-
-    # Apply different blur kernels to each channel for more realistic grain
-    # Y channel - fine detail
-    grain_ycbcr[:, :, :, 0] = apply_gaussian_blur(
-        grain_ycbcr[:, :, :, 0:1], kernel_size=3
-    ).squeeze(-1)
-
-    # Cb channel - medium blur for color noise
-    grain_ycbcr[:, :, :, 1] = apply_gaussian_blur(
-        grain_ycbcr[:, :, :, 1:2], kernel_size=15
-    ).squeeze(-1)
-
-    # Cr channel - slightly less blur
-    grain_ycbcr[:, :, :, 2] = apply_gaussian_blur(
-        grain_ycbcr[:, :, :, 2:3], kernel_size=11
-    ).squeeze(-1)
-
-    # Convert back to RGB
-    grain = ycbcr_to_rgb(grain_ycbcr)
-
-    # Center grain around 0 and apply strength
-    grain = (grain - 0.5) * strength
-
-    # Apply channel-specific weighting for more realistic film grain
-    # Film grain is typically stronger in blue channel, moderate in red
-    grain[:, :, :, 0] *= 2.0  # Red channel
-    grain[:, :, :, 1] *= 1.0  # Green channel (reference)
-    grain[:, :, :, 2] *= 3.0  # Blue channel
-
-    # Add 1 to make it multiplicative
-    grain = grain + 1.0
-
-    # Apply saturation control
-    # Extract luminance for desaturation mixing
-    luminance = grain[:, :, :, 1:2]  # Use green channel as approximation
-    grain = grain * saturation + luminance * (1 - saturation)
-
-    # Interpolate grain to match image size if needed
-    if grain.shape[1] != image.shape[1] or grain.shape[2] != image.shape[2]:
-        grain = F.interpolate(
-            grain.permute(0, 3, 1, 2),
-            size=(image.shape[1], image.shape[2]),
-            mode="bilinear",
-            align_corners=False,
-        ).permute(0, 2, 3, 1)
-
-    # Apply grain using screen blend mode: 1 - (1 - image) * grain
-    # This preserves highlights better than multiply
-    if has_alpha:
-        # Only apply to RGB channels
-        result[:, :, :, :3] = 1 - (1 - result[:, :, :, :3]) * grain
+    batch_size, height, width = image.shape[:3]
+
+    if grain_mode == "temporal":
+        return _apply_temporal_grain(
+            prepare_output(image, inplace),
+            get_grain_atlas(seed, coarse, image.device),
+            scale,
+            strength,
+            saturation,
+            toe,
+            seed,
+            temporal_coherence,
+            grain_dtype,
+        )
+
+    if grain_mode == "atlas":
+        atlas = get_grain_atlas(seed, coarse, image.device)
+        grain = sample_grain_atlas(
+            atlas,
+            batch_size,
+            max(1, int(height / scale)),
+            max(1, int(width / scale)),
+            seed,
+        )
+        grain = grain_to_multiplier(grain, strength, saturation, toe)
     else:
-        result = 1 - (1 - result[:, :, :, :3]) * grain
+        # Generate grain texture
+        grain = generate_grain_texture(
+            batch_size, height, width, scale, seed, device=image.device
+        )
+        grain = build_grain_multiplier(grain, strength, saturation, toe, coarse)
 
-    # Apply toe adjustment (lift blacks)
-    if has_alpha:
-        result[:, :, :, :3] = result[:, :, :, :3] * (1 - toe) + toe
-    else:
-        result = result * (1 - toe) + toe
+    # Interpolate grain to match image size if needed
+    grain = resize_grain(grain.to(grain_dtype), height, width)
 
-    # Ensure output is in valid range
-    return torch.clamp(result, 0, 1)
+    result = prepare_output(image, inplace)
+    blend_grain_(result[..., :3], grain)
+    return result
@@ -2,7 +2,14 @@ import torch
 from typing import Dict, Any, Tuple
 
 from ...base import ComfyAssetsBaseNode
-from .logic import apply_film_grain
+from ...core.image_ops import PRECISIONS
+from .logic import (
+    BLUR_QUALITIES,
+    DEFAULT_TEMPORAL_COHERENCE,
+    GRAIN_MODES,
+    apply_film_grain,
+)
+from .tiling import apply_film_grain_tiled
 
 
 class KikoFilmGrainNode(ComfyAssetsBaseNode):
@@ -80,6 +87,60 @@ class KikoFilmGrainNode(ComfyAssetsBaseNode):
                     },
                 ),
             },
+            "optional": {
+                "grain_mode": (
+                    GRAIN_MODES,
+                    {
+                        "default": "per_frame",
+                        "description": "per_frame synthesizes new grain for every "
+                        "image; atlas reuses cached tileable grain with random "
+                        "offsets (much faster for video and repeated settings); "
+                        "temporal evolves grain smoothly across a video batch",
+                    },
+                ),
+                "temporal_coherence": (
+                    "FLOAT",
+                    {
+                        "default": DEFAULT_TEMPORAL_COHERENCE,
+                        "min": 0.0,
+                        "max": 0.99,
+                        "step": 0.01,
+                        "display": "slider",
+                        "description": "Temporal mode: how much grain carries over "
+                        "from one frame to the next (0 = independent frames)",
+                    },
+                ),
+                "max_memory_mb": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 65536,
+                        "step": 64,
+                        "description": "Working memory budget for grain; large "
+                        "images are processed in tiles and batch chunks that fit "
+                        "(0 = whole batch at once)",
+                    },
+                ),
+                "precision": (
+                    PRECISIONS,
+                    {
+                        "default": "fp32",
+                        "description": "Precision of the full-size grain; auto "
+                        "and fp16/bf16 halve its memory traffic where the device "
+                        "supports half precision",
+                    },
+                ),
+                "blur_quality": (
+                    BLUR_QUALITIES,
+                    {
+                        "default": "exact",
+                        "description": "exact keeps the Gaussian grain blur; fast "
+                        "approximates the chroma blurs with box filters at scale "
+                        "1.5 and above (faster, slightly different grain)",
+                    },
+                ),
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
@@ -96,6 +157,11 @@ class KikoFilmGrainNode(ComfyAssetsBaseNode):
         saturation: float,
         toe: float,
         seed: int,
+        grain_mode: str = "per_frame",
+        max_memory_mb: int = 0,
+        temporal_coherence: float = DEFAULT_TEMPORAL_COHERENCE,
+        precision: str = "fp32",
+        blur_quality: str = "exact",
     ) -> Tuple[torch.Tensor]:
         """
         Apply film grain effect to the input image.
@@ -107,17 +173,41 @@ class KikoFilmGrainNode(ComfyAssetsBaseNode):
             saturation: Color saturation of grain (0.0-2.0)
             toe: Shadow lifting amount (-0.2-0.5)
             seed: Random seed for reproducibility
+            grain_mode: Grain synthesis mode (per_frame, atlas or temporal)
+            max_memory_mb: Tiled processing budget in MB (0 = off)
+            temporal_coherence: Frame-to-frame grain correlation (temporal mode)
+            precision: Grain precision (fp32, auto, fp16 or bf16)
+            blur_quality: Grain blur quality (exact or fast)
 
         Returns:
             Tuple containing the processed image tensor
         """
-        result = apply_film_grain(
-            image=image,
-            scale=scale,
-            strength=strength,
-            saturation=saturation,
-            toe=toe,
-            seed=seed,
-        )
+        if max_memory_mb > 0:
+            result = apply_film_grain_tiled(
+                image=image,
+                scale=scale,
+                strength=strength,
+                saturation=saturation,
+                toe=toe,
+                seed=seed,
+                max_memory_mb=max_memory_mb,
+                grain_mode=grain_mode,
+                temporal_coherence=temporal_coherence,
+                precision=precision,
+                blur_quality=blur_quality,
+            )
+        else:
+            result = apply_film_grain(
+                image=image,
+                scale=scale,
+                strength=strength,
+                saturation=saturation,
+                toe=toe,
+                seed=seed,
+                grain_mode=grain_mode,
+                temporal_coherence=temporal_coherence,
+                precision=precision,
+                blur_quality=blur_quality,
+            )
 
         return (result,)
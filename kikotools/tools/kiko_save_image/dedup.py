@@ -0,0 +1,192 @@
+"""
+KikoSaveImage deduplication store
+Content-hash index that lets bit-identical outputs reuse an existing file
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import xxhash
+except ImportError:
+    # Optional faster hash (pip install xxhash); blake2b is used otherwise
+    xxhash = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# off: always encode; hardlink: new filename linked to the existing file;
+# reference: no new file, the preview points at the existing file
+DEDUP_MODES = ["off", "hardlink", "reference"]
+
+INDEX_FILENAME = ".kiko_dedup_index.jsonl"
+
+
+def hash_pixels(image_array: np.ndarray) -> str:
+    """
+    Hash a quantized uint8 frame including its shape
+
+    Args:
+        image_array: uint8 array in format [height, width, channels]
+
+    Returns:
+        Hex digest identifying the pixel content
+    """
+    shape = ",".join(str(dim) for dim in image_array.shape).encode("ascii")
+    data = np.ascontiguousarray(image_array).data
+
+    if xxhash is not None:
+        hasher = xxhash.xxh3_128(shape)
+    else:
+        hasher = hashlib.blake2b(shape, digest_size=16)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def make_dedup_key(digest: str, format_type: str, *settings) -> str:
+    """
+    Build an index key from a pixel digest and the encoding settings
+
+    Identical pixels saved with a different format or quality produce a
+    different file, so the settings are part of the key.
+
+    Args:
+        digest: Pixel digest from hash_pixels()
+        format_type: Encoder name
+        *settings: Encoding settings affecting the output bytes
+
+    Returns:
+        Index key string
+    """
+    return ":".join([digest, format_type] + [str(value) for value in settings])
+
+
+class DedupIndex:
+    """
+    Append-only hash -> path index stored in the output directory
+
+    Each saved file appends one JSON line, so recording an entry costs a
+    single small write regardless of index size. Later lines win on load,
+    and entries whose file has disappeared or changed size are ignored.
+    """
+
+    def __init__(self, output_dir: str):
+        """
+        Initialize and load the index for an output directory
+
+        Args:
+            output_dir: Output directory root; stored paths are relative to it
+        """
+        self.output_dir = output_dir
+        self.index_path = os.path.join(output_dir, INDEX_FILENAME)
+        self._entries: Dict[str, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Read the index file, skipping malformed lines"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = (entry["path"], entry["size"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"KikoSaveImage: could not read dedup index: {e}")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Find a still-valid file previously saved for a key
+
+        Args:
+            key: Index key from make_dedup_key()
+
+        Returns:
+            Full path of the existing file, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        relative_path, size = entry
+        full_path = os.path.join(self.output_dir, relative_path)
+        try:
+            if os.path.getsize(full_path) == size:
+                return full_path
+        except OSError:
+            pass
+
+        # File was deleted or replaced since it was indexed
+        with self._lock:
+            self._entries.pop(key, None)
+        return None
+
+    def add(self, key: str, filepath: str) -> None:
+        """
+        Record a newly written file
+
+        Args:
+            key: Index key from make_dedup_key()
+            filepath: Full path of the written file
+        """
+        relative_path = os.path.relpath(filepath, self.output_dir)
+        size = os.path.getsize(filepath)
+        line = json.dumps({"key": key, "path": relative_path, "size": size})
+
+        with self._lock:
+            self._entries[key] = (relative_path, size)
+            try:
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning(f"KikoSaveImage: could not update dedup index: {e}")
+
+
+def link_duplicate(existing_path: str, new_path: str) -> bool:
+    """
+    Hardlink a new filename to an existing file
+
+    Args:
+        existing_path: File already on disk
+        new_path: Filename to create
+
+    Returns:
+        True on success, False if the filesystem does not support it
+    """
+    try:
+        os.link(existing_path, new_path)
+        return True
+    except OSError as e:
+        logger.info(f"KikoSaveImage: hardlink failed ({e}), referencing instead")
+        return False
+
+
+_indexes: Dict[str, DedupIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_dedup_index(output_dir: str) -> DedupIndex:
+    """
+    Get the shared index for an output directory, loading it on first use
+
+    Args:
+        output_dir: Output directory root
+
+    Returns:
+        DedupIndex instance for the directory
+    """
+    key = os.path.abspath(output_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = DedupIndex(output_dir)
+        return _indexes[key]
@@ -0,0 +1,323 @@
+"""
+KikoSaveImage encoder registry
+Pluggable image encoders with optional backends detected at import time
+"""
+
+import os
+import struct
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+try:
+    import fpng_py
+except ImportError:
+    # Optional fast PNG backend (pip install fpng-py)
+    fpng_py = None  # type: ignore
+
+try:
+    import pillow_jxl  # noqa: F401 - registers the JXL plugin with Pillow
+except ImportError:
+    pass
+
+try:
+    import pillow_avif  # noqa: F401 - registers AVIF on Pillow < 11.2
+except ImportError:
+    pass
+
+
+class ImageEncoder(ABC):
+    """
+    Base class for KikoSaveImage encoders
+
+    Subclasses implement _save() and declare the output extension. encode()
+    wraps it with timing so every encoder reports the same statistics. A
+    subclass without _save() cannot be instantiated.
+    """
+
+    name = ""
+    extension = ""
+    description = ""
+
+    def is_available(self) -> bool:
+        """
+        Check whether the encoder can run in this environment
+
+        Returns:
+            True if the required Pillow plugin or backend is importable
+        """
+        return True
+
+    @abstractmethod
+    def _save(
+        self,
+        img: Image.Image,
+        filepath: str,
+        quality: int,
+        png_compress_level: int,
+        lossless: bool,
+        metadata: Optional[PngInfo],
+    ) -> Dict[str, Any]:
+        """
+        Write the image and return format-specific settings
+
+        Returns:
+            Dict with quality/compress_level/lossless entries (None if unused)
+        """
+
+    def encode(
+        self,
+        img: Image.Image,
+        filepath: str,
+        quality: int = 90,
+        png_compress_level: int = 4,
+        lossless: bool = False,
+        metadata: Optional[PngInfo] = None,
+    ) -> Dict[str, Any]:
+        """
+        Encode and write an image, measuring throughput
+
+        Args:
+            img: PIL Image to save
+            filepath: Full path to save file
+            quality: Lossy quality (1-100)
+            png_compress_level: PNG compression level (0-9)
+            lossless: Use lossless mode where the format supports it
+            metadata: PNG metadata to embed
+
+        Returns:
+            Dict with save settings, file size, encode time, bytes/sec
+            (uncompressed input bytes per second) and compression ratio
+        """
+        raw_bytes = img.width * img.height * len(img.getbands())
+
+        start = time.perf_counter()
+        settings = self._save(
+            img, filepath, quality, png_compress_level, lossless, metadata
+        )
+        encode_seconds = time.perf_counter() - start
+
+        file_size = os.path.getsize(filepath)
+
+        info = {
+            "filepath": filepath,
+            "format": self.name,
+            "file_size": file_size,
+            "encode_seconds": encode_seconds,
+            "bytes_per_second": raw_bytes / encode_seconds if encode_seconds else 0.0,
+            "compression_ratio": raw_bytes / file_size if file_size else 0.0,
+        }
+        info.update(settings)
+        return info
+
+
+class PngEncoder(ImageEncoder):
+    """Pillow PNG encoder with embedded workflow metadata"""
+
+    name = "PNG"
+    extension = ".png"
+    description = "Lossless PNG via Pillow/zlib"
+
+    def _save(self, img, filepath, quality, png_compress_level, lossless, metadata):
+        save_kwargs: Dict[str, Any] = {"compress_level": png_compress_level}
+        if metadata:
+            save_kwargs["pnginfo"] = metadata
+
+        img.save(filepath, "PNG", **save_kwargs)
+        return {"quality": None, "compress_level": png_compress_level, "lossless": None}
+
+
+def insert_png_chunks(png_bytes: bytes, metadata: Optional[PngInfo]) -> bytes:
+    """
+    Insert PngInfo text chunks into an encoded PNG right after IHDR
+
+    Args:
+        png_bytes: Complete PNG file contents
+        metadata: PngInfo whose pre-built chunks should be embedded
+
+    Returns:
+        PNG file contents including the metadata chunks
+    """
+    if not metadata or not metadata.chunks:
+        return png_bytes
+
+    # 8-byte signature + IHDR (4 length + 4 type + 13 data + 4 CRC)
+    ihdr_end = 8 + 25
+    encoded = []
+    for chunk in metadata.chunks:
+        cid, data = chunk[0], chunk[1]
+        crc = zlib.crc32(data, zlib.crc32(cid)) & 0xFFFFFFFF
+        encoded.append(
+            struct.pack(">I", len(data)) + cid + data + struct.pack(">I", crc)
+        )
+
+    return png_bytes[:ihdr_end] + b"".join(encoded) + png_bytes[ihdr_end:]
+
+
+class FastPngEncoder(ImageEncoder):
+    """
+    Fast lossless PNG for high-volume archival
+
+    Uses fpng when importable (8-bit RGB/RGBA), otherwise zlib level 1 with
+    the run-length strategy, which is faster than the default filtered
+    strategy and usually no larger for rendered images.
+    """
+
+    name = "PNG_FAST"
+    extension = ".png"
+    description = "Lossless PNG tuned for encode speed (fpng or zlib level 1)"
+
+    def _save(self, img, filepath, quality, png_compress_level, lossless, metadata):
+        if fpng_py is not None and img.mode in ("RGB", "RGBA"):
+            png_bytes = fpng_py.fpng_encode_image_to_memory(
+                img.tobytes(), img.width, img.height, len(img.getbands())
+            )
+            with open(filepath, "wb") as f:
+                f.write(insert_png_chunks(png_bytes, metadata))
+            return {"quality": None, "compress_level": None, "lossless": True}
+
+        save_kwargs: Dict[str, Any] = {"compress_level": 1, "compress_type": zlib.Z_RLE}
+        if metadata:
+            save_kwargs["pnginfo"] = metadata
+
+        img.save(filepath, "PNG", **save_kwargs)
+        return {"quality": None, "compress_level": 1, "lossless": True}
+
+
+class JpegEncoder(ImageEncoder):
+    """Pillow JPEG encoder, flattening transparency onto white"""
+
+    name = "JPEG"
+    extension = ".jpg"
+    description = "Lossy JPEG via Pillow/libjpeg"
+
+    def _save(self, img, filepath, quality, png_compress_level, lossless, metadata):
+        # Convert RGBA to RGB for JPEG (no transparency support)
+        if img.mode == "RGBA":
+            # Create white background
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        img.save(filepath, "JPEG", quality=quality, optimize=True)
+        return {"quality": quality, "compress_level": None, "lossless": None}
+
+
+class WebpEncoder(ImageEncoder):
+    """Pillow WebP encoder (lossy or lossless)"""
+
+    name = "WEBP"
+    extension = ".webp"
+    description = "WebP via Pillow/libwebp"
+
+    def _save(self, img, filepath, quality, png_compress_level, lossless, metadata):
+        img.save(
+            filepath,
+            "WEBP",
+            quality=quality if not lossless else 100,
+            lossless=lossless,
+        )
+        return {"quality": quality, "compress_level": None, "lossless": lossless}
+
+
+class JxlEncoder(ImageEncoder):
+    """JPEG XL encoder, available when the pillow-jxl-plugin is installed"""
+
+    name = "JXL"
+    extension = ".jxl"
+    description = "JPEG XL via pillow-jxl-plugin (lossless or lossy)"
+
+    def is_available(self) -> bool:
+        Image.init()
+        return "JXL" in Image.SAVE
+
+    def _save(self, img, filepath, quality, png_compress_level, lossless, metadata):
+        img.save(filepath, "JXL", quality=quality, lossless=lossless)
+        return {"quality": quality, "compress_level": None, "lossless": lossless}
+
+
+class AvifEncoder(ImageEncoder):
+    """
+    AVIF encoder, available with Pillow >= 11.2 or pillow-avif-plugin
+
+    AVIF has no true lossless mode through Pillow; lossless requests are
+    encoded at quality 100 with 4:4:4 chroma, which is still lossy, and are
+    reported as such.
+    """
+
+    name = "AVIF"
+    extension = ".avif"
+    description = "AVIF via Pillow/libavif"
+
+    def is_available(self) -> bool:
+        Image.init()
+        return "AVIF" in Image.SAVE
+
+    def _save(self, img, filepath, quality, png_compress_level, lossless, metadata):
+        if lossless:
+            quality = 100
+            img.save(filepath, "AVIF", quality=quality, subsampling="4:4:4")
+        else:
+            img.save(filepath, "AVIF", quality=quality)
+        return {"quality": quality, "compress_level": None, "lossless": False}
+
+
+_ENCODERS: Dict[str, ImageEncoder] = {}
+
+
+def register_encoder(encoder: ImageEncoder) -> None:
+    """
+    Register an encoder, replacing any existing encoder with the same name
+
+    Args:
+        encoder: Encoder instance to register
+    """
+    _ENCODERS[encoder.name] = encoder
+
+
+def get_encoder(name: str) -> ImageEncoder:
+    """
+    Look up an available encoder by format name
+
+    Args:
+        name: Format name (e.g. "PNG", "JXL")
+
+    Returns:
+        Registered encoder
+
+    Raises:
+        ValueError: If the format is unknown or its backend is not installed
+    """
+    encoder = _ENCODERS.get(name)
+    if encoder is None or not encoder.is_available():
+        raise ValueError(
+            f"Unsupported format: {name}. Supported: {get_available_formats()}"
+        )
+    return encoder
+
+
+def get_available_formats() -> List[str]:
+    """
+    Get names of encoders usable in this environment, in registration order
+
+    Returns:
+        List of format names
+    """
+    return [name for name, encoder in _ENCODERS.items() if encoder.is_available()]
+
+
+for _encoder in (
+    PngEncoder(),
+    JpegEncoder(),
+    WebpEncoder(),
+    FastPngEncoder(),
+    JxlEncoder(),
+    AvifEncoder(),
+):
+    register_encoder(_encoder)
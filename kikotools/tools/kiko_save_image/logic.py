@@ -4,12 +4,27 @@ Enhanced image saving functionality with multiple format support
 """
 
 import os
+import re
 import json
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 import numpy as np
 from PIL import Image
 from PIL.PngImagePlugin import PngInfo
 import torch
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from .dedup import (
+    get_dedup_index,
+    hash_pixels,
+    link_duplicate,
+    make_dedup_key,
+)
+from .encoders import get_available_formats, get_encoder
+from .writer import WriteBatch, get_writer_pool
 
 try:
     import folder_paths
@@ -21,48 +36,211 @@ except ImportError:
             return "./output"
 
 
-def get_next_counter(output_dir: str, prefix: str) -> int:
+try:
+    import fcntl
+except ImportError:
+    # Windows: fall back to O_EXCL lock files
+    fcntl = None  # type: ignore
+
+
+# Formats whose quality setting applies, and which also offer a lossless mode
+LOSSY_FORMATS = ["JPEG", "WEBP", "JXL", "AVIF"]
+LOSSLESS_CAPABLE_FORMATS = ["WEBP", "JXL"]
+
+# Formats without a lossless mode that encode lossless requests at quality 100
+MAX_QUALITY_FORMATS = ["AVIF"]
+
+# Animation output modes: name -> (Pillow format, extension)
+ANIMATION_FORMATS = {
+    "WEBP": ("WEBP", ".webp"),
+    "APNG": ("PNG", ".png"),
+    "GIF": ("GIF", ".gif"),
+}
+
+# Frames quantized and held on host at once when streaming a batch
+DEFAULT_CHUNK_FRAMES = 16
+
+_counter_cache: Dict[str, int] = {}
+_counter_cache_lock = threading.Lock()
+
+# How long to wait for another process holding the counter lock
+COUNTER_LOCK_TIMEOUT = 10.0
+
+
+def sanitize_filename_prefix(prefix_name: str) -> str:
     """
-    Get next available counter value from persistent counter file
+    Sanitize the filename part of a prefix the same way saved files are named
 
-    This prevents file overwrites when the node is called multiple times
-    within the same second by maintaining a persistent counter.
+    Args:
+        prefix_name: Filename prefix without directory components
+
+    Returns:
+        Prefix containing only alphanumerics, dot, dash and underscore
+    """
+    safe_prefix = prefix_name.replace(":", "_")
+    return "".join(c for c in safe_prefix if c.isalnum() or c in "._-")
+
+
+def scan_highest_counter(output_dir: str, prefix: str) -> int:
+    """
+    Find the highest counter already used by files saved with a prefix
+
+    Used to repair the counter when its file is missing or corrupt, so a
+    lost counter file can never cause existing images to be overwritten.
+
+    Args:
+        output_dir: Output directory root
+        prefix: Filename prefix, optionally containing directory components
+
+    Returns:
+        Highest counter found, or 0 if no matching files exist
+    """
+    prefix_dir = os.path.join(output_dir, os.path.dirname(prefix))
+    name = sanitize_filename_prefix(os.path.basename(prefix))
+    pattern = re.compile(rf"^{re.escape(name)}_(\d+)\.[A-Za-z0-9]+$")
+
+    highest = 0
+    try:
+        with os.scandir(prefix_dir) as entries:
+            for entry in entries:
+                match = pattern.match(entry.name)
+                if match:
+                    highest = max(highest, int(match.group(1)))
+    except OSError:
+        pass
+    return highest
+
+
+def _acquire_lock_file(lock_file: str) -> int:
+    """
+    Create a lock file with O_EXCL, waiting while another holder has it
+
+    Args:
+        lock_file: Path of the lock file
+
+    Returns:
+        File descriptor of the created lock file
+    """
+    deadline = time.monotonic() + COUNTER_LOCK_TIMEOUT
+    while True:
+        try:
+            return os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                # Holder most likely crashed; break the stale lock
+                try:
+                    os.remove(lock_file)
+                except OSError:
+                    pass
+                deadline = time.monotonic() + COUNTER_LOCK_TIMEOUT
+            time.sleep(0.01)
+
+
+@contextmanager
+def _exclusive_counter_file(counter_file: str) -> Iterator[int]:
+    """
+    Open the counter file with an exclusive cross-process lock
+
+    Uses fcntl.flock where available. Elsewhere (Windows) a sibling
+    ".lock" file created with O_EXCL acts as the mutex.
+
+    Args:
+        counter_file: Path of the counter file
+
+    Yields:
+        File descriptor of the locked counter file
+    """
+    fd = os.open(counter_file, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield fd
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            return
+
+        lock_file = counter_file + ".lock"
+        lock_fd = _acquire_lock_file(lock_file)
+        try:
+            yield fd
+        finally:
+            os.close(lock_fd)
+            try:
+                os.remove(lock_file)
+            except OSError:
+                pass
+    finally:
+        os.close(fd)
+
+
+def reserve_counter_range(output_dir: str, prefix: str, count: int = 1) -> int:
+    """
+    Reserve a contiguous range of counter values in one locked operation
+
+    The counter file is read and rewritten once per batch under an exclusive
+    lock, so concurrent nodes or ComfyUI workers sharing an output directory
+    never receive overlapping counters. The high-water mark is also cached in
+    memory, and a missing or corrupt counter file is repaired by scanning the
+    filenames already on disk.
 
     Args:
         output_dir: Directory to store counter file
         prefix: Filename prefix to create unique counter per prefix
+        count: Number of counter values to reserve
 
     Returns:
-        Next available counter value
+        First counter value of the reserved range
     """
     # Create a safe counter filename
     safe_prefix = "".join(c for c in prefix if c.isalnum() or c in "._-")
     counter_file = os.path.join(output_dir, f".{safe_prefix}_counter.txt")
+    cache_key = os.path.abspath(counter_file)
 
-    # Read current counter
-    counter = 0
-    if os.path.exists(counter_file):
+    with _counter_cache_lock:
+        cached = _counter_cache.get(cache_key, 0)
         try:
-            with open(counter_file, "r") as f:
-                content = f.read().strip()
-                counter = int(content) if content else 0
-        except (ValueError, IOError):
-            # If file is corrupted or unreadable, start from 0
-            counter = 0
+            os.makedirs(output_dir, exist_ok=True)
+            with _exclusive_counter_file(counter_file) as fd:
+                content = os.read(fd, 64).decode("ascii", "ignore").strip()
+                try:
+                    current = int(content)
+                except ValueError:
+                    # Missing, empty or corrupt: rebuild from existing files
+                    current = scan_highest_counter(output_dir, prefix)
 
-    # Increment counter
-    counter += 1
+                current = max(current, cached)
+                last = current + count
 
-    # Save updated counter
-    try:
-        with open(counter_file, "w") as f:
-            f.write(str(counter))
-    except IOError:
-        # If we can't write the counter file, continue anyway
-        # Better to risk overwrites than to fail completely
-        pass
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, str(last).encode("ascii"))
+        except OSError:
+            # If we can't use the counter file, continue from memory
+            # Better to risk overwrites than to fail completely
+            current = cached
+            last = current + count
+
+        _counter_cache[cache_key] = last
+
+    return current + 1
+
+
+def get_next_counter(output_dir: str, prefix: str) -> int:
+    """
+    Get next available counter value from persistent counter file
+
+    This prevents file overwrites when the node is called multiple times
+    within the same second by maintaining a persistent counter.
+
+    Args:
+        output_dir: Directory to store counter file
+        prefix: Filename prefix to create unique counter per prefix
 
-    return counter
+    Returns:
+        Next available counter value
+    """
+    return reserve_counter_range(output_dir, prefix, 1)
 
 
 def get_save_image_path(
@@ -91,10 +269,7 @@ def get_save_image_path(
     prefix_name = os.path.basename(filename_prefix)
 
     # Sanitize only the filename part (not the directory path)
-    safe_prefix = prefix_name.replace(
-        ":", "_"
-    )  # Only sanitize problematic chars for filenames
-    safe_prefix = "".join(c for c in safe_prefix if c.isalnum() or c in "._-")
+    safe_prefix = sanitize_filename_prefix(prefix_name)
 
     # Create unique filename with counter to avoid conflicts
     # Using counter instead of timestamp+batch_number prevents overwrites
@@ -140,6 +315,85 @@ def get_save_image_path(
     return full_path, preview_filename, relative_subfolder
 
 
+def quantize_batch_to_uint8(images: torch.Tensor) -> np.ndarray:
+    """
+    Quantize a batch of 0-1 float images to uint8 in one pass
+
+    The multiply/round/clamp runs on the tensor's own device in its own dtype
+    (no float64 temporaries), and CUDA batches are transferred to host with a
+    single copy into a pinned buffer.
+
+    Args:
+        images: Tensor in format [batch, height, width, channels] with values 0-1
+
+    Returns:
+        uint8 numpy array [batch, height, width, channels] sharing memory with
+        the host buffer
+    """
+    images = images.detach()
+    if not images.is_floating_point():
+        images = images.float()
+
+    quantized = images.mul(255.0).round_().clamp_(0, 255).to(torch.uint8)
+
+    if quantized.device.type == "cpu":
+        host = quantized
+    else:
+        host = torch.empty(
+            quantized.shape,
+            dtype=torch.uint8,
+            pin_memory=torch.cuda.is_available(),
+        )
+        host.copy_(quantized)
+
+    return host.contiguous().numpy()
+
+
+def iter_uint8_frames(
+    images: torch.Tensor, chunk_frames: int = DEFAULT_CHUNK_FRAMES
+) -> Iterator[np.ndarray]:
+    """
+    Stream a batch as uint8 frames, quantizing a fixed-size slice at a time
+
+    Only one chunk of quantized frames (plus its float temporary on the
+    source device) exists at once, so host memory stays bounded regardless
+    of batch size. Each chunk is released once its frames are consumed.
+
+    Args:
+        images: Tensor in format [batch, height, width, channels] with values 0-1
+        chunk_frames: Frames moved to host per chunk (0 = whole batch at once)
+
+    Yields:
+        uint8 numpy arrays in format [height, width, channels]
+    """
+    total = images.shape[0]
+    step = chunk_frames if chunk_frames > 0 else max(total, 1)
+
+    for start in range(0, total, step):
+        chunk = quantize_batch_to_uint8(images[start : start + step])
+        for frame in chunk:
+            yield frame
+        del chunk
+
+
+def uint8_to_pil(image_array: np.ndarray) -> Image.Image:
+    """
+    Wrap a single uint8 [height, width, channels] frame as a PIL Image
+
+    Pillow references the array buffer directly for modes it stores natively
+    (L, RGBA); RGB is repacked once into Pillow's internal layout.
+
+    Args:
+        image_array: uint8 array in format [height, width, channels]
+
+    Returns:
+        PIL Image in L/RGB/RGBA format
+    """
+    if image_array.ndim == 3 and image_array.shape[2] == 1:
+        image_array = image_array[:, :, 0]
+    return Image.fromarray(image_array)
+
+
 def convert_tensor_to_pil(image_tensor: torch.Tensor) -> Image.Image:
     """
     Convert ComfyUI image tensor to PIL Image
@@ -150,18 +404,26 @@ def convert_tensor_to_pil(image_tensor: torch.Tensor) -> Image.Image:
     Returns:
         PIL Image in RGB/RGBA format
     """
-    # Convert tensor (0-1 float) to 0-255 numpy array
-    i = 255.0 * image_tensor.cpu().numpy()
-    img_array = np.clip(i, 0, 255).astype(np.uint8)
+    return uint8_to_pil(quantize_batch_to_uint8(image_tensor.unsqueeze(0))[0])
+
 
-    # Create PIL image from numpy array
-    img = Image.fromarray(img_array)
+# PNG metadata handling modes
+# full: tEXt chunks (read by ComfyUI drag-and-drop)
+# compressed: zTXt/iTXt chunks (smaller, not read by every tool)
+# sidecar: workflow written once to a JSON file referenced by hash
+PNG_METADATA_MODES = ["full", "compressed", "sidecar", "none"]
 
-    return img
+# Number of executions whose serialized metadata is kept
+METADATA_CACHE_SIZE = 4
+
+_metadata_cache: List[Tuple[Any, Any, str, Any]] = []
+_metadata_cache_lock = threading.Lock()
 
 
 def create_png_metadata(
-    prompt: Optional[Dict] = None, extra_pnginfo: Optional[Dict] = None
+    prompt: Optional[Dict] = None,
+    extra_pnginfo: Optional[Dict] = None,
+    compress: bool = False,
 ) -> Optional[PngInfo]:
     """
     Create PNG metadata with workflow information
@@ -169,6 +431,7 @@ def create_png_metadata(
     Args:
         prompt: ComfyUI prompt data
         extra_pnginfo: Additional PNG metadata
+        compress: Store chunks as zlib-compressed zTXt/iTXt instead of tEXt
 
     Returns:
         PngInfo object or None if no metadata
@@ -179,15 +442,144 @@ def create_png_metadata(
     metadata = PngInfo()
 
     if prompt is not None:
-        metadata.add_text("prompt", json.dumps(prompt))
+        metadata.add_text("prompt", json.dumps(prompt), zip=compress)
 
     if extra_pnginfo is not None:
         for key, value in extra_pnginfo.items():
-            metadata.add_text(key, json.dumps(value))
+            metadata.add_text(key, json.dumps(value), zip=compress)
 
     return metadata
 
 
+def get_sidecar_filename(digest: str) -> str:
+    """
+    Get the sidecar metadata filename for a content digest
+
+    Args:
+        digest: SHA-256 hex digest of the sidecar content
+
+    Returns:
+        Sidecar filename (placed next to the images it describes)
+    """
+    return f"kiko_metadata_{digest[:16]}.json"
+
+
+def _build_png_metadata(
+    prompt: Optional[Dict], extra_pnginfo: Optional[Dict], mode: str
+) -> Tuple[Optional[PngInfo], Optional[bytes]]:
+    """Serialize metadata for one execution (see get_png_metadata)"""
+    if mode == "none" or (prompt is None and extra_pnginfo is None):
+        return None, None
+
+    if mode != "sidecar":
+        return create_png_metadata(prompt, extra_pnginfo, mode == "compressed"), None
+
+    sidecar = {}
+    if prompt is not None:
+        sidecar["prompt"] = prompt
+    if extra_pnginfo is not None:
+        sidecar.update(extra_pnginfo)
+
+    sidecar_bytes = json.dumps(sidecar).encode("utf-8")
+    digest = hashlib.sha256(sidecar_bytes).hexdigest()
+
+    metadata = PngInfo()
+    metadata.add_text(
+        "kiko_metadata",
+        json.dumps({"sidecar": get_sidecar_filename(digest), "sha256": digest}),
+    )
+    return metadata, sidecar_bytes
+
+
+def get_png_metadata(
+    prompt: Optional[Dict] = None,
+    extra_pnginfo: Optional[Dict] = None,
+    mode: str = "full",
+) -> Tuple[Optional[PngInfo], Optional[bytes]]:
+    """
+    Get PNG metadata for a batch, serializing it at most once per execution
+
+    ComfyUI passes the same prompt/extra_pnginfo objects to every node in an
+    execution, so they identify the execution. The cache holds references to
+    them, which keeps their ids from being reused while an entry is alive.
+    The returned PngInfo carries pre-built chunk bytes that are written
+    unchanged into every PNG of the batch.
+
+    Args:
+        prompt: ComfyUI prompt data
+        extra_pnginfo: Additional PNG metadata
+        mode: One of PNG_METADATA_MODES
+
+    Returns:
+        Tuple of (PngInfo or None, sidecar JSON bytes or None)
+    """
+    if mode not in PNG_METADATA_MODES:
+        raise ValueError(
+            f"png_metadata must be one of {PNG_METADATA_MODES}, got {mode}"
+        )
+
+    with _metadata_cache_lock:
+        for cached_prompt, cached_extra, cached_mode, value in _metadata_cache:
+            if (
+                cached_prompt is prompt
+                and cached_extra is extra_pnginfo
+                and cached_mode == mode
+            ):
+                return value
+
+    value = _build_png_metadata(prompt, extra_pnginfo, mode)
+
+    with _metadata_cache_lock:
+        _metadata_cache.insert(0, (prompt, extra_pnginfo, mode, value))
+        del _metadata_cache[METADATA_CACHE_SIZE:]
+
+    return value
+
+
+def get_metadata_digest(metadata: Optional[PngInfo]) -> str:
+    """
+    Digest of the metadata chunks embedded in a file
+
+    Args:
+        metadata: PNG metadata to embed, or None
+
+    Returns:
+        SHA-256 hex digest of the chunks, or "none" without metadata
+    """
+    if metadata is None:
+        return "none"
+    digest = hashlib.sha256()
+    for chunk in metadata.chunks:
+        chunk_type, data = chunk[0], chunk[1]
+        digest.update(chunk_type)
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def write_sidecar_metadata(folder: str, sidecar_bytes: bytes) -> str:
+    """
+    Write sidecar metadata into a folder unless it already exists
+
+    Args:
+        folder: Folder containing the images that reference the sidecar
+        sidecar_bytes: Serialized sidecar JSON
+
+    Returns:
+        Full path of the sidecar file
+    """
+    digest = hashlib.sha256(sidecar_bytes).hexdigest()
+    sidecar_path = os.path.join(folder, get_sidecar_filename(digest))
+
+    if not os.path.exists(sidecar_path):
+        temp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(sidecar_bytes)
+        os.replace(temp_path, sidecar_path)
+
+    return sidecar_path
+
+
 def save_image_with_format(
     img: Image.Image,
     filepath: str,
@@ -203,57 +595,102 @@ def save_image_with_format(
     Args:
         img: PIL Image to save
         filepath: Full path to save file
-        format_type: Image format (PNG, JPEG, WEBP)
-        quality: JPEG/WebP quality (1-100)
+        format_type: Registered encoder name (PNG, JPEG, WEBP, PNG_FAST, ...)
+        quality: JPEG/WebP/JXL/AVIF quality (1-100)
         png_compress_level: PNG compression level (0-9)
-        webp_lossless: Use lossless WebP compression
+        webp_lossless: Use lossless compression (WebP, JPEG XL; AVIF quality 100)
         metadata: PNG metadata to embed
 
     Returns:
-        Dict with save information
+        Dict with save information, encode time, bytes/sec and compression ratio
     """
-    save_kwargs = {}
+    encoder = get_encoder(format_type)
+    return encoder.encode(
+        img, filepath, quality, png_compress_level, webp_lossless, metadata
+    )
 
-    if format_type == "PNG":
-        if metadata:
-            save_kwargs["pnginfo"] = metadata
-        save_kwargs["compress_level"] = png_compress_level
 
-    elif format_type == "JPEG":
-        # Convert RGBA to RGB for JPEG (no transparency support)
-        if img.mode == "RGBA":
-            # Create white background
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
-            img = background
-        elif img.mode != "RGB":
-            img = img.convert("RGB")
+def _save_and_index(save_args: Tuple, dedup_index: Any, dedup_key: Optional[str]):
+    """Save an image and record it in the dedup index once it exists"""
+    save_info = save_image_with_format(*save_args)
+    if dedup_key is not None:
+        dedup_index.add(dedup_key, save_info["filepath"])
+    return save_info
 
-        save_kwargs["quality"] = quality
-        save_kwargs["optimize"] = True
 
-    elif format_type == "WEBP":
-        save_kwargs["quality"] = quality if not webp_lossless else 100
-        save_kwargs["lossless"] = webp_lossless
+def _reuse_duplicate(
+    existing_path: str, filepath: str, output_dir: str, dedup: str
+) -> Tuple[str, str, int]:
+    """
+    Reuse an already-saved identical image instead of encoding again
+
+    Args:
+        existing_path: Full path of the indexed duplicate
+        filepath: Full path reserved for this image
+        output_dir: Output directory root
+        dedup: Dedup mode ("hardlink" or "reference")
 
+    Returns:
+        Tuple of (preview filename, relative subfolder, file size) of the
+        file the preview should point at
+    """
+    if dedup == "hardlink" and link_duplicate(existing_path, filepath):
+        target = filepath
     else:
-        raise ValueError(f"Unsupported format: {format_type}")
+        target = existing_path
 
-    # Save the image
-    img.save(filepath, **save_kwargs)
+    relative_path = os.path.relpath(target, output_dir)
+    return (
+        os.path.basename(relative_path),
+        os.path.dirname(relative_path),
+        os.path.getsize(target),
+    )
 
-    # Get file size for info
-    file_size = os.path.getsize(filepath)
 
-    return {
-        "filepath": filepath,
+def _build_enhanced_info(
+    preview_filename: str,
+    relative_subfolder: str,
+    popup: bool,
+    format_type: str,
+    img: Image.Image,
+    file_size: Optional[int],
+    save_info: Optional[Dict[str, Any]],
+    deduplicated: bool,
+    quality: int,
+    png_compress_level: int,
+    webp_lossless: bool,
+) -> Dict[str, Any]:
+    """Build the kiko_enhanced entry shown by the popup viewer"""
+    enhanced_info = {
+        "filename": preview_filename,
+        "subfolder": relative_subfolder,
+        "popup": popup,
+        "type": "output",
         "format": format_type,
         "file_size": file_size,
-        "quality": quality if format_type != "PNG" else None,
-        "compress_level": png_compress_level if format_type == "PNG" else None,
-        "lossless": webp_lossless if format_type == "WEBP" else None,
+        "dimensions": f"{img.width}x{img.height}",
     }
 
+    if deduplicated:
+        enhanced_info["deduplicated"] = True
+    elif save_info:
+        enhanced_info["encode_seconds"] = round(save_info["encode_seconds"], 4)
+        enhanced_info["compression_ratio"] = round(save_info["compression_ratio"], 2)
+
+    # Add format-specific info to enhanced data
+    if format_type == "PNG":
+        enhanced_info["compress_level"] = png_compress_level
+    elif format_type in LOSSY_FORMATS:
+        enhanced_info["quality"] = quality
+        if format_type in LOSSLESS_CAPABLE_FORMATS:
+            enhanced_info["lossless"] = webp_lossless
+        elif format_type in MAX_QUALITY_FORMATS:
+            enhanced_info["lossless"] = False
+            if webp_lossless:
+                enhanced_info["quality"] = 100
+
+    return enhanced_info
+
 
 def process_image_batch(
     images: torch.Tensor,
@@ -265,6 +702,10 @@ def process_image_batch(
     popup: bool = True,
     prompt: Optional[Dict] = None,
     extra_pnginfo: Optional[Dict] = None,
+    async_save: bool = False,
+    png_metadata: str = "full",
+    chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+    dedup: str = "off",
 ) -> List[Dict[str, Any]]:
     """
     Process and save a batch of images with specified format settings
@@ -272,13 +713,20 @@ def process_image_batch(
     Args:
         images: Batch of image tensors [batch, height, width, channels]
         filename_prefix: Prefix for saved filenames
-        format_type: Image format (PNG, JPEG, WEBP)
-        quality: JPEG/WebP quality (1-100)
+        format_type: Registered encoder name (PNG, JPEG, WEBP, PNG_FAST, ...)
+        quality: JPEG/WebP/JXL/AVIF quality (1-100)
         png_compress_level: PNG compression level (0-9)
-        webp_lossless: Use lossless WebP compression
+        webp_lossless: Use lossless compression (WebP, JPEG XL; AVIF quality 100)
         popup: Enable popup windows in UI
         prompt: ComfyUI prompt data for metadata
         extra_pnginfo: Additional PNG metadata
+        async_save: Encode and write on the background writer pool while the
+            rest of the batch is converted; the writes are awaited before
+            returning, and failed ones come back as enhanced entries with an
+            "error" key and no preview result
+        png_metadata: Workflow metadata mode for PNG (see PNG_METADATA_MODES)
+        chunk_frames: Maximum frames held on host at once (0 = whole batch)
+        dedup: Reuse bit-identical earlier outputs (see DEDUP_MODES)
 
     Returns:
         List of saved image information dicts
@@ -286,49 +734,103 @@ def process_image_batch(
     # Get output directory
     output_dir = folder_paths.get_output_directory()
 
-    # Determine file extension
-    format_extensions = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
-
-    if format_type not in format_extensions:
-        raise ValueError(
-            f"Unsupported format: {format_type}. "
-            f"Supported: {list(format_extensions.keys())}"
-        )
-
-    format_ext = format_extensions[format_type]
+    # Determine file extension from the registered encoder
+    encoder = get_encoder(format_type)
+    format_ext = encoder.extension
 
-    # Create metadata for PNG
+    # Create metadata for PNG (serialized once per execution)
     metadata = None
-    if format_type == "PNG":
-        metadata = create_png_metadata(prompt, extra_pnginfo)
+    sidecar_bytes = None
+    sidecar_folders = set()
+    if format_ext == ".png":
+        metadata, sidecar_bytes = get_png_metadata(prompt, extra_pnginfo, png_metadata)
+
+    # Reserve counters for the whole batch in a single locked operation
+    # This counter persists across node calls, preventing overwrites
+    first_counter = reserve_counter_range(output_dir, filename_prefix, len(images))
+
+    # Quantize in chunks; frames are views into one host buffer per chunk
+    image_arrays = iter_uint8_frames(images, chunk_frames)
+
+    # Writes of this batch run in the background and are awaited below
+    write_batch = get_writer_pool().batch() if async_save else None
+    background_writes = []
+
+    dedup_index = None
+    metadata_digest = None
+    if dedup != "off":
+        dedup_index = get_dedup_index(output_dir)
+        # The embedded prompt/workflow is part of the file, so it is part
+        # of the key: same pixels under another prompt are a new file
+        metadata_digest = get_metadata_digest(metadata)
 
     # Process each image in the batch
     results = []
     enhanced_data = []
 
-    for image_tensor in images:
-        # Convert tensor to PIL Image
-        img = convert_tensor_to_pil(image_tensor)
+    for index, image_array in enumerate(image_arrays):
+        # Convert frame to PIL Image
+        img = uint8_to_pil(image_array)
 
-        # Get next counter value to ensure unique filenames
-        # This counter persists across node calls, preventing overwrites
-        counter = get_next_counter(output_dir, filename_prefix)
+        counter = first_counter + index
 
         # Generate save path with persistent counter
         filepath, preview_filename, relative_subfolder = get_save_image_path(
             filename_prefix, counter, format_ext, output_dir, ""
         )
 
-        # Save with format-specific settings
-        save_info = save_image_with_format(
-            img,
-            filepath,
-            format_type,
-            quality,
-            png_compress_level,
-            webp_lossless,
-            metadata,
-        )
+        # Look for a bit-identical image saved earlier with the same settings
+        dedup_key = None
+        duplicate_path = None
+        if dedup_index is not None:
+            dedup_key = make_dedup_key(
+                hash_pixels(image_array),
+                format_type,
+                quality,
+                png_compress_level,
+                webp_lossless,
+                png_metadata if format_ext == ".png" else "none",
+                metadata_digest,
+            )
+            duplicate_path = dedup_index.lookup(dedup_key)
+
+        save_info = None
+        if duplicate_path:
+            preview_filename, relative_subfolder, file_size = _reuse_duplicate(
+                duplicate_path, filepath, output_dir, dedup
+            )
+        else:
+            # Write the shared workflow sidecar once per destination folder
+            if sidecar_bytes is not None:
+                folder = os.path.dirname(filepath)
+                if folder not in sidecar_folders:
+                    write_sidecar_metadata(folder, sidecar_bytes)
+                    sidecar_folders.add(folder)
+
+            # Save with format-specific settings
+            save_args = (
+                img,
+                filepath,
+                format_type,
+                quality,
+                png_compress_level,
+                webp_lossless,
+                metadata,
+            )
+            if write_batch is not None:
+                # Filename is already reserved, so the next frame can start now
+                future = write_batch.submit(
+                    _save_and_index,
+                    save_args,
+                    dedup_index,
+                    dedup_key,
+                    label=preview_filename,
+                )
+                background_writes.append((index, future))
+                file_size = None
+            else:
+                save_info = _save_and_index(save_args, dedup_index, dedup_key)
+                file_size = save_info["file_size"]
 
         # Build result info for ComfyUI preview
         # ONLY the core fields that ComfyUI expects - no extra metadata
@@ -339,30 +841,201 @@ def process_image_batch(
         }
 
         # Store enhanced data separately
-        enhanced_info = {
-            "filename": preview_filename,
-            "subfolder": relative_subfolder,
-            "popup": popup,
-            "type": "output",
-            "format": format_type,
-            "file_size": save_info["file_size"],
-            "dimensions": f"{img.width}x{img.height}",
-        }
-
-        # Add format-specific info to enhanced data
-        if format_type == "PNG":
-            enhanced_info["compress_level"] = png_compress_level
-        elif format_type in ["JPEG", "WEBP"]:
-            enhanced_info["quality"] = quality
-            if format_type == "WEBP":
-                enhanced_info["lossless"] = webp_lossless
+        enhanced_info = _build_enhanced_info(
+            preview_filename,
+            relative_subfolder,
+            popup,
+            format_type,
+            img,
+            file_size,
+            save_info,
+            bool(duplicate_path),
+            quality,
+            png_compress_level,
+            webp_lossless,
+        )
 
         results.append(result)
         enhanced_data.append(enhanced_info)
 
+    if write_batch is not None:
+        results, enhanced_data = _finish_background_writes(
+            write_batch, background_writes, results, enhanced_data
+        )
+
     return results, enhanced_data
 
 
+def _finish_background_writes(
+    write_batch: WriteBatch,
+    background_writes: List[Tuple[int, Future]],
+    results: List[Dict[str, Any]],
+    enhanced_data: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Wait for a batch's background writes and record how each one ended
+
+    Args:
+        write_batch: Batch the writes were submitted to
+        background_writes: (frame index, future) of each submitted write
+        results: Preview results of the batch
+        enhanced_data: Enhanced entries of the batch, updated in place
+
+    Returns:
+        Tuple of (results, enhanced_data) with failed writes removed from
+        results and marked with an "error" key in enhanced_data
+    """
+    write_batch.wait()
+
+    failed = set()
+    for index, future in background_writes:
+        enhanced_info = enhanced_data[index]
+        error = future.exception()
+        if error is not None:
+            enhanced_info["error"] = str(error)
+            failed.add(index)
+            continue
+        save_info = future.result()
+        enhanced_info["file_size"] = save_info["file_size"]
+        enhanced_info["encode_seconds"] = round(save_info["encode_seconds"], 4)
+        enhanced_info["compression_ratio"] = round(save_info["compression_ratio"], 2)
+
+    results = [result for index, result in enumerate(results) if index not in failed]
+    return results, enhanced_data
+
+
+class _AnimationFrames:
+    """Frames of a batch as PIL images, converted anew on every iteration"""
+
+    def __init__(self, images: torch.Tensor, chunk_frames: int):
+        self.images = images
+        self.chunk_frames = chunk_frames
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def __iter__(self) -> Iterator[Image.Image]:
+        for frame in iter_uint8_frames(self.images, self.chunk_frames):
+            yield uint8_to_pil(frame)
+
+
+def save_animation(
+    images: torch.Tensor,
+    filename_prefix: str = "KikoSave",
+    animation: str = "WEBP",
+    frame_duration: int = 100,
+    loop_count: int = 0,
+    quality: int = 90,
+    png_compress_level: int = 4,
+    webp_lossless: bool = False,
+    popup: bool = True,
+    prompt: Optional[Dict] = None,
+    extra_pnginfo: Optional[Dict] = None,
+    png_metadata: str = "full",
+    chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Encode a whole batch into a single animated WebP, APNG or GIF file
+
+    Frames are quantized in chunks of chunk_frames and handed to the encoder
+    as they are consumed, so the float batch is never copied to host in
+    full. Pillow's animation writers may still keep their own copy of every
+    frame until the file is assembled.
+
+    Args:
+        images: Batch of image tensors [batch, height, width, channels]
+        filename_prefix: Prefix for saved filenames
+        animation: Animation format (see ANIMATION_FORMATS)
+        frame_duration: Display time per frame in milliseconds
+        loop_count: Number of loops (0 = loop forever)
+        quality: Animated WebP quality (1-100)
+        png_compress_level: APNG compression level (0-9)
+        webp_lossless: Use lossless animated WebP
+        popup: Enable popup windows in UI
+        prompt: ComfyUI prompt data for APNG metadata
+        extra_pnginfo: Additional APNG metadata
+        png_metadata: Workflow metadata mode for APNG (see PNG_METADATA_MODES)
+        chunk_frames: Maximum frames quantized at once (0 = whole batch)
+
+    Returns:
+        Tuple of (preview results, enhanced data), one entry each
+
+    Raises:
+        ValueError: If animation is unknown or the batch is empty
+    """
+    if animation not in ANIMATION_FORMATS:
+        raise ValueError(
+            f"animation must be one of {list(ANIMATION_FORMATS)}, got {animation}"
+        )
+
+    if len(images) == 0:
+        raise ValueError("Animated output needs at least one frame, got none")
+
+    output_dir = folder_paths.get_output_directory()
+    pil_format, format_ext = ANIMATION_FORMATS[animation]
+
+    counter = reserve_counter_range(output_dir, filename_prefix, 1)
+    filepath, preview_filename, relative_subfolder = get_save_image_path(
+        filename_prefix, counter, format_ext, output_dir, ""
+    )
+
+    save_kwargs: Dict[str, Any] = {
+        "save_all": True,
+        "duration": frame_duration,
+        "loop": loop_count,
+    }
+    if animation == "WEBP":
+        save_kwargs["quality"] = quality if not webp_lossless else 100
+        save_kwargs["lossless"] = webp_lossless
+    elif animation == "APNG":
+        save_kwargs["compress_level"] = png_compress_level
+        metadata, sidecar_bytes = get_png_metadata(prompt, extra_pnginfo, png_metadata)
+        if metadata:
+            save_kwargs["pnginfo"] = metadata
+        if sidecar_bytes is not None:
+            write_sidecar_metadata(os.path.dirname(filepath), sidecar_bytes)
+
+    # Frames are converted as the muxer consumes them. Pillow's APNG writer
+    # walks append_images twice, so they are passed as a re-iterable stream.
+    first_frame = uint8_to_pil(next(iter_uint8_frames(images[:1], 1)))
+    save_kwargs["append_images"] = _AnimationFrames(images[1:], chunk_frames)
+
+    start = time.perf_counter()
+    first_frame.save(filepath, pil_format, **save_kwargs)
+    encode_seconds = time.perf_counter() - start
+
+    file_size = os.path.getsize(filepath)
+
+    results = [
+        {
+            "filename": preview_filename,
+            "subfolder": relative_subfolder,
+            "type": "output",
+        }
+    ]
+    enhanced_info = {
+        "filename": preview_filename,
+        "subfolder": relative_subfolder,
+        "popup": popup,
+        "type": "output",
+        "format": animation,
+        "file_size": file_size,
+        "dimensions": f"{first_frame.width}x{first_frame.height}",
+        "animated": True,
+        "frames": len(images),
+        "frame_duration": frame_duration,
+        "loop_count": loop_count,
+        "encode_seconds": round(encode_seconds, 4),
+    }
+    if animation == "WEBP":
+        enhanced_info["quality"] = quality
+        enhanced_info["lossless"] = webp_lossless
+    elif animation == "APNG":
+        enhanced_info["compress_level"] = png_compress_level
+
+    return results, [enhanced_info]
+
+
 def validate_save_inputs(
     images: torch.Tensor, format_type: str, quality: int, png_compress_level: int
 ) -> None:
@@ -389,14 +1062,14 @@ def validate_save_inputs(
         )
 
     # Validate format
-    supported_formats = ["PNG", "JPEG", "WEBP"]
+    supported_formats = get_available_formats()
     if format_type not in supported_formats:
         raise ValueError(
             f"format must be one of {supported_formats}, got {format_type}"
         )
 
-    # Validate quality (for JPEG/WebP)
-    if format_type in ["JPEG", "WEBP"]:
+    # Validate quality (for lossy-capable formats)
+    if format_type in LOSSY_FORMATS:
         if not isinstance(quality, int) or not (1 <= quality <= 100):
             raise ValueError(
                 f"quality must be an integer between 1 and 100, got {quality}"
@@ -7,7 +7,18 @@ import torch
 from typing import Dict, Any, Optional
 
 from ...base import ComfyAssetsBaseNode
-from .logic import process_image_batch, validate_save_inputs
+from .dedup import DEDUP_MODES
+from .encoders import get_available_formats
+from .logic import (
+    ANIMATION_FORMATS,
+    DEFAULT_CHUNK_FRAMES,
+    PNG_METADATA_MODES,
+    process_image_batch,
+    save_animation,
+    validate_save_inputs,
+)
+
+ANIMATION_MODES = ["off"] + list(ANIMATION_FORMATS)
 
 
 class KikoSaveImageNode(ComfyAssetsBaseNode):
@@ -15,20 +26,30 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
     Enhanced ComfyUI image saving node with multiple format support
 
     Features:
-    - Multiple format support (PNG, JPEG, WebP)
+    - Multiple format support (PNG, JPEG, WebP, fast PNG, and JPEG XL/AVIF
+      when the Pillow plugins are installed)
     - Quality/compression controls
     - Clickable image previews
     - Metadata preservation
     - Batch processing
+    - Optional background writing off the executor thread
+    - Animated WebP/APNG/GIF output for batches
 
     Inputs:
         - images (IMAGE): Images to save
         - filename_prefix (STRING): Prefix for saved filenames
-        - format (COMBO): Output format (PNG, JPEG, WebP)
-        - quality (INT): JPEG/WebP quality (1-100)
+        - format (COMBO): Output format (from the encoder registry)
+        - quality (INT): JPEG/WebP/JXL/AVIF quality (1-100)
         - png_compress_level (INT): PNG compression level (0-9)
-        - webp_lossless (BOOLEAN): Use lossless WebP compression
+        - webp_lossless (BOOLEAN): Use lossless WebP/JXL compression (AVIF: quality 100)
         - subfolder (STRING): Optional subfolder for organization
+        - async_save (BOOLEAN): Encode and write in a background pool
+        - png_metadata (COMBO): How workflow metadata is stored in PNGs
+        - chunk_frames (INT): Frames moved to host and encoded at a time
+        - dedup (COMBO): Reuse bit-identical earlier outputs
+        - animation (COMBO): Save the batch as one animated file
+        - frame_duration (INT): Animation frame duration in milliseconds
+        - loop_count (INT): Animation loops (0 = forever)
 
     Outputs:
         - UI: Image preview data for ComfyUI interface
@@ -50,8 +71,12 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
                     {"default": "KikoSave", "tooltip": "Prefix for saved filenames"},
                 ),
                 "format": (
-                    ["PNG", "JPEG", "WEBP"],
-                    {"default": "PNG", "tooltip": "Output image format"},
+                    get_available_formats(),
+                    {
+                        "default": "PNG",
+                        "tooltip": "Output image format (PNG_FAST trades file "
+                        "size for encode speed; JXL/AVIF need Pillow plugins)",
+                    },
                 ),
             },
             "optional": {
@@ -62,7 +87,8 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
                         "min": 1,
                         "max": 100,
                         "step": 1,
-                        "tooltip": "JPEG/WebP quality (1-100, higher = better quality)",
+                        "tooltip": "JPEG/WebP/JXL/AVIF quality "
+                        "(1-100, higher = better quality)",
                     },
                 ),
                 "png_compress_level": (
@@ -79,8 +105,9 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
                     "BOOLEAN",
                     {
                         "default": False,
-                        "tooltip": "Use lossless WebP compression "
-                        "(ignores quality setting)",
+                        "tooltip": "Use lossless WebP/JXL compression "
+                        "(ignores quality setting; AVIF has no lossless mode "
+                        "and saves at quality 100 instead)",
                     },
                 ),
                 "popup": (
@@ -90,6 +117,74 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
                         "tooltip": "Enable popup windows when clicking on images in the viewer",
                     },
                 ),
+                "async_save": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Encode and write images in parallel on a "
+                        "background pool; the node waits for the writes and "
+                        "reports failures in the same run (animated output is "
+                        "always written synchronously)",
+                    },
+                ),
+                "png_metadata": (
+                    PNG_METADATA_MODES,
+                    {
+                        "default": "full",
+                        "tooltip": "PNG workflow metadata: full (tEXt, loadable in "
+                        "ComfyUI), compressed (zTXt), sidecar (one JSON file per "
+                        "folder referenced by hash) or none",
+                    },
+                ),
+                "chunk_frames": (
+                    "INT",
+                    {
+                        "default": DEFAULT_CHUNK_FRAMES,
+                        "min": 0,
+                        "max": 4096,
+                        "step": 1,
+                        "tooltip": "Frames converted and held in memory at once; "
+                        "caps RAM for large video batches (0 = whole batch)",
+                    },
+                ),
+                "dedup": (
+                    DEDUP_MODES,
+                    {
+                        "default": "off",
+                        "tooltip": "Skip re-encoding bit-identical images already "
+                        "saved with the same settings: hardlink (new filename, "
+                        "shared data) or reference (preview the existing file); "
+                        "not applied to animated output",
+                    },
+                ),
+                "animation": (
+                    ANIMATION_MODES,
+                    {
+                        "default": "off",
+                        "tooltip": "Save the whole batch as a single animated "
+                        "WebP, APNG or GIF instead of one file per image",
+                    },
+                ),
+                "frame_duration": (
+                    "INT",
+                    {
+                        "default": 100,
+                        "min": 1,
+                        "max": 60000,
+                        "step": 1,
+                        "tooltip": "Animation frame duration in milliseconds",
+                    },
+                ),
+                "loop_count": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 65535,
+                        "step": 1,
+                        "tooltip": "Number of animation loops (0 = loop forever)",
+                    },
+                ),
             },
             "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
         }
@@ -110,6 +205,13 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
         popup: bool = True,
         prompt: Optional[Dict] = None,
         extra_pnginfo: Optional[Dict] = None,
+        async_save: bool = False,
+        png_metadata: str = "full",
+        chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+        dedup: str = "off",
+        animation: str = "off",
+        frame_duration: int = 100,
+        loop_count: int = 0,
     ) -> Dict[str, Any]:
         """
         Save images with enhanced format and quality options
@@ -124,6 +226,13 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
             popup: Enable popup windows when clicking on images
             prompt: ComfyUI prompt data for metadata
             extra_pnginfo: Additional PNG metadata
+            async_save: Write images on the background writer pool
+            png_metadata: PNG workflow metadata mode
+            chunk_frames: Frames held on host at once (0 = whole batch)
+            dedup: Deduplication mode
+            animation: Animation format, or "off" for one file per image
+            frame_duration: Animation frame duration in milliseconds
+            loop_count: Animation loops (0 = forever)
 
         Returns:
             Dict with UI data for image previews
@@ -140,8 +249,37 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
                 png_compress_level=png_compress_level,
                 webp_lossless=webp_lossless,
                 popup=popup,
+                async_save=async_save,
+                png_metadata=png_metadata,
+                chunk_frames=chunk_frames,
+                dedup=dedup,
+                animation=animation,
+                frame_duration=frame_duration,
+                loop_count=loop_count,
             )
 
+            if animation != "off":
+                if async_save or dedup != "off":
+                    self.log_info(
+                        "async_save and dedup do not apply to animated output; "
+                        "saving the animation synchronously without dedup"
+                    )
+                return self._save_animation(
+                    images,
+                    filename_prefix,
+                    animation,
+                    frame_duration,
+                    loop_count,
+                    quality,
+                    png_compress_level,
+                    webp_lossless,
+                    popup,
+                    prompt,
+                    extra_pnginfo,
+                    png_metadata,
+                    chunk_frames,
+                )
+
             # Log the save operation
             self.log_info(
                 f"Saving {len(images)} images as {format} "
@@ -160,8 +298,20 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
                 popup=popup,
                 prompt=prompt,
                 extra_pnginfo=extra_pnginfo,
+                async_save=async_save,
+                png_metadata=png_metadata,
+                chunk_frames=chunk_frames,
+                dedup=dedup,
             )
 
+            # Background writes that failed have no file to preview
+            write_errors = [
+                {"filename": data["filename"], "error": data["error"]}
+                for data in enhanced_data
+                if "error" in data
+            ]
+            enhanced_data = [data for data in enhanced_data if "error" not in data]
+
             # Log results
             total_size = sum(data["file_size"] for data in enhanced_data)
             self.log_info(
@@ -170,17 +320,72 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
             )
 
             # Return UI data for ComfyUI preview (clean) + enhanced data for our JS
-            return {
-                "ui": {
-                    "images": results,  # Clean data for ComfyUI
-                    "kiko_enhanced": enhanced_data,  # Enhanced data for our JavaScript
-                }
+            ui = {
+                "images": results,  # Clean data for ComfyUI
+                "kiko_enhanced": enhanced_data,  # Enhanced data for our JavaScript
             }
 
+            # Surface failures of this run's background writes
+            if write_errors:
+                ui["kiko_errors"] = write_errors
+
+            return {"ui": ui}
+
         except Exception as e:
             error_msg = f"Failed to save images: {str(e)}"
             self.handle_error(error_msg, e)
 
+    def _save_animation(
+        self,
+        images: torch.Tensor,
+        filename_prefix: str,
+        animation: str,
+        frame_duration: int,
+        loop_count: int,
+        quality: int,
+        png_compress_level: int,
+        webp_lossless: bool,
+        popup: bool,
+        prompt: Optional[Dict],
+        extra_pnginfo: Optional[Dict],
+        png_metadata: str,
+        chunk_frames: int,
+    ) -> Dict[str, Any]:
+        """
+        Save the batch as one animated file and build the UI payload
+
+        Returns:
+            Dict with UI data for the animation preview
+        """
+        self.log_info(
+            f"Saving {len(images)} frames as animated {animation} "
+            f"({frame_duration} ms/frame, loop={loop_count})"
+        )
+
+        results, enhanced_data = save_animation(
+            images=images,
+            filename_prefix=filename_prefix,
+            animation=animation,
+            frame_duration=frame_duration,
+            loop_count=loop_count,
+            quality=quality,
+            png_compress_level=png_compress_level,
+            webp_lossless=webp_lossless,
+            popup=popup,
+            prompt=prompt,
+            extra_pnginfo=extra_pnginfo,
+            png_metadata=png_metadata,
+            chunk_frames=chunk_frames,
+        )
+
+        info = enhanced_data[0]
+        self.log_info(
+            f"Saved animation {info['filename']} "
+            f"({info['file_size'] / 1024:.1f} KB in {info['encode_seconds']:.2f}s)"
+        )
+
+        return {"ui": {"images": results, "kiko_enhanced": enhanced_data}}
+
     def validate_inputs(
         self,
         images: torch.Tensor,
@@ -189,6 +394,13 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
         png_compress_level: int,
         webp_lossless: bool,
         popup: bool,
+        async_save: bool = False,
+        png_metadata: str = "full",
+        chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+        dedup: str = "off",
+        animation: str = "off",
+        frame_duration: int = 100,
+        loop_count: int = 0,
     ) -> None:
         """
         Validate inputs specific to KikoSaveImage
@@ -200,6 +412,13 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
             png_compress_level: PNG compression level
             webp_lossless: WebP lossless setting
             popup: Enable popup windows
+            async_save: Background write setting
+            png_metadata: PNG metadata mode
+            chunk_frames: Streaming chunk size
+            dedup: Deduplication mode
+            animation: Animation mode
+            frame_duration: Animation frame duration in milliseconds
+            loop_count: Animation loop count
 
         Raises:
             ValueError: If validation fails
@@ -216,6 +435,39 @@ class KikoSaveImageNode(ComfyAssetsBaseNode):
         if not isinstance(popup, bool):
             raise ValueError(f"popup must be a boolean, got {type(popup).__name__}")
 
+        if not isinstance(async_save, bool):
+            raise ValueError(
+                f"async_save must be a boolean, got {type(async_save).__name__}"
+            )
+
+        if png_metadata not in PNG_METADATA_MODES:
+            raise ValueError(
+                f"png_metadata must be one of {PNG_METADATA_MODES}, got {png_metadata}"
+            )
+
+        if not isinstance(chunk_frames, int) or chunk_frames < 0:
+            raise ValueError(
+                f"chunk_frames must be a non-negative integer, got {chunk_frames}"
+            )
+
+        if dedup not in DEDUP_MODES:
+            raise ValueError(f"dedup must be one of {DEDUP_MODES}, got {dedup}")
+
+        if animation not in ANIMATION_MODES:
+            raise ValueError(
+                f"animation must be one of {ANIMATION_MODES}, got {animation}"
+            )
+
+        if not isinstance(frame_duration, int) or frame_duration < 1:
+            raise ValueError(
+                f"frame_duration must be a positive integer, got {frame_duration}"
+            )
+
+        if not isinstance(loop_count, int) or loop_count < 0:
+            raise ValueError(
+                f"loop_count must be a non-negative integer, got {loop_count}"
+            )
+
 
 # Node class mappings for ComfyUI registration
 NODE_CLASS_MAPPINGS = {
@@ -0,0 +1,253 @@
+"""
+KikoSaveImage background writer
+Bounded thread pool that encodes and writes images off the prompt executor thread
+"""
+
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBatch:
+    """
+    Writes submitted together by one execution and awaited as a group
+
+    Failures of batch jobs are returned by wait() instead of being kept on
+    the pool, so they are reported by the run that queued them.
+    """
+
+    def __init__(self, pool: "BackgroundWriterPool"):
+        """
+        Initialize the batch
+
+        Args:
+            pool: Writer pool that runs the jobs
+        """
+        self._pool = pool
+        self._jobs: List[Tuple[Future, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def submit(
+        self, fn: Callable[..., Any], *args: Any, label: str = "", **kwargs: Any
+    ) -> Future:
+        """
+        Queue a write job as part of this batch
+
+        Args:
+            fn: Callable performing the encode and write
+            *args: Positional arguments for fn
+            label: Human-readable job name used in error reports (e.g. filename)
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future for the submitted job
+        """
+        future = self._pool.submit(
+            fn, *args, label=label, _record_errors=False, **kwargs
+        )
+        self._jobs.append((future, label))
+        return future
+
+    def wait(self) -> List[Dict[str, str]]:
+        """
+        Block until every job of the batch has finished
+
+        Returns:
+            List of dicts with "filename" and "error" keys for failed jobs
+        """
+        errors = []
+        for future, label in self._jobs:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append({"filename": label, "error": str(e)})
+        return errors
+
+
+class BackgroundWriterPool:
+    """
+    Thread pool for asynchronous image encoding and writing
+
+    PIL releases the GIL while running its zlib/libjpeg/libwebp encoders, so a
+    thread pool gives real parallelism without pickling images to a process.
+
+    Features:
+    - Bounded queue: submit() blocks once max_pending writes are in flight
+    - Per-batch waiting: batch() groups the writes of one execution
+    - Failure collection: errors of unbatched jobs are kept until drained
+    - Flush on shutdown: pending writes complete before interpreter exit
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, max_pending: Optional[int] = None
+    ):
+        """
+        Initialize the writer pool
+
+        Args:
+            max_workers: Number of encoder threads (default: min(4, cpu_count))
+            max_pending: Maximum queued + running writes before submit() blocks
+                (default: 4 x max_workers)
+        """
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 4
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+        self._errors: List[Dict[str, str]] = []
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the executor lazily so idle imports spawn no threads"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="KikoSaveWriter"
+                )
+            return self._executor
+
+    def batch(self) -> WriteBatch:
+        """
+        Start a group of writes that the caller waits for
+
+        Returns:
+            Empty WriteBatch bound to this pool
+        """
+        return WriteBatch(self)
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        label: str = "",
+        _record_errors: bool = True,
+        **kwargs: Any,
+    ) -> Future:
+        """
+        Queue a write job, blocking while the pool is at capacity
+
+        Args:
+            fn: Callable performing the encode and write
+            *args: Positional arguments for fn
+            label: Human-readable job name used in error reports (e.g. filename)
+            _record_errors: Keep failures for drain_errors() (False for jobs
+                owned by a WriteBatch)
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future for the submitted job
+        """
+        # Backpressure: wait for a free slot instead of growing the queue unbounded
+        self._slots.acquire()
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending.append(future)
+
+        future.add_done_callback(lambda f: self._on_done(f, label, _record_errors))
+        return future
+
+    def _on_done(self, future: Future, label: str, record_errors: bool) -> None:
+        """Release the slot and record any failure"""
+        self._slots.release()
+        with self._lock:
+            if future in self._pending:
+                self._pending.remove(future)
+
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            logger.error(f"KikoSaveImage: background write failed for {label}: {error}")
+            if not record_errors:
+                # Reported by WriteBatch.wait() to the run that queued it
+                return
+            with self._lock:
+                self._errors.append({"filename": label, "error": str(error)})
+
+    @property
+    def pending_count(self) -> int:
+        """Number of writes queued or in progress"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all pending writes to finish
+
+        Args:
+            timeout: Maximum seconds to wait per job (None waits indefinitely)
+
+        Returns:
+            True if every pending write completed
+        """
+        with self._lock:
+            pending = list(self._pending)
+
+        completed = True
+        for future in pending:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                # Failures are recorded by _on_done; only timeouts matter here
+                if not future.done():
+                    completed = False
+        return completed
+
+    def drain_errors(self) -> List[Dict[str, str]]:
+        """
+        Return and clear failures recorded since the last drain
+
+        Returns:
+            List of dicts with "filename" and "error" keys
+        """
+        with self._lock:
+            errors = self._errors
+            self._errors = []
+        return errors
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Flush pending writes and stop the worker threads
+
+        Args:
+            wait: Block until queued writes are complete
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_writer_pool: Optional[BackgroundWriterPool] = None
+_writer_pool_lock = threading.Lock()
+
+
+def get_writer_pool() -> BackgroundWriterPool:
+    """
+    Get the shared writer pool, creating it on first use
+
+    Returns:
+        Process-wide BackgroundWriterPool instance
+    """
+    global _writer_pool
+    with _writer_pool_lock:
+        if _writer_pool is None:
+            _writer_pool = BackgroundWriterPool()
+            atexit.register(_writer_pool.shutdown)
+        return _writer_pool
@@ -0,0 +1,404 @@
+"""
+Local Image Loader directory index
+Per-directory listings kept warm by a watcher, with presorted views for paging
+"""
+
+import os
+import stat
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logic import get_media_type, is_visible, scan_entries
+
+try:
+    from watchdog.observers import Observer
+
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+SORT_KEYS = ["name", "date", "size"]
+
+# Without filesystem events, a listing is rescanned when the directory's
+# mtime changes (entries added, removed or renamed) or when it is older than
+# this, which catches files rewritten in place
+POLL_INTERVAL = 5.0
+
+# With filesystem events, a full rescan only guards against dropped events
+WATCHED_REVALIDATE_INTERVAL = 60.0
+
+# Directories kept indexed at once
+DEFAULT_MAX_DIRECTORIES = 16
+
+
+def sort_key(item: Dict[str, Any], sort_by: str) -> Tuple:
+    """
+    Ascending sort key for an entry: directories first, then by sort_by
+
+    Args:
+        item: File information dictionary
+        sort_by: One of SORT_KEYS
+
+    Returns:
+        Sort key tuple, unique per entry
+    """
+    if sort_by == "date":
+        value = item["mtime"]
+    elif sort_by == "size":
+        value = item["size"]
+    else:
+        value = item["name"].lower()
+    return (item["type"] != "dir", value, item["name"])
+
+
+class DirectoryIndex:
+    """
+    Listing of one directory with incrementally maintained sorted views
+
+    Entries are kept in an ascending list per sort key. Changes found by a
+    rescan or reported by the watcher are applied as inserts and removals,
+    so listings are never re-sorted; filtered views for a request's options
+    are derived from the sorted lists and cached until the next change.
+    """
+
+    def __init__(self, directory: str, revalidate_interval: float = POLL_INTERVAL):
+        """
+        Initialize the index (the directory is scanned on first use)
+
+        Args:
+            directory: Directory to index
+            revalidate_interval: Seconds after which a listing is rescanned
+                even if the directory mtime is unchanged
+        """
+        self.directory = directory
+        self.revalidate_interval = revalidate_interval
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Built on first use per sort key, then maintained incrementally
+        self._sorted: Dict[str, List[Tuple[Tuple, str]]] = {}
+        self._views: Dict[Tuple, List[Dict[str, Any]]] = {}
+        self._dirty: set = set()
+        self._rescan_needed = True
+        self._directory_mtime: Optional[int] = None
+        self._scanned_at = 0.0
+        self._watch = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.entries)
+
+    def _ordered(self, sort_by: str) -> List[Tuple[Tuple, str]]:
+        """Ascending (sort key, name) list for a sort key"""
+        ordered = self._sorted.get(sort_by)
+        if ordered is None:
+            ordered = sorted(
+                (sort_key(item, sort_by), name) for name, item in self.entries.items()
+            )
+            self._sorted[sort_by] = ordered
+        return ordered
+
+    def _insert(self, item: Dict[str, Any]) -> None:
+        self.entries[item["name"]] = item
+        for key, ordered in self._sorted.items():
+            insort(ordered, (sort_key(item, key), item["name"]))
+
+    def _remove(self, name: str) -> None:
+        item = self.entries.pop(name)
+        for key, ordered in self._sorted.items():
+            position = bisect_left(ordered, (sort_key(item, key), name))
+            del ordered[position]
+
+    def _apply(self, name: str, item: Optional[Dict[str, Any]]) -> bool:
+        """Replace, add or (with item None) remove one entry"""
+        current = self.entries.get(name)
+        if current == item:
+            return False
+        if current is not None:
+            self._remove(name)
+        if item is not None:
+            self._insert(item)
+        return True
+
+    def _rescan(self) -> None:
+        """Scan the directory and apply the difference to the index"""
+        self._directory_mtime = os.stat(self.directory).st_mtime_ns
+        scanned = scan_entries(self.directory)
+        self._scanned_at = time.monotonic()
+        self._rescan_needed = False
+        self._dirty.clear()
+
+        changed = [name for name in self.entries if name not in scanned]
+        changed += [
+            name for name, item in scanned.items() if self.entries.get(name) != item
+        ]
+        if not changed:
+            return
+
+        self._views.clear()
+        if len(changed) > len(scanned) // 2:
+            # Mostly new (first scan): sorting again beats one insort per entry
+            self.entries = scanned
+            self._sorted.clear()
+            return
+
+        for name in changed:
+            self._apply(name, scanned.get(name))
+
+    def _stat_entry(self, name: str) -> Optional[Dict[str, Any]]:
+        """Read one entry as scan_entries would, or None if it is gone"""
+        path = os.path.join(self.directory, name)
+        try:
+            stats = os.stat(path)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            return None
+
+        media_type = get_media_type(name, stat.S_ISDIR(stats.st_mode))
+        if media_type is None:
+            return None
+        return {
+            "path": path,
+            "name": name,
+            "mtime": stats.st_mtime,
+            "size": stats.st_size,
+            "type": media_type,
+        }
+
+    def mark_changed(self, path: str) -> None:
+        """
+        Record a filesystem change reported by the watcher
+
+        Args:
+            path: Changed path; changes outside this directory are ignored,
+                and a change to the directory itself forces a rescan
+        """
+        path = os.path.normpath(path)
+        with self._lock:
+            if path == os.path.normpath(self.directory):
+                self._rescan_needed = True
+            elif os.path.dirname(path) == os.path.normpath(self.directory):
+                self._dirty.add(os.path.basename(path))
+
+    def refresh(self) -> None:
+        """
+        Bring the index up to date
+
+        Applies changes reported by the watcher. A full rescan happens on
+        first use, when the directory mtime changed while unwatched, or when
+        the listing is older than revalidate_interval.
+
+        Raises:
+            NotADirectoryError: If the directory no longer exists
+        """
+        with self._lock:
+            try:
+                expired = (
+                    time.monotonic() - self._scanned_at >= self.revalidate_interval
+                )
+                if self._rescan_needed or expired:
+                    self._rescan()
+                elif self._watch is None:
+                    if os.stat(self.directory).st_mtime_ns != self._directory_mtime:
+                        self._rescan()
+            except (FileNotFoundError, NotADirectoryError):
+                raise NotADirectoryError(f"Not a directory: {self.directory}")
+
+            dirty, self._dirty = self._dirty, set()
+            for name in dirty:
+                if self._apply(name, self._stat_entry(name)):
+                    self._views.clear()
+
+    def view(
+        self,
+        sort_by: str = "name",
+        sort_order: str = "asc",
+        show_videos: bool = False,
+        show_audio: bool = False,
+        hide_dot_folders: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Full sorted, filtered listing (directories first), as scan_directory
+
+        Args:
+            sort_by: Sort criteria ('name', 'date', 'size')
+            sort_order: Sort order ('asc', 'desc')
+            show_videos: Include video files
+            show_audio: Include audio files
+            hide_dot_folders: Hide folders starting with a dot
+
+        Returns:
+            Cached list of file information dictionaries; do not modify
+        """
+        if sort_by not in SORT_KEYS:
+            sort_by = "name"
+        options = (
+            sort_by,
+            sort_order == "desc",
+            show_videos,
+            show_audio,
+            hide_dot_folders,
+        )
+
+        with self._lock:
+            self.refresh()
+            view = self._views.get(options)
+            if view is not None:
+                return view
+
+            items = [
+                self.entries[name]
+                for _, name in self._ordered(sort_by)
+                if is_visible(
+                    self.entries[name], show_videos, show_audio, hide_dot_folders
+                )
+            ]
+            if sort_order == "desc":
+                # Reverse within each group, keeping directories first
+                dirs = sum(1 for item in items if item["type"] == "dir")
+                items = items[:dirs][::-1] + items[dirs:][::-1]
+
+            self._views[options] = items
+            return items
+
+    def page(
+        self,
+        page: int,
+        per_page: int,
+        sort_by: str = "name",
+        sort_order: str = "asc",
+        show_videos: bool = False,
+        show_audio: bool = False,
+        hide_dot_folders: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        One page of the sorted, filtered listing
+
+        Args:
+            page: Page number, starting at 1
+            per_page: Items per page
+            sort_by: Sort criteria ('name', 'date', 'size')
+            sort_order: Sort order ('asc', 'desc')
+            show_videos: Include video files
+            show_audio: Include audio files
+            hide_dot_folders: Hide folders starting with a dot
+
+        Returns:
+            Tuple of (page items, total number of items)
+        """
+        items = self.view(
+            sort_by, sort_order, show_videos, show_audio, hide_dot_folders
+        )
+        start = (page - 1) * per_page
+        return items[start : start + per_page], len(items)
+
+
+class _WatchHandler:
+    """Forwards watchdog events for one directory to its index"""
+
+    def __init__(self, index: DirectoryIndex):
+        self.index = index
+
+    def dispatch(self, event) -> None:
+        self.index.mark_changed(os.fsdecode(event.src_path))
+        dest_path = getattr(event, "dest_path", "")
+        if dest_path:
+            self.index.mark_changed(os.fsdecode(dest_path))
+
+
+class DirectoryIndexRegistry:
+    """
+    Indexes for recently browsed directories
+
+    With watchdog installed, indexed directories are watched through one
+    shared observer (inotify, FSEvents or ReadDirectoryChangesW) and only
+    changed entries are re-read; otherwise indexes poll the directory mtime.
+    """
+
+    def __init__(
+        self, max_directories: int = DEFAULT_MAX_DIRECTORIES, watch: bool = True
+    ):
+        """
+        Initialize the registry
+
+        Args:
+            max_directories: Number of directory indexes kept
+            watch: Use filesystem events when watchdog is available
+        """
+        self.max_directories = max_directories
+        self.watch = watch and WATCHDOG_AVAILABLE
+        self._indexes: "OrderedDict[str, DirectoryIndex]" = OrderedDict()
+        self._observer = None
+        self._lock = threading.Lock()
+
+    def _start_watching(self, index: DirectoryIndex) -> None:
+        try:
+            if self._observer is None:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._observer.start()
+            index._watch = self._observer.schedule(
+                _WatchHandler(index), index.directory, recursive=False
+            )
+            index.revalidate_interval = WATCHED_REVALIDATE_INTERVAL
+        except Exception as e:
+            # e.g. inotify watch limit reached; the index falls back to polling
+            print(f"KikoLocalImageLoader: Cannot watch {index.directory}: {e}")
+
+    def _stop_watching(self, index: DirectoryIndex) -> None:
+        if index._watch is None:
+            return
+        try:
+            self._observer.unschedule(index._watch)
+        except Exception:
+            pass
+        index._watch = None
+
+    def get(self, directory: str) -> DirectoryIndex:
+        """
+        Get the index for a directory, creating it on first use
+
+        Args:
+            directory: Directory path
+
+        Returns:
+            DirectoryIndex for the normalized path
+        """
+        directory = os.path.normpath(directory)
+        with self._lock:
+            index = self._indexes.get(directory)
+            if index is not None:
+                self._indexes.move_to_end(directory)
+                return index
+
+            index = DirectoryIndex(directory)
+            if self.watch:
+                self._start_watching(index)
+            self._indexes[directory] = index
+
+            while len(self._indexes) > self.max_directories:
+                _, evicted = self._indexes.popitem(last=False)
+                self._stop_watching(evicted)
+            return index
+
+
+_registry: Optional[DirectoryIndexRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_directory_index(directory: str) -> DirectoryIndex:
+    """
+    Get the shared index for a directory
+
+    Args:
+        directory: Directory path
+
+    Returns:
+        DirectoryIndex from the process-wide registry
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DirectoryIndexRegistry()
+    return _registry.get(directory)
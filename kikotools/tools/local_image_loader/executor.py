@@ -0,0 +1,324 @@
+"""
+Local Image Loader route executor
+Bounded worker pools with timeouts, cancellation and per-endpoint latency metrics
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# name -> (worker threads, maximum queued plus running jobs). Filesystem
+# work gets its own pool so a page of thumbnails cannot starve listings.
+POOLS = {
+    "io": (8, 64),
+    "thumbnail": (min(4, os.cpu_count() or 1), 256),
+}
+
+DEFAULT_TIMEOUT = 30.0
+
+# Per-endpoint timeouts in seconds; endpoints not listed use DEFAULT_TIMEOUT
+ROUTE_TIMEOUTS = {
+    "list_directories": 10.0,
+    # The first search below a large tree builds its index
+    "search": 120.0,
+}
+
+# How often a waiting request checks whether its client is still connected
+DISCONNECT_POLL_INTERVAL = 0.25
+
+# Latency samples kept per endpoint for percentiles
+LATENCY_WINDOW = 1024
+
+OUTCOMES = ["ok", "error", "timeout", "cancelled", "rejected"]
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when a pool already has its maximum number of pending jobs"""
+
+
+class ClientDisconnectedError(ConnectionError):
+    """Raised when the client goes away while its job is pending"""
+
+
+class EndpointMetrics:
+    """Request counts by outcome and a window of recent latencies"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.in_flight = 0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def record(self, outcome: str, seconds: float) -> None:
+        """
+        Record a finished request
+
+        Args:
+            outcome: One of OUTCOMES
+            seconds: Wall-clock time from arrival to completion
+        """
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+            self.total_ms += milliseconds
+            self.max_ms = max(self.max_ms, milliseconds)
+            self._latencies.append(milliseconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current metrics as a JSON-serializable dictionary
+
+        Returns:
+            Counts by outcome, in-flight requests, and mean, max and
+            p50/p95/p99 latency in milliseconds
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests = sum(self.counts.values())
+            snapshot = {
+                "requests": requests,
+                "in_flight": self.in_flight,
+                **self.counts,
+                "mean_ms": round(self.total_ms / requests, 2) if requests else 0.0,
+                "max_ms": round(self.max_ms, 2),
+            }
+
+        for name, fraction in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            if latencies:
+                position = min(len(latencies) - 1, int(fraction * len(latencies)))
+                snapshot[name] = round(latencies[position], 2)
+            else:
+                snapshot[name] = 0.0
+        return snapshot
+
+
+class RouteMetrics:
+    """Metrics for every endpoint, created on first use"""
+
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        with self._lock:
+            if name not in self._endpoints:
+                self._endpoints[name] = EndpointMetrics()
+            return self._endpoints[name]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            endpoints = dict(self._endpoints)
+        return {name: metrics.snapshot() for name, metrics in sorted(endpoints.items())}
+
+
+class RouteExecutor:
+    """
+    Thread pool that runs blocking route work off the event loop
+
+    The number of queued plus running jobs is bounded, so a slow filesystem
+    produces fast rejections instead of an unbounded backlog. Waiting is
+    limited by a timeout and abandoned when the client disconnects; jobs
+    that have not started yet are then cancelled. A job that is already
+    running cannot be interrupted, but it still holds its slot until it
+    finishes, so the bound stays accurate.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        name: str = "io",
+        metrics: Optional[RouteMetrics] = None,
+    ):
+        """
+        Initialize the executor
+
+        Args:
+            max_workers: Worker threads
+            max_pending: Maximum queued plus running jobs
+            name: Pool name, used for thread names
+            metrics: Metrics registry (defaults to the shared one)
+        """
+        self.max_pending = max_pending
+        self.metrics = metrics if metrics is not None else get_route_metrics()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"kiko-loader-{name}"
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running"""
+        with self._lock:
+            return self._pending
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, func: Callable, *args) -> Future:
+        """
+        Queue a job unless the pool is saturated
+
+        Args:
+            func: Blocking callable
+            *args: Arguments for func
+
+        Returns:
+            concurrent.futures.Future for the job
+
+        Raises:
+            ExecutorBusyError: If max_pending jobs are already pending
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorBusyError(
+                    f"Too many pending requests ({self.max_pending})"
+                )
+            self._pending += 1
+
+        try:
+            future = self._pool.submit(func, *args)
+        except RuntimeError:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def _wait(
+        self,
+        future: Future,
+        timeout: float,
+        is_disconnected: Optional[Callable[[], bool]],
+    ) -> Any:
+        """Await a job, giving up on timeout or client disconnect"""
+        loop = asyncio.get_running_loop()
+        wrapped = asyncio.wrap_future(future)
+        # Results of abandoned jobs are never awaited; retrieve them quietly
+        wrapped.add_done_callback(lambda f: f.cancelled() or f.exception())
+        deadline = loop.time() + timeout
+
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"Request timed out after {timeout:g}s")
+                if is_disconnected is not None:
+                    remaining = min(remaining, DISCONNECT_POLL_INTERVAL)
+
+                done, _ = await asyncio.wait({wrapped}, timeout=remaining)
+                if done:
+                    return wrapped.result()
+                if is_disconnected is not None and is_disconnected():
+                    raise ClientDisconnectedError("Client disconnected")
+        except BaseException:
+            # Drops the job if it has not started; covers handler cancellation
+            future.cancel()
+            raise
+
+    async def run(
+        self,
+        endpoint: str,
+        func: Callable,
+        *args,
+        timeout: Optional[float] = None,
+        is_disconnected: Optional[Callable[[], bool]] = None,
+    ) -> Any:
+        """
+        Run a blocking call in the pool and record the endpoint's metrics
+
+        Args:
+            endpoint: Endpoint name for metrics
+            func: Blocking callable
+            *args: Arguments for func
+            timeout: Seconds to wait, including time spent queued
+                (defaults to the endpoint's ROUTE_TIMEOUTS entry)
+            is_disconnected: Returns True once the client has gone away
+
+        Returns:
+            Return value of func
+
+        Raises:
+            ExecutorBusyError: If the pool is saturated
+            TimeoutError: If the job does not finish within timeout
+            ClientDisconnectedError: If the client disconnects first
+            Exception: Whatever func raises
+        """
+        if timeout is None:
+            timeout = ROUTE_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+        metrics = self.metrics.endpoint(endpoint)
+        metrics.start()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await self._wait(
+                self.submit(func, *args), timeout, is_disconnected
+            )
+            outcome = "ok"
+            return result
+        except ExecutorBusyError:
+            outcome = "rejected"
+            raise
+        except TimeoutError:
+            outcome = "timeout"
+            raise
+        except (ClientDisconnectedError, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        finally:
+            metrics.record(outcome, time.perf_counter() - start)
+
+
+_route_metrics: Optional[RouteMetrics] = None
+_executors: Dict[str, RouteExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def get_route_metrics() -> RouteMetrics:
+    """
+    Get the shared metrics registry
+
+    Returns:
+        Process-wide RouteMetrics instance
+    """
+    global _route_metrics
+    with _executor_lock:
+        if _route_metrics is None:
+            _route_metrics = RouteMetrics()
+        return _route_metrics
+
+
+def get_route_executor(pool: str = "io") -> RouteExecutor:
+    """
+    Get a shared route executor, creating it on first use
+
+    Args:
+        pool: One of POOLS
+
+    Returns:
+        Process-wide RouteExecutor for the pool
+
+    Raises:
+        ValueError: If pool is not a known pool
+    """
+    if pool not in POOLS:
+        raise ValueError(f"pool must be one of {list(POOLS)}, got {pool}")
+
+    metrics = get_route_metrics()
+    with _executor_lock:
+        if pool not in _executors:
+            max_workers, max_pending = POOLS[pool]
+            _executors[pool] = RouteExecutor(max_workers, max_pending, pool, metrics)
+        return _executors[pool]
@@ -1,11 +1,10 @@
 """Core logic for Local Image Loader."""
 
 import os
-import json
 import torch
 import numpy as np
 from PIL import Image
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 
 
 def get_supported_extensions() -> Dict[str, List[str]]:
@@ -41,32 +40,97 @@ def load_image_from_path(path: str) -> Tuple[torch.Tensor, Dict[str, Any]]:
         img_array = np.array(img_out).astype(np.float32) / 255.0
         image_tensor = torch.from_numpy(img_array)[None,]
 
-        # Collect metadata
-        metadata = {
-            "filename": os.path.basename(path),
-            "width": img.width,
-            "height": img.height,
-            "mode": img.mode,
-            "format": img.format,
-        }
-
-        # Check for embedded metadata
-        if "parameters" in img.info:
-            metadata["parameters"] = img.info["parameters"]
-        if "prompt" in img.info:
-            try:
-                metadata["prompt"] = json.loads(img.info["prompt"])
-            except (json.JSONDecodeError, TypeError):
-                metadata["prompt"] = img.info["prompt"]
-        if "workflow" in img.info:
-            try:
-                metadata["workflow"] = json.loads(img.info["workflow"])
-            except (json.JSONDecodeError, TypeError):
-                metadata["workflow"] = img.info["workflow"]
+    # Basic info and embedded parameters, prompt and workflow, parsed once
+    # per file version
+    from .metadata import get_metadata_cache
+
+    metadata = get_metadata_cache().get(path).to_dict()
 
     return image_tensor, metadata
 
 
+def get_media_type(name: str, is_dir: bool = False) -> Optional[str]:
+    """
+    Classify a directory entry by its name.
+
+    Args:
+        name: Entry name
+        is_dir: Whether the entry is a directory
+
+    Returns:
+        'dir', 'image', 'video', 'audio', or None for unsupported files
+    """
+    if is_dir:
+        return "dir"
+
+    ext = os.path.splitext(name)[1].lower()
+    for media_type, type_extensions in get_supported_extensions().items():
+        if ext in type_extensions:
+            return media_type
+    return None
+
+
+def scan_entries(directory: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read every subdirectory and supported media file in a directory.
+
+    Uses os.scandir, so directories are recognized from the entry type and
+    only supported files are stat'ed.
+
+    Args:
+        directory: Directory path to scan
+
+    Returns:
+        Dictionary of entry name to file information dictionary
+    """
+    entries = {}
+    with os.scandir(directory) as iterator:
+        for entry in iterator:
+            try:
+                media_type = get_media_type(entry.name, entry.is_dir())
+                if media_type is None:
+                    continue
+
+                stats = entry.stat()
+                entries[entry.name] = {
+                    "path": entry.path,
+                    "name": entry.name,
+                    "mtime": stats.st_mtime,
+                    "size": stats.st_size,
+                    "type": media_type,
+                }
+            except (PermissionError, FileNotFoundError):
+                continue
+    return entries
+
+
+def is_visible(
+    item: Dict[str, Any],
+    show_videos: bool = False,
+    show_audio: bool = False,
+    hide_dot_folders: bool = True,
+) -> bool:
+    """
+    Check whether a scanned entry passes the browser's view options.
+
+    Args:
+        item: File information dictionary from scan_entries
+        show_videos: Include video files
+        show_audio: Include audio files
+        hide_dot_folders: Hide folders starting with a dot
+
+    Returns:
+        True if the entry should be listed
+    """
+    if hide_dot_folders and item["name"].startswith("."):
+        return False
+    if item["type"] == "video":
+        return show_videos
+    if item["type"] == "audio":
+        return show_audio
+    return True
+
+
 def scan_directory(
     directory: str,
     show_videos: bool = False,
@@ -92,43 +156,11 @@ def scan_directory(
     if not os.path.isdir(directory):
         raise NotADirectoryError(f"Not a directory: {directory}")
 
-    extensions = get_supported_extensions()
-    items = []
-
-    for item in os.listdir(directory):
-        # Skip dot folders/files if hide_dot_folders is enabled
-        if hide_dot_folders and item.startswith("."):
-            continue
-
-        full_path = os.path.join(directory, item)
-
-        try:
-            stats = os.stat(full_path)
-            item_data = {
-                "path": full_path,
-                "name": item,
-                "mtime": stats.st_mtime,
-                "size": stats.st_size,
-            }
-
-            if os.path.isdir(full_path):
-                items.append({**item_data, "type": "dir"})
-            else:
-                ext = os.path.splitext(item)[1].lower()
-                item_type = None
-
-                if ext in extensions["image"]:
-                    item_type = "image"
-                elif show_videos and ext in extensions["video"]:
-                    item_type = "video"
-                elif show_audio and ext in extensions["audio"]:
-                    item_type = "audio"
-
-                if item_type:
-                    items.append({**item_data, "type": item_type})
-
-        except (PermissionError, FileNotFoundError):
-            continue
+    items = [
+        item
+        for item in scan_entries(directory).values()
+        if is_visible(item, show_videos, show_audio, hide_dot_folders)
+    ]
 
     # Sort items
     reverse = sort_order == "desc"
@@ -145,6 +177,75 @@ def scan_directory(
     return items
 
 
+# Autocomplete suggestions returned per request
+MAX_DIRECTORY_SUGGESTIONS = 50
+
+
+def _matching_subdirectories(parent: str, prefix: str = "") -> Dict[str, Any]:
+    """List subdirectories of parent whose names start with prefix."""
+    try:
+        with os.scandir(parent) as iterator:
+            dirs = [
+                os.path.join(parent, entry.name)
+                for entry in iterator
+                if entry.name.lower().startswith(prefix) and entry.is_dir()
+            ]
+    except PermissionError:
+        return {"directories": [], "error": "Permission denied"}
+
+    dirs.sort(key=lambda x: x.lower())
+    return {"directories": dirs[:MAX_DIRECTORY_SUGGESTIONS]}
+
+
+def list_subdirectories(path: str) -> Dict[str, Any]:
+    """
+    Suggest directories for a partially typed path.
+
+    A path ending in a separator lists that directory's subdirectories;
+    otherwise the parent's subdirectories starting with the last component
+    are listed. An empty path lists the filesystem roots.
+
+    Args:
+        path: Partially typed directory path ('~' is expanded)
+
+    Returns:
+        Dictionary with a 'directories' list, plus 'error' on failure
+    """
+    # Handle empty path - show root or common starting points
+    if not path:
+        if os.name == "nt":  # Windows
+            import string
+
+            drives = [
+                f"{d}:\\" for d in string.ascii_uppercase if os.path.exists(f"{d}:\\")
+            ]
+            return {"directories": drives}
+        return {"directories": ["/"]}  # Unix/Linux/Mac
+
+    path = os.path.expanduser(path)  # Handle ~ for home directory
+
+    # If path ends with separator, list contents of that directory
+    if path.endswith(os.sep) or (os.name == "nt" and path.endswith("/")):
+        if os.path.isdir(path):
+            return _matching_subdirectories(path)
+        return {"directories": []}
+
+    # Otherwise, find matching directories in parent
+    parent_dir = os.path.dirname(path)
+    basename = os.path.basename(path).lower()
+
+    if not parent_dir:
+        # Handle root level on Unix
+        if not path.startswith("/"):
+            return {"directories": []}
+        parent_dir = "/"
+        basename = path[1:].lower()
+
+    if os.path.isdir(parent_dir):
+        return _matching_subdirectories(parent_dir, basename)
+    return {"directories": []}
+
+
 def search_files(
     root_directory: str,
     query: str,
@@ -155,6 +256,9 @@ def search_files(
     """
     Recursively search for files matching the query.
 
+    Searches the persistent filename index, which is refreshed
+    incrementally (only directories whose mtime changed are re-listed).
+
     Args:
         root_directory: Root directory to start search
         query: Search query (case-insensitive filename match)
@@ -163,78 +267,20 @@ def search_files(
         max_results: Maximum number of results to return
 
     Returns:
-        List of file information dictionaries
+        List of file information dictionaries, best match first
     """
+    # Imported here: the index module builds on this one
+    from .search_index import get_search_index
+
     if not os.path.isdir(root_directory):
         raise NotADirectoryError(f"Not a directory: {root_directory}")
 
     if not query or len(query.strip()) == 0:
         return []
 
-    extensions = get_supported_extensions()
-    results = []
-    query_lower = query.lower().strip()
-
-    def search_recursive(directory: str) -> None:
-        """Recursively search directory."""
-        if len(results) >= max_results:
-            return
-
-        try:
-            items = os.listdir(directory)
-        except (PermissionError, FileNotFoundError):
-            return
-
-        for item in items:
-            if len(results) >= max_results:
-                break
-
-            full_path = os.path.join(directory, item)
-
-            try:
-                # Check if item name matches query
-                if query_lower not in item.lower():
-                    # If directory, search inside
-                    if os.path.isdir(full_path):
-                        search_recursive(full_path)
-                    continue
-
-                stats = os.stat(full_path)
-                item_data = {
-                    "path": full_path,
-                    "name": item,
-                    "directory": directory,
-                    "mtime": stats.st_mtime,
-                    "size": stats.st_size,
-                }
-
-                if os.path.isdir(full_path):
-                    results.append({**item_data, "type": "dir"})
-                    # Continue searching inside matching directories
-                    search_recursive(full_path)
-                else:
-                    ext = os.path.splitext(item)[1].lower()
-                    item_type = None
-
-                    if ext in extensions["image"]:
-                        item_type = "image"
-                    elif show_videos and ext in extensions["video"]:
-                        item_type = "video"
-                    elif show_audio and ext in extensions["audio"]:
-                        item_type = "audio"
-
-                    if item_type:
-                        results.append({**item_data, "type": item_type})
-
-            except (PermissionError, FileNotFoundError):
-                continue
-
-    search_recursive(root_directory)
-
-    # Sort by name
-    results.sort(key=lambda x: x["name"].lower())
-
-    return results
+    return get_search_index().search(
+        root_directory, query.strip(), show_videos, show_audio, max_results
+    )
 
 
 def create_empty_tensor() -> torch.Tensor:
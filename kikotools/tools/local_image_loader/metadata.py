@@ -0,0 +1,332 @@
+"""
+Local Image Loader metadata
+Header-only image metadata (PNG text chunks, EXIF) with a per-file cache
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .logic import get_media_type
+
+# Approximate budget for cached metadata; see MetadataCache
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+
+# Paths accepted by one batch request
+MAX_BATCH_SIZE = 200
+
+# Embedded fields holding JSON, parsed on first use
+JSON_FIELDS = ["prompt", "workflow"]
+
+# EXIF tags used by ComfyUI for WebP/JPEG (the value is prefixed with the
+# field name, e.g. "prompt:{...}") and the Exif IFD comment used by A1111
+_EXIF_IMAGE_DESCRIPTION = 0x010E
+_EXIF_MAKE = 0x010F
+_EXIF_MODEL = 0x0110
+_EXIF_IFD = 0x8769
+_EXIF_USER_COMMENT = 0x9286
+
+# Fixed overhead charged per cache entry on top of its text
+_ENTRY_BYTES = 512
+
+
+def decode_user_comment(value: Any) -> Optional[str]:
+    """
+    Decode an EXIF UserComment, which starts with an 8-byte charset code
+
+    Args:
+        value: Raw tag value
+
+    Returns:
+        Comment text, or None if it is empty or undecodable
+    """
+    if isinstance(value, str):
+        return value.strip("\x00 ") or None
+    if not isinstance(value, bytes):
+        return None
+
+    code, body = value[:8], value[8:]
+    if code == b"UNICODE\x00":
+        # Byte order is not recorded; writers use big-endian in practice
+        encodings = ["utf-16-be", "utf-16-le"]
+    elif code in (b"ASCII\x00\x00\x00", b"\x00" * 8):
+        encodings = ["utf-8", "latin-1"]
+    else:
+        body = value
+        encodings = ["utf-8", "latin-1"]
+
+    for encoding in encodings:
+        try:
+            text = body.decode(encoding).strip("\x00 ")
+        except UnicodeDecodeError:
+            continue
+        return text or None
+    return None
+
+
+def _read_exif(img: Image.Image) -> Optional[Image.Exif]:
+    """EXIF block from the header, or None"""
+    # Image.getexif() would decode a PNG to look for EXIF after the pixels
+    raw = img.info.get("exif")
+    if not isinstance(raw, bytes):
+        return None
+    try:
+        exif = Image.Exif()
+        exif.load(raw)
+    except Exception:
+        return None
+    return exif
+
+
+def _exif_text(img: Image.Image) -> Dict[str, str]:
+    """Embedded generation fields stored in EXIF tags"""
+    exif = _read_exif(img)
+    if exif is None:
+        return {}
+
+    text = {}
+    for tag in (_EXIF_IMAGE_DESCRIPTION, _EXIF_MAKE, _EXIF_MODEL):
+        value = exif.get(tag)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8", "replace")
+        if not isinstance(value, str):
+            continue
+        name, separator, content = value.partition(":")
+        if separator and name in JSON_FIELDS:
+            text[name] = content.strip("\x00")
+
+    try:
+        comment = decode_user_comment(exif.get_ifd(_EXIF_IFD).get(_EXIF_USER_COMMENT))
+    except Exception:
+        comment = None
+    if comment:
+        text["parameters"] = comment
+    return text
+
+
+@dataclass
+class ImageMetadata:
+    """
+    Metadata read from an image header
+
+    Embedded fields are kept as text; prompt and workflow JSON is parsed
+    the first time it is asked for and then reused.
+    """
+
+    info: Dict[str, Any]
+    text: Dict[str, str]
+    _parsed: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def cost(self) -> int:
+        """Approximate size in bytes, for cache accounting"""
+        return _ENTRY_BYTES + sum(len(value) for value in self.text.values())
+
+    def value(self, name: str) -> Any:
+        """
+        One embedded field, with JSON fields parsed
+
+        Args:
+            name: Field name ('parameters', 'prompt', 'workflow')
+
+        Returns:
+            Field value (text, or parsed JSON when valid), or None
+        """
+        raw = self.text.get(name)
+        if raw is None or name not in JSON_FIELDS:
+            return raw
+        if name not in self._parsed:
+            try:
+                self._parsed[name] = json.loads(raw)
+            except (json.JSONDecodeError, TypeError):
+                self._parsed[name] = raw
+        return self._parsed[name]
+
+    def to_dict(self, include_workflow: bool = True) -> Dict[str, Any]:
+        """
+        Metadata in the format of load_image_from_path
+
+        Args:
+            include_workflow: Include the (often large) workflow graph
+
+        Returns:
+            Dictionary of basic info and embedded fields; parsed values are
+            shared with the cache and must not be modified
+        """
+        result = dict(self.info)
+        for name in ("parameters", "prompt", "workflow"):
+            if name == "workflow" and not include_workflow:
+                continue
+            if name in self.text:
+                result[name] = self.value(name)
+        return result
+
+
+def read_metadata(path: str) -> ImageMetadata:
+    """
+    Read image metadata without decoding pixels
+
+    Image.open only parses the header: dimensions, mode, PNG text chunks
+    that precede the image data (where ComfyUI and A1111 write theirs) and
+    the EXIF block.
+
+    Args:
+        path: Image file path
+
+    Returns:
+        ImageMetadata for the file
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        PIL.UnidentifiedImageError: If the file is not a readable image
+    """
+    with Image.open(path) as img:
+        info = {
+            "filename": os.path.basename(path),
+            "width": img.width,
+            "height": img.height,
+            "mode": img.mode,
+            "format": img.format,
+        }
+        text = _exif_text(img)
+        for name in ("parameters", "prompt", "workflow"):
+            value = img.info.get(name)
+            if isinstance(value, str):
+                text[name] = value
+    return ImageMetadata(info, text)
+
+
+class MetadataCache:
+    """
+    Memory LRU of header metadata, keyed by path and validated by mtime
+
+    A lookup stats the file; an entry is reused only while the file's
+    mtime and size are unchanged. The budget counts the embedded text of
+    each entry, not the objects parsed from it.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MEMORY_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            max_memory_bytes: Approximate budget for cached metadata
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.reads = 0
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], ImageMetadata]]" = (
+            OrderedDict()
+        )
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _remember(
+        self, path: str, version: Tuple[int, int], metadata: ImageMetadata
+    ) -> None:
+        """Insert into the LRU, evicting beyond the byte budget"""
+        if metadata.cost > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._memory_bytes -= previous[1].cost
+            self._entries[path] = (version, metadata)
+            self._memory_bytes += metadata.cost
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._memory_bytes -= evicted.cost
+
+    def get(self, path: str) -> ImageMetadata:
+        """
+        Get metadata for an image, reading its header on a miss
+
+        Args:
+            path: Image file path
+
+        Returns:
+            ImageMetadata for the current version of the file
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            PIL.UnidentifiedImageError: If the file is not a readable image
+        """
+        path = os.path.abspath(path)
+        stats = os.stat(path)
+        version = (stats.st_mtime_ns, stats.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        metadata = read_metadata(path)
+        self.reads += 1
+        self._remember(path, version, metadata)
+        return metadata
+
+    def get_many(
+        self, paths: List[str], include_workflow: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Metadata for a page of files in one call
+
+        Args:
+            paths: Image file paths
+            include_workflow: Include workflow graphs
+
+        Returns:
+            Dictionary of path to metadata, or to {"error": message} for
+            files that are missing, unsupported or unreadable
+
+        Raises:
+            ValueError: If paths is not a list of strings or is too long
+        """
+        if not isinstance(paths, list) or not all(
+            isinstance(path, str) for path in paths
+        ):
+            raise ValueError("paths must be a list of strings")
+        if len(paths) > MAX_BATCH_SIZE:
+            raise ValueError(
+                f"paths must contain at most {MAX_BATCH_SIZE} entries, got {len(paths)}"
+            )
+
+        results = {}
+        for path in paths:
+            if ".." in path or get_media_type(path) != "image":
+                results[path] = {"error": "Unsupported file"}
+                continue
+            try:
+                results[path] = self.get(path).to_dict(include_workflow)
+            except FileNotFoundError:
+                results[path] = {"error": "File not found"}
+            except Exception as e:
+                results[path] = {"error": str(e)}
+        return results
+
+
+_metadata_cache: Optional[MetadataCache] = None
+_metadata_cache_lock = threading.Lock()
+
+
+def get_metadata_cache() -> MetadataCache:
+    """
+    Get the shared metadata cache, creating it on first use
+
+    Returns:
+        Process-wide MetadataCache instance
+    """
+    global _metadata_cache
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache()
+        return _metadata_cache
@@ -3,55 +3,46 @@
 import os
 import json
 import torch
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
 
 from ...base.base_node import ComfyAssetsBaseNode
+from .directory_index import get_directory_index
 from .logic import load_image_from_path, create_empty_tensor
-
+from .store import JsonStore, get_store
 
 NODE_DIR = os.path.dirname(os.path.abspath(__file__))
 SELECTIONS_FILE = os.path.join(NODE_DIR, "selections.json")
 CONFIG_FILE = os.path.join(NODE_DIR, "config.json")
 
 
+def get_selection_store() -> JsonStore:
+    """Get the in-memory store behind selections.json."""
+    return get_store(SELECTIONS_FILE, "selections", indent=4, ensure_ascii=False)
+
+
+def get_config_store() -> JsonStore:
+    """Get the in-memory store behind config.json."""
+    return get_store(CONFIG_FILE, "config", indent=4)
+
+
 def load_selections() -> Dict[str, Any]:
-    """Load node selections from file."""
-    if not os.path.exists(SELECTIONS_FILE):
-        return {}
-    try:
-        with open(SELECTIONS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return {}
+    """Load node selections (from memory after the first read)."""
+    return get_selection_store().snapshot()
 
 
 def save_selections(data: Dict[str, Any]) -> None:
-    """Save node selections to file."""
-    try:
-        with open(SELECTIONS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"KikoLocalImageLoader: Error saving selections: {e}")
+    """Save node selections; the file is written in the background."""
+    get_selection_store().replace(data)
 
 
 def load_config() -> Dict[str, Any]:
-    """Load configuration from file."""
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+    """Load configuration (from memory after the first read)."""
+    return get_config_store().snapshot()
 
 
 def save_config(data: Dict[str, Any]) -> None:
-    """Save configuration to file."""
-    try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-    except Exception as e:
-        print(f"KikoLocalImageLoader: Error saving config: {e}")
+    """Save configuration; the file is written in the background."""
+    get_config_store().replace(data)
 
 
 class LocalImageLoaderNode(ComfyAssetsBaseNode):
@@ -79,6 +70,8 @@ class LocalImageLoaderNode(ComfyAssetsBaseNode):
     @classmethod
     def IS_CHANGED(cls, **kwargs):
         """Check if node state has changed."""
+        # Selections are written in the background; make the file current
+        get_selection_store().flush()
         if os.path.exists(SELECTIONS_FILE):
             return os.path.getmtime(SELECTIONS_FILE)
         return float("inf")
@@ -113,17 +106,154 @@ class LocalImageLoaderNode(ComfyAssetsBaseNode):
         return (image_tensor, info_string)
 
 
+def set_selection(node_id: str, media_type: str, path: str) -> None:
+    """
+    Record the file a node has selected for a media type.
+
+    Only this node's entry is changed, so selections made at the same time
+    in other tabs are kept.
+
+    Args:
+        node_id: Node unique ID
+        media_type: 'image', 'video' or 'audio'
+        path: Selected file path
+    """
+
+    def select(selections: Dict[str, Any]) -> None:
+        selections.setdefault(node_id, {})[media_type] = {"path": path}
+
+    get_selection_store().update(select)
+
+
+def set_saved_paths(paths: List[str]) -> None:
+    """
+    Store the user's saved directory paths.
+
+    Args:
+        paths: Directory paths
+    """
+    get_config_store().set("saved_paths", paths)
+
+
+def check_view_file(path: str) -> str:
+    """
+    Check that a path names an existing file before it is served.
+
+    Args:
+        path: File path
+
+    Returns:
+        The path
+
+    Raises:
+        FileNotFoundError: If path does not exist or is not a regular file
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    return path
+
+
+def list_images(
+    directory: str,
+    page: int = 1,
+    per_page: int = 50,
+    sort_by: str = "name",
+    sort_order: str = "asc",
+    show_videos: bool = False,
+    show_audio: bool = False,
+    hide_dot_folders: bool = True,
+) -> Dict[str, Any]:
+    """
+    Build one page of the gallery listing and remember the directory.
+
+    Args:
+        directory: Directory to list
+        page: Page number, starting at 1
+        per_page: Items per page
+        sort_by: Sort criteria ('name', 'date', 'size')
+        sort_order: Sort order ('asc', 'desc')
+        show_videos: Include video files
+        show_audio: Include audio files
+        hide_dot_folders: Hide folders starting with a dot
+
+    Returns:
+        Response dictionary with items and pagination details
+
+    Raises:
+        NotADirectoryError: If directory does not exist
+    """
+    if not directory or not os.path.isdir(directory):
+        raise NotADirectoryError(f"Not a directory: {directory}")
+
+    # Normalize path to remove trailing slashes and resolve relative paths
+    directory = os.path.normpath(directory)
+
+    # Remember the last path (in memory; written in the background)
+    get_config_store().set("last_path", directory)
+
+    items, total = get_directory_index(directory).page(
+        page,
+        per_page,
+        sort_by,
+        sort_order,
+        show_videos,
+        show_audio,
+        hide_dot_folders,
+    )
+
+    # Get parent directory
+    parent_directory = os.path.dirname(directory)
+    if parent_directory == directory:
+        parent_directory = None
+
+    return {
+        "items": items,
+        "total_pages": (total + per_page - 1) // per_page,
+        "current_page": page,
+        "current_directory": directory,
+        "parent_directory": parent_directory,
+    }
+
+
 # Setup API routes
 try:
     import server
     from aiohttp import web
     import urllib.parse
-    import io
-    from PIL import Image
-    from .logic import scan_directory
+    from .executor import (
+        POOLS,
+        ClientDisconnectedError,
+        ExecutorBusyError,
+        get_route_executor,
+        get_route_metrics,
+    )
+    from .logic import list_subdirectories, search_files
+    from .metadata import get_metadata_cache
+    from .thumbnails import THUMBNAIL_SIZE, get_thumbnail_cache
 
     prompt_server = server.PromptServer.instance
 
+    async def run_blocking(request, endpoint: str, func, *args, pool: str = "io"):
+        """Run blocking route work in a bounded executor, off the event loop."""
+
+        def is_disconnected() -> bool:
+            transport = request.transport
+            return transport is None or transport.is_closing()
+
+        return await get_route_executor(pool).run(
+            endpoint, func, *args, is_disconnected=is_disconnected
+        )
+
+    def failure_status(error: Exception) -> int:
+        """HTTP status for an error raised by run_blocking."""
+        if isinstance(error, ExecutorBusyError):
+            return 503
+        if isinstance(error, TimeoutError):
+            return 504
+        if isinstance(error, ClientDisconnectedError):
+            return 499
+        return 500
+
     @prompt_server.routes.post("/kiko_local_image_loader/set_node_selection")
     async def set_node_selection(request):
         """API endpoint to set node selection."""
@@ -138,13 +268,7 @@ try:
                     {"status": "error", "message": "Missing required data."}, status=400
                 )
 
-            selections = load_selections()
-            if node_id not in selections:
-                selections[node_id] = {}
-
-            selections[node_id][media_type] = {"path": path}
-            save_selections(selections)
-
+            set_selection(node_id, media_type, path)
             return web.json_response({"status": "ok"})
         except Exception as e:
             return web.json_response({"status": "error", "message": str(e)}, status=500)
@@ -152,8 +276,8 @@ try:
     @prompt_server.routes.get("/kiko_local_image_loader/get_saved_paths")
     async def get_saved_paths(request):
         """API endpoint to get saved directory paths."""
-        config = load_config()
-        return web.json_response({"saved_paths": config.get("saved_paths", [])})
+        saved_paths = get_config_store().get("saved_paths", [])
+        return web.json_response({"saved_paths": saved_paths})
 
     @prompt_server.routes.post("/kiko_local_image_loader/save_paths")
     async def save_paths(request):
@@ -161,9 +285,7 @@ try:
         try:
             data = await request.json()
             paths = data.get("paths", [])
-            config = load_config()
-            config["saved_paths"] = paths
-            save_config(config)
+            set_saved_paths(paths)
             return web.json_response({"status": "ok"})
         except Exception as e:
             return web.json_response({"status": "error", "message": str(e)}, status=500)
@@ -172,18 +294,6 @@ try:
     async def get_local_images(request):
         """API endpoint to get images from a directory."""
         directory = request.query.get("directory", "")
-
-        if not directory or not os.path.isdir(directory):
-            return web.json_response({"error": "Directory not found."}, status=404)
-
-        # Normalize path to remove trailing slashes and resolve relative paths
-        directory = os.path.normpath(directory)
-
-        # Save last path
-        config = load_config()
-        config["last_path"] = directory
-        save_config(config)
-
         show_videos = request.query.get("show_videos", "false").lower() == "true"
         show_audio = request.query.get("show_audio", "false").lower() == "true"
         hide_dot_folders = (
@@ -196,41 +306,56 @@ try:
         sort_order = request.query.get("sort_order", "asc")
 
         try:
-            items = scan_directory(
+            result = await run_blocking(
+                request,
+                "images",
+                list_images,
                 directory,
-                show_videos,
-                show_audio,
+                page,
+                per_page,
                 sort_by,
                 sort_order,
+                show_videos,
+                show_audio,
                 hide_dot_folders,
             )
+            return web.json_response(result)
+        except NotADirectoryError:
+            return web.json_response({"error": "Directory not found."}, status=404)
+        except Exception as e:
+            return web.json_response({"error": str(e)}, status=failure_status(e))
 
-            # Get parent directory
-            parent_directory = os.path.dirname(directory)
-            if parent_directory == directory:
-                parent_directory = None
-
-            # Paginate results
-            start = (page - 1) * per_page
-            end = start + per_page
-            paginated_items = items[start:end]
-
-            return web.json_response(
-                {
-                    "items": paginated_items,
-                    "total_pages": (len(items) + per_page - 1) // per_page,
-                    "current_page": page,
-                    "current_directory": directory,
-                    "parent_directory": parent_directory,
-                }
+    @prompt_server.routes.get("/kiko_local_image_loader/search")
+    async def search(request):
+        """API endpoint to search filenames below a directory."""
+        directory = request.query.get("directory", "")
+        query = request.query.get("query", "")
+        show_videos = request.query.get("show_videos", "false").lower() == "true"
+        show_audio = request.query.get("show_audio", "false").lower() == "true"
+        max_results = int(request.query.get("max_results", 100))
+
+        try:
+            results = await run_blocking(
+                request,
+                "search",
+                search_files,
+                directory,
+                query,
+                show_videos,
+                show_audio,
+                max_results,
             )
+            return web.json_response({"items": results})
+        except NotADirectoryError:
+            return web.json_response({"error": "Directory not found."}, status=404)
         except Exception as e:
-            return web.json_response({"error": str(e)}, status=500)
+            return web.json_response({"error": str(e)}, status=failure_status(e))
 
     @prompt_server.routes.get("/kiko_local_image_loader/get_last_path")
     async def get_last_path(request):
         """API endpoint to get last used directory path."""
-        return web.json_response({"last_path": load_config().get("last_path", "")})
+        last_path = get_config_store().get("last_path", "")
+        return web.json_response({"last_path": last_path})
 
     @prompt_server.routes.get("/kiko_local_image_loader/list_directories")
     async def list_directories(request):
@@ -238,77 +363,10 @@ try:
         path = request.query.get("path", "")
 
         try:
-            # Handle empty path - show root or common starting points
-            if not path:
-                # Return filesystem root
-                if os.name == "nt":  # Windows
-                    import string
-
-                    drives = [
-                        f"{d}:\\"
-                        for d in string.ascii_uppercase
-                        if os.path.exists(f"{d}:\\")
-                    ]
-                    return web.json_response({"directories": drives})
-                else:  # Unix/Linux/Mac
-                    return web.json_response({"directories": ["/"]})
-
-            # Normalize the path
-            path = os.path.expanduser(path)  # Handle ~ for home directory
-
-            # If path ends with separator, list contents of that directory
-            if path.endswith(os.sep) or (os.name == "nt" and path.endswith("/")):
-                if os.path.isdir(path):
-                    try:
-                        entries = os.listdir(path)
-                        dirs = []
-                        for entry in entries:
-                            full_path = os.path.join(path, entry)
-                            if os.path.isdir(full_path):
-                                dirs.append(full_path)
-                        dirs.sort(key=lambda x: x.lower())
-                        return web.json_response(
-                            {"directories": dirs[:50]}
-                        )  # Limit results
-                    except PermissionError:
-                        return web.json_response(
-                            {"directories": [], "error": "Permission denied"}
-                        )
-                else:
-                    return web.json_response({"directories": []})
-
-            # Otherwise, find matching directories in parent
-            parent_dir = os.path.dirname(path)
-            basename = os.path.basename(path).lower()
-
-            if not parent_dir:
-                # Handle root level on Unix
-                if path.startswith("/"):
-                    parent_dir = "/"
-                    basename = path[1:].lower()
-                else:
-                    return web.json_response({"directories": []})
-
-            if os.path.isdir(parent_dir):
-                try:
-                    entries = os.listdir(parent_dir)
-                    dirs = []
-                    for entry in entries:
-                        full_path = os.path.join(parent_dir, entry)
-                        if os.path.isdir(full_path) and entry.lower().startswith(
-                            basename
-                        ):
-                            dirs.append(full_path)
-                    dirs.sort(key=lambda x: x.lower())
-                    return web.json_response(
-                        {"directories": dirs[:50]}
-                    )  # Limit results
-                except PermissionError:
-                    return web.json_response(
-                        {"directories": [], "error": "Permission denied"}
-                    )
-
-            return web.json_response({"directories": []})
+            result = await run_blocking(
+                request, "list_directories", list_subdirectories, path
+            )
+            return web.json_response(result)
         except Exception as e:
             return web.json_response({"directories": [], "error": str(e)})
 
@@ -320,28 +378,67 @@ try:
             return web.Response(status=400)
 
         filepath = urllib.parse.unquote(filepath)
-        if not os.path.exists(filepath):
-            return web.Response(status=404)
 
         try:
-            img = Image.open(filepath)
-            has_alpha = img.mode == "RGBA" or (
-                img.mode == "P" and "transparency" in img.info
+            # Decoding and resizing is CPU-bound; it gets its own pool
+            thumbnail = await run_blocking(
+                request,
+                "thumbnail",
+                get_thumbnail_cache().get,
+                filepath,
+                THUMBNAIL_SIZE,
+                dict(request.headers),
+                pool="thumbnail",
             )
-            img = img.convert("RGBA") if has_alpha else img.convert("RGB")
-            img.thumbnail([320, 320], Image.LANCZOS)
+            if thumbnail.data is None:
+                return web.Response(status=304, headers=thumbnail.headers)
 
-            buffer = io.BytesIO()
-            format, content_type = (
-                ("PNG", "image/png") if has_alpha else ("JPEG", "image/jpeg")
+            return web.Response(
+                body=thumbnail.data,
+                content_type=thumbnail.content_type,
+                headers=thumbnail.headers,
             )
-            img.save(buffer, format=format, quality=90 if format == "JPEG" else None)
-            buffer.seek(0)
+        except FileNotFoundError:
+            return web.Response(status=404)
+        except Exception as e:
+            status = failure_status(e)
+            if status == 500:
+                print(f"KikoLocalImageLoader: Error generating thumbnail: {e}")
+            return web.Response(status=status)
+
+    @prompt_server.routes.post("/kiko_local_image_loader/metadata")
+    async def get_metadata(request):
+        """API endpoint to get header metadata for a page of images."""
+        try:
+            data = await request.json()
+            paths = data.get("paths", [])
+            include_workflow = bool(data.get("include_workflow", False))
+        except Exception:
+            return web.json_response({"error": "Invalid request body."}, status=400)
 
-            return web.Response(body=buffer.read(), content_type=content_type)
+        try:
+            results = await run_blocking(
+                request,
+                "metadata",
+                get_metadata_cache().get_many,
+                paths,
+                include_workflow,
+            )
+            return web.json_response({"metadata": results})
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
         except Exception as e:
-            print(f"KikoLocalImageLoader: Error generating thumbnail: {e}")
-            return web.Response(status=500)
+            return web.json_response({"error": str(e)}, status=failure_status(e))
+
+    @prompt_server.routes.get("/kiko_local_image_loader/metrics")
+    async def get_metrics(request):
+        """API endpoint to get per-endpoint latency metrics."""
+        executors = {
+            pool: {"pending": get_route_executor(pool).pending} for pool in POOLS
+        }
+        return web.json_response(
+            {"endpoints": get_route_metrics().snapshot(), "executors": executors}
+        )
 
     @prompt_server.routes.get("/kiko_local_image_loader/view")
     async def view_image(request):
@@ -351,13 +448,16 @@ try:
             return web.Response(status=400)
 
         filepath = urllib.parse.unquote(filepath)
-        if not os.path.exists(filepath):
-            return web.Response(status=404)
 
         try:
+            # FileResponse reads the file in aiohttp's executor; only the
+            # existence check would otherwise run on the event loop
+            await run_blocking(request, "view", check_view_file, filepath)
             return web.FileResponse(filepath)
-        except Exception:
-            return web.Response(status=500)
+        except FileNotFoundError:
+            return web.Response(status=404)
+        except Exception as e:
+            return web.Response(status=failure_status(e))
 
 except ImportError:
     # Server not available during testing
@@ -0,0 +1,399 @@
+"""
+Local Image Loader search index
+Persistent SQLite filename index with trigram substring lookup
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logic import get_media_type
+
+INDEX_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "search_index.sqlite3"
+)
+
+# Bumped whenever the schema changes; older databases are rebuilt
+SCHEMA_VERSION = 1
+
+# A root searched again within this many seconds is not re-walked
+REFRESH_INTERVAL = 10.0
+
+# Directory levels below the search root that are indexed
+DEFAULT_MAX_DEPTH = 32
+
+# The trigram tokenizer can only match queries of at least three characters
+MIN_TRIGRAM_QUERY = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    directory TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    descend INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_directory ON files (directory);
+"""
+
+# External-content FTS table over files.name. It is kept in sync by batch
+# statements after each directory rather than per-row triggers, which are
+# several times slower to build a large index with.
+_TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5 (
+    name, content='files', content_rowid='id', tokenize='trigram'
+);
+"""
+
+# Exact name, then prefix, then any substring; shorter names first
+_RANK = """
+CASE
+    WHEN lower(files.name) = :query THEN 0
+    WHEN substr(lower(files.name), 1, length(:query)) = :query THEN 1
+    ELSE 2
+END, length(files.name), files.name COLLATE NOCASE
+"""
+
+
+def path_range(root: str) -> Tuple[str, str]:
+    """
+    Bounds that select every path below a directory in a sorted index
+
+    Args:
+        root: Directory path
+
+    Returns:
+        Tuple of (exclusive lower bound, exclusive upper bound)
+    """
+    prefix = root if root.endswith(os.sep) else root + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+def list_names(directory: str) -> Dict[str, Tuple[str, int]]:
+    """
+    Read the indexable entries of one directory
+
+    Args:
+        directory: Directory path
+
+    Returns:
+        Dictionary of name to (media type, 1 if the walk descends into it);
+        symlinked directories are listed but not descended into
+    """
+    names = {}
+    try:
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                try:
+                    media_type = get_media_type(entry.name, entry.is_dir())
+                    if media_type is not None:
+                        descend = entry.is_dir(follow_symlinks=False)
+                        names[entry.name] = (media_type, int(descend))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return names
+
+
+class SearchIndex:
+    """
+    Filename index for recursive searches, persisted in SQLite
+
+    Each directory row stores the directory's mtime. Refreshing a root
+    stats every directory below it, but only lists the directories whose
+    mtime changed; unchanged ones are descended using their stored
+    subdirectories. Names are matched through an FTS5 trigram index when
+    SQLite supports it, otherwise by scanning the files table.
+    """
+
+    def __init__(
+        self, index_file: str = INDEX_FILE, max_depth: int = DEFAULT_MAX_DEPTH
+    ):
+        """
+        Open (or create) the index
+
+        Args:
+            index_file: SQLite database path, or ":memory:"
+            max_depth: Directory levels indexed below a search root
+        """
+        self.index_file = index_file
+        self.max_depth = max_depth
+        self._refreshed: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        try:
+            self._connect()
+        except sqlite3.DatabaseError:
+            # Corrupt or unreadable index; it is only a cache, so start over
+            self._discard()
+            self._connect()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(self.index_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.executescript(
+                "DROP TABLE IF EXISTS names; DROP TABLE IF EXISTS files;"
+                "DROP TABLE IF EXISTS directories;"
+            )
+        self._db.executescript(_SCHEMA)
+        try:
+            self._db.executescript(_TRIGRAM_SCHEMA)
+            self.trigram = True
+        except sqlite3.OperationalError:
+            # SQLite older than 3.34 or built without FTS5
+            self.trigram = False
+        self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._db.commit()
+
+    def _discard(self) -> None:
+        """Close the connection and delete the database and its WAL files"""
+        db = getattr(self, "_db", None)
+        if db is not None:
+            db.close()
+        if self.index_file == ":memory:":
+            return
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.index_file + suffix)
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _index_directory(self, directory: str, mtime_ns: int) -> List[str]:
+        """Re-list one directory, apply the difference, return subdirectories"""
+        scanned = list_names(directory)
+        stored = {
+            name: (media_type, descend)
+            for name, media_type, descend in self._db.execute(
+                "SELECT name, type, descend FROM files WHERE directory = ?",
+                (directory,),
+            )
+        }
+        removed = [
+            (os.path.join(directory, name),)
+            for name, value in stored.items()
+            if scanned.get(name) != value
+        ]
+        added = [
+            (os.path.join(directory, name), directory, name, media_type, descend)
+            for name, (media_type, descend) in scanned.items()
+            if stored.get(name) != (media_type, descend)
+        ]
+
+        if removed:
+            if self.trigram:
+                self._db.executemany(
+                    "INSERT INTO names (names, rowid, name)"
+                    " SELECT 'delete', id, name FROM files WHERE path = ?",
+                    removed,
+                )
+            self._db.executemany("DELETE FROM files WHERE path = ?", removed)
+        if added:
+            last_id = self._db.execute("SELECT max(id) FROM files").fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO files (path, directory, name, type, descend)"
+                " VALUES (?, ?, ?, ?, ?)",
+                added,
+            )
+            if self.trigram:
+                self._db.execute(
+                    "INSERT INTO names (rowid, name)"
+                    " SELECT id, name FROM files WHERE id > ?",
+                    (last_id or 0,),
+                )
+        self._db.execute(
+            "INSERT OR REPLACE INTO directories (path, mtime_ns) VALUES (?, ?)",
+            (directory, mtime_ns),
+        )
+        return [
+            os.path.join(directory, name)
+            for name, (_, descend) in scanned.items()
+            if descend
+        ]
+
+    def _stored_subdirectories(self, directory: str) -> List[str]:
+        return [
+            path
+            for (path,) in self._db.execute(
+                "SELECT path FROM files WHERE directory = ? AND descend = 1",
+                (directory,),
+            )
+        ]
+
+    def refresh(self, root: str) -> None:
+        """
+        Bring the index for a directory tree up to date
+
+        Args:
+            root: Directory to index recursively
+        """
+        root = os.path.normpath(root)
+        lower, upper = path_range(root)
+        with self._lock, self._db:
+            known = dict(
+                self._db.execute(
+                    "SELECT path, mtime_ns FROM directories"
+                    " WHERE path = ? OR (path > ? AND path < ?)",
+                    (root, lower, upper),
+                )
+            )
+            seen = set()
+            stack = [(root, 0)]
+            while stack:
+                directory, depth = stack.pop()
+                try:
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(directory)
+
+                if known.get(directory) == mtime_ns:
+                    subdirectories = self._stored_subdirectories(directory)
+                else:
+                    subdirectories = self._index_directory(directory, mtime_ns)
+                if depth < self.max_depth:
+                    stack.extend((path, depth + 1) for path in subdirectories)
+
+            # Directories that are gone (or now beyond max_depth)
+            gone = [(path,) for path in known if path not in seen]
+            if self.trigram:
+                self._db.executemany(
+                    "INSERT INTO names (names, rowid, name)"
+                    " SELECT 'delete', id, name FROM files WHERE directory = ?",
+                    gone,
+                )
+            self._db.executemany("DELETE FROM files WHERE directory = ?", gone)
+            self._db.executemany("DELETE FROM directories WHERE path = ?", gone)
+            self._refreshed[root] = time.monotonic()
+
+    def _needs_refresh(self, root: str) -> bool:
+        refreshed = self._refreshed.get(root)
+        return refreshed is None or time.monotonic() - refreshed >= REFRESH_INTERVAL
+
+    def query(
+        self, root: str, query: str, types: List[str], limit: int
+    ) -> List[Tuple[str, str, str, str]]:
+        """
+        Find indexed entries below root whose names contain query
+
+        Args:
+            root: Directory whose subtree is searched
+            query: Case-insensitive substring
+            types: Media types to include ('dir', 'image', ...)
+            limit: Maximum number of rows
+
+        Returns:
+            Ranked (path, name, directory, type) rows
+        """
+        query = query.lower()
+        lower, upper = path_range(os.path.normpath(root))
+        params = {"query": query, "lower": lower, "upper": upper, "limit": limit}
+        type_params = {f"type{i}": media_type for i, media_type in enumerate(types)}
+        params.update(type_params)
+        filters = (
+            "files.path > :lower AND files.path < :upper AND files.type IN ("
+            + ", ".join(f":{name}" for name in type_params)
+            + ")"
+        )
+
+        if self.trigram and len(query) >= MIN_TRIGRAM_QUERY:
+            params["match"] = '"' + query.replace('"', '""') + '"'
+            sql = (
+                "SELECT files.path, files.name, files.directory, files.type"
+                " FROM names JOIN files ON files.id = names.rowid"
+                f" WHERE names MATCH :match AND {filters}"
+            )
+        else:
+            sql = (
+                "SELECT files.path, files.name, files.directory, files.type"
+                f" FROM files WHERE instr(lower(files.name), :query) > 0 AND {filters}"
+            )
+
+        with self._lock:
+            return self._db.execute(
+                f"{sql} ORDER BY {_RANK} LIMIT :limit", params
+            ).fetchall()
+
+    def search(
+        self,
+        root: str,
+        query: str,
+        show_videos: bool = False,
+        show_audio: bool = False,
+        max_results: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranked recursive filename search, refreshing the index when stale
+
+        Args:
+            root: Directory whose subtree is searched
+            query: Case-insensitive substring
+            show_videos: Include video files
+            show_audio: Include audio files
+            max_results: Maximum number of results
+
+        Returns:
+            List of file information dictionaries, best match first
+        """
+        root = os.path.normpath(root)
+        if self._needs_refresh(root):
+            self.refresh(root)
+
+        types = ["dir", "image"]
+        if show_videos:
+            types.append("video")
+        if show_audio:
+            types.append("audio")
+
+        results = []
+        for path, name, directory, media_type in self.query(
+            root, query, types, max_results
+        ):
+            # Stat results so sizes and dates are current even for files
+            # rewritten in place, which does not change the directory mtime
+            try:
+                stats = os.stat(path)
+            except OSError:
+                continue
+            results.append(
+                {
+                    "path": path,
+                    "name": name,
+                    "directory": directory,
+                    "mtime": stats.st_mtime,
+                    "size": stats.st_size,
+                    "type": media_type,
+                }
+            )
+        return results
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """
+    Get the shared search index, opening it on first use
+
+    Returns:
+        Process-wide SearchIndex instance
+    """
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex()
+        return _search_index
@@ -0,0 +1,217 @@
+"""
+Local Image Loader settings store
+In-memory JSON documents persisted with debounced, atomic writes
+"""
+
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Changes are written at most this many seconds after the first one; any
+# further changes in that window are coalesced into the same write
+WRITE_DEBOUNCE = 0.5
+
+
+class JsonStore:
+    """
+    JSON object file held in memory
+
+    Reads never touch the disk after the first load. Every change is applied
+    under a lock to the in-memory document, so concurrent requests (several
+    browser tabs) each modify their own keys instead of overwriting each
+    other's read-modify-write of the whole file. Changes are written by a
+    timer thread, coalesced, to a temporary file that then replaces the
+    original, so the file is never seen half-written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        debounce: float = WRITE_DEBOUNCE,
+        name: str = "settings",
+        **json_options,
+    ):
+        """
+        Initialize the store (the file is read on first access)
+
+        Args:
+            path: JSON file path
+            debounce: Seconds between the first change and the write
+            name: Description used in error messages
+            **json_options: Options for json.dump, e.g. indent
+        """
+        self.path = path
+        self.debounce = debounce
+        self.name = name
+        self.json_options = json_options
+        self.writes = 0
+        self._data: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        # Serializes writes, so an older document never replaces a newer one
+        self._write_lock = threading.Lock()
+
+    def _document(self) -> Dict[str, Any]:
+        """The in-memory document, loaded from disk on first use"""
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._data = data if isinstance(data, dict) else {}
+            except (json.JSONDecodeError, IOError):
+                self._data = {}
+        return self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Read one top-level value
+
+        Args:
+            key: Top-level key
+            default: Returned when the key is missing
+
+        Returns:
+            Copy of the stored value
+        """
+        with self._lock:
+            return copy.deepcopy(self._document().get(key, default))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Read the whole document
+
+        Returns:
+            Deep copy of the document
+        """
+        with self._lock:
+            return copy.deepcopy(self._document())
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Set one top-level value, scheduling a write if it changed
+
+        Args:
+            key: Top-level key
+            value: JSON-serializable value
+        """
+        with self._lock:
+            document = self._document()
+            if key in document and document[key] == value:
+                return
+            document[key] = copy.deepcopy(value)
+            self._schedule()
+
+    def update(self, mutate: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Change the document atomically, scheduling a write if it changed
+
+        Args:
+            mutate: Function that modifies the document in place; it runs
+                under the store lock, so it must not block
+        """
+        with self._lock:
+            document = self._document()
+            before = copy.deepcopy(document)
+            mutate(document)
+            if document != before:
+                self._schedule()
+
+    def replace(self, data: Dict[str, Any]) -> None:
+        """
+        Replace the whole document, scheduling a write if it changed
+
+        Args:
+            data: New document
+        """
+        with self._lock:
+            if self._document() != data:
+                self._data = copy.deepcopy(data)
+                self._schedule()
+
+    def _schedule(self) -> None:
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """
+        Write pending changes now
+
+        The document is serialized under the store lock, but written
+        outside it, so readers never wait for the disk.
+
+        Returns:
+            True if a write happened
+        """
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return False
+                text = json.dumps(self._data, **self.json_options)
+                self._dirty = False
+
+            try:
+                self._write(text)
+            except Exception as e:
+                # Stay dirty so the next change or flush retries the write
+                print(f"KikoLocalImageLoader: Error saving {self.name}: {e}")
+                with self._lock:
+                    self._dirty = True
+                return False
+
+            self.writes += 1
+            return True
+
+    def _write(self, text: str) -> None:
+        """Write text to a temporary file and move it over the store file"""
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path)),
+            prefix=f".{os.path.basename(self.path)}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+_stores: Dict[str, JsonStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str, name: str = "settings", **json_options) -> JsonStore:
+    """
+    Get the shared store for a JSON file, creating it on first use
+
+    Pending changes of shared stores are flushed at interpreter exit.
+
+    Args:
+        path: JSON file path
+        name: Description used in error messages
+        **json_options: Options for json.dump, used on creation
+
+    Returns:
+        Process-wide JsonStore for the file
+    """
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            store = JsonStore(path, name=name, **json_options)
+            atexit.register(store.flush)
+            _stores[path] = store
+        return _stores[path]
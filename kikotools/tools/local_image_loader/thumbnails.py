@@ -0,0 +1,435 @@
+"""
+Local Image Loader thumbnail cache
+Content-addressed thumbnails held in a memory LRU backed by an on-disk store
+"""
+
+import hashlib
+import io
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+
+from PIL import ExifTags, Image
+
+THUMBNAIL_SIZE = 320
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnail_cache")
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+
+# Images are decoded/reduced cheaply down to this multiple of the thumbnail
+# size; the final LANCZOS pass then removes the aliasing of the reduction
+REDUCING_GAP = 2.0
+
+# Modes Image.reduce() handles directly; others are converted first
+_REDUCIBLE_MODES = ("RGB", "RGBA", "L", "LA")
+
+# EXIF thumbnail tags in IFD1: offset and length of the embedded JPEG
+_EXIF_THUMBNAIL_OFFSET = 0x0201
+_EXIF_THUMBNAIL_LENGTH = 0x0202
+
+# Embedded thumbnails whose aspect ratio differs more than this from the
+# image are letterboxed and not used
+EXIF_ASPECT_TOLERANCE = 0.02
+
+# Stored thumbnails are named <key><extension>
+CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png"}
+
+
+@dataclass
+class Thumbnail:
+    """Encoded thumbnail plus the validators used for HTTP caching"""
+
+    data: Optional[bytes]
+    content_type: str
+    etag: str
+    last_modified: float
+
+    @property
+    def headers(self) -> dict:
+        """ETag, Last-Modified and Cache-Control response headers"""
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            # Always revalidate: the URL names a path whose content may change
+            "Cache-Control": "no-cache",
+        }
+
+
+def thumbnail_key(path: str, stats: os.stat_result, size: int) -> str:
+    """
+    Build the cache key for a source file state and thumbnail size
+
+    Args:
+        path: Source image path
+        stats: os.stat() result for path
+        size: Thumbnail bounding box edge in pixels
+
+    Returns:
+        Hex digest identifying the thumbnail content
+    """
+    identity = f"{os.path.abspath(path)}\0{stats.st_mtime_ns}\0{stats.st_size}\0{size}"
+    return hashlib.blake2b(identity.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def thumbnail_dimensions(width: int, height: int, size: int) -> Tuple[int, int]:
+    """
+    Size of an image scaled to fit a square bounding box (never upscaled)
+
+    Args:
+        width: Image width
+        height: Image height
+        size: Bounding box edge in pixels
+
+    Returns:
+        Tuple of (width, height)
+    """
+    scale = min(size / width, size / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def exif_thumbnail(img: Image.Image, target: Tuple[int, int]) -> Optional[Image.Image]:
+    """
+    Decode the thumbnail embedded in an image's EXIF data, if it is usable
+
+    Camera thumbnails are often small or letterboxed, so one is only used
+    when it covers the target size and has the image's aspect ratio.
+
+    Args:
+        img: Opened (not yet decoded) image
+        target: Required (width, height)
+
+    Returns:
+        Decoded embedded thumbnail, or None
+    """
+    exif_data = img.info.get("exif")
+    if not exif_data:
+        return None
+
+    # Malformed EXIF is common; any failure falls back to decoding the image
+    try:
+        ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset = ifd1.get(_EXIF_THUMBNAIL_OFFSET)
+        length = ifd1.get(_EXIF_THUMBNAIL_LENGTH)
+        if not offset or not length:
+            return None
+
+        # Offsets are relative to the TIFF header after the APP1 prefix
+        start = offset + (6 if exif_data.startswith(b"Exif\x00\x00") else 0)
+        embedded = Image.open(io.BytesIO(exif_data[start : start + length]))
+        embedded.load()
+    except Exception:
+        return None
+
+    if embedded.width < target[0] or embedded.height < target[1]:
+        return None
+    aspect = img.width / img.height
+    if abs(embedded.width / embedded.height - aspect) > EXIF_ASPECT_TOLERANCE * aspect:
+        return None
+    return embedded
+
+
+def decode_reduced(img: Image.Image, target: Tuple[int, int], mode: str) -> Image.Image:
+    """
+    Decode an image at the lowest resolution that still resamples cleanly
+
+    JPEGs are decoded with DCT scaling (1/2, 1/4 or 1/8 size), so the full
+    resolution image is never materialized. Other formats (PNG, WebP, ...)
+    cannot be decoded at reduced size; they are box-reduced by an integer
+    factor straight after decoding, before any mode conversion or filtering.
+
+    Args:
+        img: Opened (not yet decoded) image
+        target: Final thumbnail (width, height)
+        mode: Final thumbnail mode, used for modes reduce() cannot handle
+
+    Returns:
+        Decoded image of at least REDUCING_GAP times the target size
+    """
+    reduced_size = (
+        math.ceil(target[0] * REDUCING_GAP),
+        math.ceil(target[1] * REDUCING_GAP),
+    )
+    # No-op for formats without reduced-size decoding
+    img.draft(None, reduced_size)
+    img.load()
+
+    if img.mode not in _REDUCIBLE_MODES:
+        img = img.convert(mode)
+
+    factor = int(min(img.width / reduced_size[0], img.height / reduced_size[1]))
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
+
+
+def render_thumbnail(path: str, size: int = THUMBNAIL_SIZE) -> Tuple[bytes, str]:
+    """
+    Decode an image and encode a thumbnail of it
+
+    Uses the embedded EXIF thumbnail when one is large enough, otherwise a
+    reduced-resolution decode. Images with transparency become PNG,
+    everything else JPEG.
+
+    Args:
+        path: Source image path
+        size: Thumbnail bounding box edge in pixels
+
+    Returns:
+        Tuple of (encoded bytes, file extension)
+    """
+    with Image.open(path) as img:
+        has_alpha = img.mode == "RGBA" or (
+            img.mode == "P" and "transparency" in img.info
+        )
+        mode = "RGBA" if has_alpha else "RGB"
+        target = thumbnail_dimensions(img.width, img.height, size)
+
+        thumb = None if has_alpha else exif_thumbnail(img, target)
+        if thumb is None:
+            thumb = decode_reduced(img, target, mode)
+
+        if thumb.mode != mode:
+            thumb = thumb.convert(mode)
+        if thumb.size != target:
+            thumb = thumb.resize(target, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if has_alpha:
+            thumb.save(buffer, format="PNG")
+            return buffer.getvalue(), ".png"
+        thumb.save(buffer, format="JPEG", quality=90)
+        return buffer.getvalue(), ".jpg"
+
+
+def is_not_modified(thumbnail: Thumbnail, request_headers: Mapping[str, str]) -> bool:
+    """
+    Check a request's conditional headers against a thumbnail
+
+    If-None-Match takes precedence over If-Modified-Since.
+
+    Args:
+        thumbnail: Thumbnail (data may be None)
+        request_headers: Incoming request headers
+
+    Returns:
+        True if the client's copy is current and a 304 can be sent
+    """
+    if_none_match = request_headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or thumbnail.etag in tags
+
+    if_modified_since = request_headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(thumbnail.last_modified) <= since
+    return False
+
+
+class ThumbnailCache:
+    """
+    Two-level thumbnail cache: memory LRU in front of a directory of files
+
+    Entries are addressed by thumbnail_key(), so a modified source file gets
+    a new key and stale thumbnails are never served; they simply age out.
+    Both levels are bounded by bytes and evict least recently used first.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = CACHE_DIR,
+        max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory for the on-disk store (created on first write)
+            max_memory_bytes: Budget for thumbnails held in memory
+            max_disk_bytes: Budget for thumbnails stored on disk
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory)
+
+    def _remember(self, key: str, data: bytes, extension: str) -> None:
+        """Insert into the memory LRU, evicting beyond the byte budget"""
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous[0])
+            self._memory[key] = (data, extension)
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (evicted, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _recall(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Look up the memory LRU, marking the entry as recently used"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _disk_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + extension)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Read a stored thumbnail, refreshing its mtime for LRU pruning"""
+        for extension in CONTENT_TYPES:
+            path = self._disk_path(key, extension)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return data, extension
+        return None
+
+    def _write_disk(self, key: str, data: bytes, extension: str) -> None:
+        """Store a thumbnail atomically, then prune the store if over budget"""
+        path = self._disk_path(key, extension)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            # The on-disk store is an optimization; serve from memory only
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += len(data)
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self.prune_disk()
+
+    def _scan_disk(self):
+        """Yield (path, size, mtime) for every stored thumbnail"""
+        try:
+            buckets = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+        for bucket in buckets:
+            if not bucket.is_dir():
+                continue
+            try:
+                for entry in os.scandir(bucket.path):
+                    stats = entry.stat()
+                    yield entry.path, stats.st_size, stats.st_mtime
+            except OSError:
+                continue
+
+    def prune_disk(self) -> None:
+        """Delete least recently used stored thumbnails down to 90% of budget"""
+        entries = sorted(self._scan_disk(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.9
+
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+        with self._lock:
+            self._disk_bytes = total
+
+    def get(
+        self,
+        path: str,
+        size: int = THUMBNAIL_SIZE,
+        request_headers: Optional[Mapping[str, str]] = None,
+    ) -> Thumbnail:
+        """
+        Get the thumbnail for a file, generating and storing it on a miss
+
+        Args:
+            path: Source image path
+            size: Thumbnail bounding box edge in pixels
+            request_headers: Conditional request headers; when the client's
+                copy is current the thumbnail is returned with data None and
+                nothing is read or generated
+
+        Returns:
+            Thumbnail for the current state of the file
+
+        Raises:
+            OSError: If the source cannot be read
+            PIL.UnidentifiedImageError: If the source is not an image
+        """
+        stats = os.stat(path)
+        key = thumbnail_key(path, stats, size)
+        etag = f'"{key}"'
+
+        validators = Thumbnail(None, "", etag, stats.st_mtime)
+        if request_headers and is_not_modified(validators, request_headers):
+            return validators
+
+        entry = self._recall(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is None:
+                entry = render_thumbnail(path, size)
+                self._write_disk(key, *entry)
+            self._remember(key, *entry)
+
+        data, extension = entry
+        return Thumbnail(data, CONTENT_TYPES[extension], etag, stats.st_mtime)
+
+    def clear(self) -> None:
+        """Drop the in-memory thumbnails (the disk store is kept)"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """
+    Get the shared thumbnail cache, creating it on first use
+
+    Returns:
+        Process-wide ThumbnailCache instance
+    """
+    global _thumbnail_cache
+    with _thumbnail_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache()
+        return _thumbnail_cache
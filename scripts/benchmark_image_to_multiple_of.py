@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+ImageToMultipleOf strategy benchmark
+Compares crop, rescale and pad strategies on latency and peak memory
+
+Each case runs in a fresh subprocess so its peak memory is measured in
+isolation: peak RSS growth on CPU, peak allocated memory on CUDA. Output
+is consumed (summed) after each run, as a downstream node would, so lazy
+views are charged for the work they defer.
+
+    python scripts/benchmark_image_to_multiple_of.py
+    python scripts/benchmark_image_to_multiple_of.py --size 2050 --batch 16 --device cuda
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows: CPU peak memory is not reported
+    resource = None  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch  # noqa: E402
+
+from kikotools.tools.image_to_multiple_of.logic import (  # noqa: E402
+    process_image_to_multiple_of,
+)
+
+# (label, method, keyword arguments)
+STRATEGIES = [
+    ("center crop (view)", "center crop", {}),
+    ("center crop (contiguous)", "center crop", {"contiguity": "contiguous"}),
+    ("rescale (bilinear)", "rescale", {"antialias": False}),
+    ("rescale (antialias)", "rescale", {"antialias": True}),
+    (
+        "rescale (antialias, 256MB chunks)",
+        "rescale",
+        {"antialias": True, "max_memory_mb": 256},
+    ),
+    ("pad reflect", "pad reflect", {}),
+    ("pad constant", "pad constant", {}),
+]
+
+
+# Seconds between checks on a running case, and the default limit per case
+RESULT_POLL_INTERVAL = 1.0
+DEFAULT_TIMEOUT = 600.0
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+def run_strategy(index: int, args: Dict[str, Any], results) -> None:
+    """Benchmark one strategy; runs in its own process"""
+    label, method, kwargs = STRATEGIES[index]
+    device = torch.device(args["device"])
+    image = torch.rand(args["batch"], args["size"], args["size"] + 37, 3, device=device)
+
+    def run() -> float:
+        result = process_image_to_multiple_of(
+            image, args["multiple_of"], method, **kwargs
+        )
+        # Touch the output the way a downstream node would
+        return float(result.sum())
+
+    # Peak memory is taken over the first run, before the allocator has
+    # cached blocks from earlier runs
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+        baseline = torch.cuda.memory_allocated()
+    else:
+        baseline = peak_rss_mb()
+
+    run()
+    if device.type == "cuda":
+        peak_mb = (torch.cuda.max_memory_allocated() - baseline) / (1024 * 1024)
+    elif baseline is not None:
+        peak_mb = peak_rss_mb() - baseline
+    else:
+        peak_mb = None
+
+    best = None
+    for _ in range(args["repeat"]):
+        start = time.perf_counter()
+        run()
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    results.put(
+        {
+            "strategy": label,
+            "ms": round(best * 1000, 2),
+            "peak_extra_mb": None if peak_mb is None else round(peak_mb, 1),
+        }
+    )
+
+
+def collect_result(process, results, label: str, timeout: float) -> Dict[str, Any]:
+    """
+    Wait for a case's result without hanging on a crashed or stuck child
+
+    Args:
+        process: The case's process
+        results: Queue the case puts its result on
+        label: Strategy label, used for failure rows
+        timeout: Seconds to wait before the case is terminated
+
+    Returns:
+        Result row; failed cases have ms None and an "error" message
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return results.get(timeout=RESULT_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+
+        if not process.is_alive():
+            # The result may have been queued just before the process exited
+            try:
+                return results.get(timeout=RESULT_POLL_INTERVAL)
+            except queue.Empty:
+                error = f"exited with code {process.exitcode}"
+                break
+        if time.monotonic() >= deadline:
+            process.terminate()
+            error = f"timed out after {timeout:g}s"
+            break
+
+    return {"strategy": label, "ms": None, "peak_extra_mb": None, "error": error}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--size", type=int, default=1050, help="Image height")
+    parser.add_argument("--batch", type=int, default=8, help="Batch size")
+    parser.add_argument("--multiple-of", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument(
+        "--device", default="cuda" if torch.cuda.is_available() else "cpu"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds allowed per case before it is reported as failed",
+    )
+    parser.add_argument("--output", help="Optional JSON results path")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run every strategy and print a comparison table"""
+    args = parse_args(argv)
+    settings = vars(args)
+    context = multiprocessing.get_context("spawn")
+
+    print(
+        f"{args.batch} x {args.size}x{args.size + 37} RGB on {args.device}, "
+        f"multiple of {args.multiple_of}"
+    )
+    print(f"  {'strategy':36s} {'latency':>10s} {'peak extra':>12s}")
+
+    rows = []
+    for index in range(len(STRATEGIES)):
+        results = context.Queue()
+        process = context.Process(target=run_strategy, args=(index, settings, results))
+        process.start()
+        row = collect_result(process, results, STRATEGIES[index][0], args.timeout)
+        process.join()
+        rows.append(row)
+
+        if row["ms"] is None:
+            print(f"  {row['strategy']:36s} failed: {row['error']}")
+            continue
+        peak = row["peak_extra_mb"]
+        peak_text = "n/a" if peak is None else f"{peak:.1f} MB"
+        print(f"  {row['strategy']:36s} {row['ms']:8.2f}ms {peak_text:>12s}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": settings, "results": rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 1 if any(row["ms"] is None for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
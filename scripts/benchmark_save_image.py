@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+"""
+KikoSaveImage save-path benchmark
+Runs kiko_save_image.logic over synthetic tensors without ComfyUI
+
+Measures, per (format, setting, size, batch) case:
+- images/sec and MB/s (uncompressed input bytes)
+- peak RSS of the case (each case runs in a fresh subprocess)
+- per-stage timings: convert / metadata / encode / fsync
+- end-to-end process_image_batch() time
+
+Results are written as JSON so runs from different versions can be compared:
+
+    python scripts/benchmark_save_image.py --output before.json
+    python scripts/benchmark_save_image.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import re
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+try:
+    import resource
+except ImportError:
+    # Windows: peak RSS is not reported
+    resource = None  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PIL  # noqa: E402
+import torch  # noqa: E402
+
+from kikotools.tools.kiko_save_image import logic  # noqa: E402
+from kikotools.tools.kiko_save_image.encoders import (  # noqa: E402
+    get_available_formats,
+    get_encoder,
+)
+
+QUICK_SIZES = [512, 1024]
+QUICK_BATCH_SIZES = [1, 4]
+FULL_SIZES = [512, 1024, 2048, 4096]
+FULL_BATCH_SIZES = [1, 4, 16, 32]
+
+PNG_LEVELS = [0, 1, 4, 6, 9]
+QUALITIES = [75, 90, 100]
+
+# Approximate size of a real ComfyUI workflow embedded in PNGs
+WORKFLOW_BYTES = 500 * 1024
+
+# Seconds between checks on a running case, and the default limit per case
+RESULT_POLL_INTERVAL = 1.0
+DEFAULT_TIMEOUT = 1800.0
+
+
+def get_version() -> str:
+    """Read the package version from pyproject.toml"""
+    pyproject = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pyproject.toml"
+    )
+    try:
+        with open(pyproject) as f:
+            match = re.search(r'version\s*=\s*["\']([^"\']+)["\']', f.read())
+            if match:
+                return match.group(1)
+    except OSError:
+        pass
+    return "unknown"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process in MB (None if unavailable)
+
+    This is a lifetime maximum, so it describes one case only when the case
+    runs in a process of its own.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def make_images(batch: int, size: int, channels: int = 3) -> torch.Tensor:
+    """Create a smooth gradient batch with mild noise, like a decoded render"""
+    ramp = torch.linspace(0, 1, size)
+    base = (ramp[None, :, None] + ramp[:, None, None]) / 2
+    base = base.expand(size, size, channels)
+    noise = torch.rand(batch, size, size, channels) * 0.05
+    return (base.unsqueeze(0) * 0.95 + noise).clamp(0, 1)
+
+
+def make_metadata() -> Dict[str, Any]:
+    """Create prompt/workflow dicts roughly the size of a real graph"""
+    nodes = []
+    while len(json.dumps(nodes)) < WORKFLOW_BYTES:
+        index = len(nodes)
+        nodes.append(
+            {
+                "id": index,
+                "type": "KSampler",
+                "pos": [index * 10, index * 5],
+                "widgets_values": [index, "euler", "normal", 20, 7.5, 1.0],
+                "inputs": [{"name": "model", "link": index}],
+            }
+        )
+    prompt = {str(n["id"]): {"class_type": n["type"]} for n in nodes[:200]}
+    return {"prompt": prompt, "extra_pnginfo": {"workflow": {"nodes": nodes}}}
+
+
+def build_cases(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Expand the format/setting matrix"""
+    cases = []
+    for format_type in args.formats:
+        if format_type == "PNG":
+            settings = [{"png_compress_level": level} for level in args.png_levels]
+        elif format_type in logic.LOSSY_FORMATS:
+            settings = [{"quality": quality} for quality in args.qualities]
+            if format_type in logic.LOSSLESS_CAPABLE_FORMATS:
+                settings.append({"webp_lossless": True})
+        else:
+            settings = [{}]
+
+        for setting in settings:
+            for size in args.sizes:
+                for batch in args.batch_sizes:
+                    cases.append(
+                        {
+                            "format": format_type,
+                            "settings": setting,
+                            "size": size,
+                            "batch": batch,
+                        }
+                    )
+    return cases
+
+
+def run_stages(
+    images: torch.Tensor, case: Dict[str, Any], metadata: Dict, out_dir: str
+) -> Dict[str, float]:
+    """Run the save pipeline stage by stage and time each stage"""
+    settings = case["settings"]
+    encoder = get_encoder(case["format"])
+    timings = {"convert": 0.0, "metadata": 0.0, "encode": 0.0, "fsync": 0.0}
+
+    start = time.perf_counter()
+    arrays = logic.quantize_batch_to_uint8(images)
+    pil_images = [logic.uint8_to_pil(array) for array in arrays]
+    timings["convert"] = time.perf_counter() - start
+
+    png_info = None
+    if encoder.extension == ".png":
+        # Fresh dict copies so the per-execution cache is measured cold
+        start = time.perf_counter()
+        png_info, _ = logic.get_png_metadata(
+            dict(metadata["prompt"]), dict(metadata["extra_pnginfo"])
+        )
+        timings["metadata"] = time.perf_counter() - start
+
+    for index, img in enumerate(pil_images):
+        path = os.path.join(out_dir, f"stage_{index:05d}{encoder.extension}")
+
+        start = time.perf_counter()
+        encoder.encode(
+            img,
+            path,
+            quality=settings.get("quality", 90),
+            png_compress_level=settings.get("png_compress_level", 4),
+            lossless=settings.get("webp_lossless", False),
+            metadata=png_info,
+        )
+        timings["encode"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        timings["fsync"] += time.perf_counter() - start
+
+    return timings
+
+
+def run_case(
+    case: Dict[str, Any], metadata: Dict, repeat: int, work_dir: str
+) -> Dict[str, Any]:
+    """Benchmark one case, returning the best of `repeat` runs"""
+    images = make_images(case["batch"], case["size"])
+    raw_mb = images.numel() / (1024 * 1024)  # uint8 bytes after quantization
+
+    best_total = None
+    best_stages = None
+    output_bytes = 0
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(dir=work_dir) as out_dir:
+            stages = run_stages(images, case, metadata, out_dir)
+
+            with patch.object(logic, "folder_paths") as folder_paths:
+                folder_paths.get_output_directory.return_value = out_dir
+                start = time.perf_counter()
+                logic.process_image_batch(
+                    images=images,
+                    filename_prefix="bench",
+                    format_type=case["format"],
+                    prompt=dict(metadata["prompt"]),
+                    extra_pnginfo=dict(metadata["extra_pnginfo"]),
+                    **case["settings"],
+                )
+                total = time.perf_counter() - start
+
+            output_bytes = sum(
+                entry.stat().st_size
+                for entry in os.scandir(out_dir)
+                if entry.name.startswith("bench_")
+            )
+
+        if best_total is None or total < best_total:
+            best_total = total
+            best_stages = stages
+
+    return {
+        **case,
+        "seconds": round(best_total, 4),
+        "images_per_sec": round(case["batch"] / best_total, 3),
+        "mb_per_sec": round(raw_mb / best_total, 2),
+        "output_mb": round(output_bytes / (1024 * 1024), 3),
+        "compression_ratio": round(raw_mb * 1024 * 1024 / output_bytes, 2),
+        "stages": {name: round(value, 4) for name, value in best_stages.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_case_process(
+    case: Dict[str, Any], metadata: Dict, repeat: int, work_dir: str, results
+) -> None:
+    """Benchmark one case; runs in its own process"""
+    results.put(run_case(case, metadata, repeat, work_dir))
+
+
+def collect_result(process, results, timeout: float) -> Dict[str, Any]:
+    """
+    Wait for a case's result without hanging on a crashed or stuck child
+
+    Args:
+        process: The case's process
+        results: Queue the case puts its result on
+        timeout: Seconds to wait before the case is terminated
+
+    Returns:
+        Result dict, or {"error": message} if the case failed
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return results.get(timeout=RESULT_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+
+        if not process.is_alive():
+            # The result may have been queued just before the process exited
+            try:
+                return results.get(timeout=RESULT_POLL_INTERVAL)
+            except queue.Empty:
+                return {"error": f"exited with code {process.exitcode}"}
+        if time.monotonic() >= deadline:
+            process.terminate()
+            return {"error": f"timed out after {timeout:g}s"}
+
+
+def case_key(result: Dict[str, Any]) -> str:
+    """Stable identifier for matching cases across result files"""
+    settings = ",".join(f"{k}={v}" for k, v in sorted(result["settings"].items()))
+    return f"{result['format']}[{settings}] {result['size']}px x{result['batch']}"
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float):
+    """Print throughput changes against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = {case_key(r): r for r in json.load(f)["results"]}
+
+    print(f"\nComparison against {baseline_path} (threshold {threshold:.0%}):")
+    regressions = 0
+    for result in results:
+        previous = baseline.get(case_key(result))
+        if not previous or "error" in result or "error" in previous:
+            continue
+        change = result["images_per_sec"] / previous["images_per_sec"] - 1
+        marker = ""
+        if change < -threshold:
+            marker = "  <-- regression"
+            regressions += 1
+        print(f"  {case_key(result):45s} {change:+7.1%}{marker}")
+
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Full matrix: 512-4096px and batch sizes 1-32 (slow, needs RAM)",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", help="Square image sizes")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", help="Batch sizes")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=get_available_formats(),
+        help="Formats to benchmark (default: all available encoders)",
+    )
+    parser.add_argument("--png-levels", type=int, nargs="+", default=PNG_LEVELS)
+    parser.add_argument("--qualities", type=int, nargs="+", default=QUALITIES)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case")
+    parser.add_argument(
+        "--output", default="save_benchmark.json", help="JSON results path"
+    )
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as a regression (default: 0.1)",
+    )
+    parser.add_argument(
+        "--work-dir", default=None, help="Directory for temporary output files"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds allowed per case before it is reported as failed",
+    )
+
+    args = parser.parse_args(argv)
+    if args.sizes is None:
+        args.sizes = FULL_SIZES if args.full else QUICK_SIZES
+    if args.batch_sizes is None:
+        args.batch_sizes = FULL_BATCH_SIZES if args.full else QUICK_BATCH_SIZES
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark and write results"""
+    args = parse_args(argv)
+    metadata = make_metadata()
+    cases = build_cases(args)
+
+    context = multiprocessing.get_context("spawn")
+
+    print(f"Running {len(cases)} save benchmark cases...")
+    results = []
+    for index, case in enumerate(cases, start=1):
+        # A fresh process per case, so its peak RSS is not an earlier case's
+        queued = context.Queue()
+        process = context.Process(
+            target=run_case_process,
+            args=(case, metadata, args.repeat, args.work_dir, queued),
+        )
+        process.start()
+        result = {**case, **collect_result(process, queued, args.timeout)}
+        process.join()
+        results.append(result)
+
+        if "error" in result:
+            print(
+                f"[{index}/{len(cases)}] {case_key(result):45s} "
+                f"failed: {result['error']}"
+            )
+            continue
+        stages = result["stages"]
+        print(
+            f"[{index}/{len(cases)}] {case_key(result):45s} "
+            f"{result['images_per_sec']:8.2f} img/s {result['mb_per_sec']:8.1f} MB/s "
+            f"(convert {stages['convert']:.3f}s, metadata {stages['metadata']:.3f}s, "
+            f"encode {stages['encode']:.3f}s, fsync {stages['fsync']:.3f}s, "
+            f"peak RSS {result['peak_rss_mb']} MB)"
+        )
+
+    report = {
+        "version": get_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "torch": torch.__version__,
+            "pillow": PIL.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    failed = any("error" in result for result in results)
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
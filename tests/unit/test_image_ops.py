@@ -0,0 +1,150 @@
+"""
+Unit tests for the shared image-op runtime
+Tests channels-last views, precision selection and error bounds
+"""
+
+import pytest
+import torch
+import torch.nn.functional as F
+
+from kikotools.core.image_ops import (
+    ImageOps,
+    batch_chunk_size,
+    integer_factor,
+    resize_image,
+    resolve_compute_dtype,
+    to_bhwc,
+    to_nchw,
+)
+
+
+def reference_resize(image, height, width, antialias=False):
+    """Float32 permute/interpolate/permute path the runtime replaces"""
+    return F.interpolate(
+        image.permute(0, 3, 1, 2),
+        size=(height, width),
+        mode="bilinear",
+        align_corners=False,
+        antialias=antialias,
+    ).permute(0, 2, 3, 1)
+
+
+class TestLayout:
+    """Test BHWC <-> channels-last NCHW conversion"""
+
+    def test_to_nchw_is_a_view_of_contiguous_images(self):
+        image = torch.rand(2, 16, 12, 3)
+        nchw = to_nchw(image)
+
+        assert nchw.shape == (2, 3, 16, 12)
+        assert nchw.data_ptr() == image.data_ptr()
+        assert nchw.is_contiguous(memory_format=torch.channels_last)
+
+    def test_to_nchw_copies_non_contiguous_images_once(self):
+        image = torch.rand(2, 16, 12, 4)[..., :3]
+        nchw = to_nchw(image)
+
+        assert nchw.is_contiguous(memory_format=torch.channels_last)
+        assert torch.equal(to_bhwc(nchw), image)
+
+    def test_round_trip_is_contiguous_bhwc(self):
+        image = torch.rand(1, 8, 8, 4)
+        result = to_bhwc(to_nchw(image))
+
+        assert result.is_contiguous()
+        assert result.data_ptr() == image.data_ptr()
+
+
+class TestComputeDtype:
+    """Test precision selection"""
+
+    def test_fp32_keeps_input_dtype(self):
+        cpu = torch.device("cpu")
+        assert resolve_compute_dtype(cpu, "fp32") == torch.float32
+        assert resolve_compute_dtype(cpu, "fp32", torch.float16) == torch.float16
+
+    def test_auto_uses_float32_on_cpu(self):
+        assert resolve_compute_dtype(torch.device("cpu"), "auto") == torch.float32
+
+    def test_unsupported_kernels_fall_back_to_float32(self, monkeypatch):
+        from kikotools.core import image_ops
+
+        monkeypatch.setattr(image_ops, "_device_supports", lambda *args: False)
+        dtype = resolve_compute_dtype(torch.device("cpu"), "bf16", antialias=True)
+        assert dtype == torch.float32
+
+    def test_invalid_precision_raises(self):
+        with pytest.raises(ValueError, match="precision must be one of"):
+            resolve_compute_dtype(torch.device("cpu"), "fp8")
+
+
+class TestImageOps:
+    """Test chained ops and output error bounds"""
+
+    def test_fp32_matches_reference(self):
+        image = torch.rand(2, 64, 48, 3)
+        result = ImageOps(image).resize(32, 24, antialias=True).result()
+
+        assert result.is_contiguous()
+        assert torch.allclose(result, reference_resize(image, 32, 24, True), atol=1e-6)
+
+    def test_chained_ops_match_separate_ops(self):
+        image = torch.rand(1, 64, 64, 4)
+        chained = ImageOps(image).crop(8, 4, 48, 56).resize(24, 28).result()
+
+        cropped = image[:, 8:56, 4:60]
+        assert torch.allclose(chained, reference_resize(cropped, 24, 28), atol=1e-6)
+
+    def test_crop_is_a_view(self):
+        image = torch.rand(1, 32, 32, 3)
+        result = ImageOps(image).crop(0, 0, 16, 16).result()
+
+        assert result.data_ptr() == image.data_ptr()
+
+    @pytest.mark.parametrize("precision, tolerance", [("fp16", 2e-3), ("bf16", 1.6e-2)])
+    def test_half_precision_error_bounds(self, precision, tolerance):
+        image = torch.rand(2, 96, 80, 3)
+        ops = ImageOps(image, precision)
+        result = ops.resize(40, 36).result()
+
+        # Output keeps the input dtype; the error is bounded by the half
+        # precision epsilon for values in [0, 1]
+        assert result.dtype == torch.float32
+        if ops.compute_dtype == torch.float32:
+            pytest.skip(f"{precision} interpolation unavailable on this device")
+        error = (result - reference_resize(image, 40, 36)).abs()
+        assert error.max() < tolerance
+        assert error.mean() < tolerance / 4
+
+
+class TestChunkedResize:
+    """Test integer-factor detection and chunked batch resizing"""
+
+    def test_integer_factor(self):
+        assert integer_factor((512, 256), (256, 128)) == 2
+        assert integer_factor((512, 256), (128, 64)) == 4
+        assert integer_factor((512, 256), (256, 64)) == 0
+        assert integer_factor((513, 256), (256, 128)) == 0
+        assert integer_factor((256, 128), (256, 128)) == 0
+
+    def test_batch_chunk_size(self):
+        frame_bytes = 1024 * 1024
+        assert batch_chunk_size(10, frame_bytes, 0) == 10
+        assert batch_chunk_size(10, frame_bytes, 3) == 3
+        assert batch_chunk_size(10, frame_bytes, 0.5) == 1
+        assert batch_chunk_size(2, frame_bytes, 64) == 2
+
+    @pytest.mark.parametrize("mode", ["bilinear", "area"])
+    def test_chunked_output_matches_whole_batch(self, mode):
+        image = torch.rand(7, 60, 80, 3)
+
+        whole = resize_image(image, 30, 40, antialias=True, mode=mode)
+        chunked = resize_image(
+            image, 30, 40, antialias=True, mode=mode, max_memory_mb=0.05
+        )
+
+        assert torch.allclose(chunked, whole, atol=1e-6)
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError, match="mode must be one of"):
+            resize_image(torch.rand(1, 8, 8, 3), 4, 4, mode="nearest")
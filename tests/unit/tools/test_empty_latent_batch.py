@@ -2,15 +2,30 @@
 
 import pytest
 import torch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
+from kikotools.tools.empty_latent_batch import logic
 from kikotools.tools.empty_latent_batch.node import EmptyLatentBatchNode
 from kikotools.tools.empty_latent_batch.logic import (
     create_empty_latent_batch,
+    get_latent_device_and_dtype,
+    get_model_latent_format,
     validate_dimensions,
     sanitize_dimensions,
 )
 
 
+def make_model(channels, downscale=None):
+    """Create a stand-in MODEL exposing a latent format."""
+    latent_format = SimpleNamespace(latent_channels=channels)
+    if downscale is not None:
+        latent_format.spacial_downscale_ratio = downscale
+    model = MagicMock()
+    model.get_model_object.return_value = latent_format
+    return model
+
+
 class TestEmptyLatentBatchLogic:
     """Test the logic functions for empty latent batch creation."""
 
@@ -102,6 +117,107 @@ class TestEmptyLatentBatchLogic:
         assert width == 8192  # Maximum size
         assert height == 8192
 
+    def test_sanitize_dimensions_custom_multiple(self):
+        """Test sanitization rounds up to a larger downscale factor."""
+        assert sanitize_dimensions(1000, 1016, 16) == (1008, 1024)
+        assert sanitize_dimensions(8190, 64, 48) == (8160, 96)
+
+    def test_create_sixteen_channel_latent(self):
+        """Test SD3/Flux style 16-channel latents."""
+        samples = create_empty_latent_batch(1024, 768, 2, channels=16)["samples"]
+
+        assert samples.shape == (2, 16, 96, 128)
+        assert torch.all(samples == 0)
+
+    def test_create_latent_custom_downscale(self):
+        """Test the latent size follows the downscale factor."""
+        samples = create_empty_latent_batch(512, 512, 1, downscale=16)["samples"]
+        assert samples.shape == (1, 4, 32, 32)
+
+        with pytest.raises(ValueError, match="must be divisible by 16"):
+            create_empty_latent_batch(520, 512, 1, downscale=16)
+
+    def test_create_latent_device_and_dtype(self):
+        """Test explicit device and dtype are honored."""
+        samples = create_empty_latent_batch(
+            64, 64, 1, device=torch.device("cpu"), dtype=torch.float16
+        )["samples"]
+
+        assert samples.dtype == torch.float16
+        assert samples.device.type == "cpu"
+
+    def test_shared_allocation_is_zero_copy(self):
+        """Test shared latents are views of a single zero element."""
+        samples = create_empty_latent_batch(1024, 1024, 8, allocation="shared")[
+            "samples"
+        ]
+
+        assert samples.shape == (8, 4, 128, 128)
+        assert samples.stride() == (0, 0, 0, 0)
+        assert samples.untyped_storage().nbytes() == samples.element_size()
+        assert torch.all(samples == 0)
+
+    def test_shared_allocation_rejects_in_place_writes(self):
+        """Test consumers must copy shared latents before writing."""
+        samples = create_empty_latent_batch(64, 64, 2, allocation="shared")["samples"]
+
+        with pytest.raises(RuntimeError):
+            samples.add_(1)
+
+        copied = samples.clone()
+        copied.add_(1)
+        assert torch.all(copied == 1)
+        assert torch.all(samples == 0)
+
+    def test_shared_zero_is_not_reused_across_latents(self):
+        """Test a single-element write cannot leak into later latents."""
+        samples = create_empty_latent_batch(64, 64, 1, allocation="shared")["samples"]
+        samples[0, 0, 0, 0] = 5.0
+
+        fresh = create_empty_latent_batch(64, 64, 1, allocation="shared")["samples"]
+        assert torch.all(fresh == 0)
+
+    def test_invalid_allocation(self):
+        """Test error handling for unknown allocation modes."""
+        with pytest.raises(ValueError, match="allocation must be one of"):
+            create_empty_latent_batch(512, 512, 1, allocation="lazy")
+
+    def test_device_and_dtype_from_comfy(self):
+        """Test the intermediate device and dtype come from ComfyUI."""
+        mm = MagicMock()
+        mm.intermediate_device.return_value = torch.device("cpu")
+        mm.intermediate_dtype.return_value = torch.bfloat16
+
+        with (
+            patch.object(logic, "COMFY_AVAILABLE", True),
+            patch.object(logic, "mm", mm, create=True),
+        ):
+            assert get_latent_device_and_dtype() == (
+                torch.device("cpu"),
+                torch.bfloat16,
+            )
+            samples = create_empty_latent_batch(64, 64, 1)["samples"]
+
+        assert samples.dtype == torch.bfloat16
+
+    def test_device_and_dtype_without_comfy(self):
+        """Test CPU float32 is used outside ComfyUI."""
+        with patch.object(logic, "COMFY_AVAILABLE", False):
+            assert get_latent_device_and_dtype() == (
+                torch.device("cpu"),
+                torch.float32,
+            )
+
+    def test_get_model_latent_format(self):
+        """Test channels and downscale are read from a model."""
+        assert get_model_latent_format(make_model(16)) == (16, 8)
+        assert get_model_latent_format(make_model(4, 16)) == (4, 16)
+
+        model = MagicMock()
+        model.get_model_object.return_value = None
+        model.model.latent_format = None
+        assert get_model_latent_format(model) is None
+
 
 class TestEmptyLatentBatchNode:
     """Test the EmptyLatentBatchNode ComfyUI node."""
@@ -177,6 +293,31 @@ class TestEmptyLatentBatchNode:
         # Should be adjusted to 520x520 -> 65x65 latent
         assert samples.shape == (1, 4, 65, 65)
 
+    def test_create_empty_latent_flux_format(self):
+        """Test the latent format selects 16 channels."""
+        latent_dict, _, _ = self.node.create_empty_latent(
+            "custom", 1024, 1024, 2, latent_format="Flux"
+        )
+
+        assert latent_dict["samples"].shape == (2, 16, 128, 128)
+
+    def test_create_empty_latent_from_model(self):
+        """Test a connected model overrides the latent format."""
+        latent_dict, width, height = self.node.create_empty_latent(
+            "custom", 1000, 1000, 1, model=make_model(16, 16)
+        )
+
+        assert (width, height) == (1008, 1008)
+        assert latent_dict["samples"].shape == (1, 16, 63, 63)
+
+    def test_create_empty_latent_fresh_allocation(self):
+        """Test the default allocation returns a writable tensor."""
+        latent_dict, _, _ = self.node.create_empty_latent("custom", 512, 512, 2)
+
+        samples = latent_dict["samples"]
+        assert samples.is_contiguous()
+        samples.add_(1)
+
     def test_validate_inputs_valid(self):
         """Test input validation with valid parameters."""
         assert self.node.validate_inputs("custom", 512, 512, 1) is True
@@ -194,6 +335,9 @@ class TestEmptyLatentBatchNode:
         assert "2 × 4 × 64 × 64" in info
         assert "512×512" in info
 
+        info = self.node.get_latent_info(512, 512, 2, latent_format="SD3 / SD3.5")
+        assert "2 × 16 × 64 × 64" in info
+
     def test_get_memory_estimate(self):
         """Test memory estimation."""
         estimate = self.node.get_memory_estimate(512, 512, 1)
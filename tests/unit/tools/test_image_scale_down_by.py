@@ -74,6 +74,55 @@ class TestImageScaleDownByLogic:
 
         assert result.shape == (1, 10, 10, 3)
 
+    def test_output_is_contiguous_bhwc(self):
+        """Test the channels-last resize returns a contiguous BHWC tensor."""
+        image = torch.rand(2, 64, 48, 3)
+
+        result = scale_down_image(image, 0.5)
+
+        assert result.is_contiguous()
+        assert result.dtype == torch.float32
+
+    def test_half_precision_error_bound(self):
+        """Test reduced precision stays within half-precision error."""
+        image = torch.rand(2, 128, 96, 3)
+
+        reference = scale_down_image(image, 0.5)
+        result = scale_down_image(image, 0.5, precision="bf16")
+
+        assert result.dtype == torch.float32
+        assert (result - reference).abs().max() < 1.6e-2
+
+    def test_chunked_matches_whole_batch(self):
+        """Test chunked resizing produces the same output as one call."""
+        image = torch.rand(5, 96, 64, 3)
+
+        whole = scale_down_image(image, 0.5)
+        chunked = scale_down_image(image, 0.5, max_memory_mb=0.1)
+
+        assert chunked.shape == whole.shape
+        assert chunked.is_contiguous()
+        assert torch.allclose(chunked, whole, atol=1e-6)
+
+    def test_area_integer_factor_averages_blocks(self):
+        """Test exact 1/2 and 1/4 scales average pixel blocks."""
+        image = torch.rand(2, 64, 48, 3)
+
+        for scale_by, factor in [(0.5, 2), (0.25, 4)]:
+            result = scale_down_image(image, scale_by, method="area")
+            blocks = image.view(2, 64 // factor, factor, 48 // factor, factor, 3)
+
+            assert torch.allclose(result, blocks.mean(dim=(2, 4)), atol=1e-6)
+
+    def test_area_non_integer_factor(self):
+        """Test area scaling at a non-integer factor."""
+        image = torch.ones(1, 100, 90, 3)
+
+        result = scale_down_image(image, 0.3, method="area", max_memory_mb=0.1)
+
+        assert result.shape == (1, 30, 27, 3)
+        assert torch.allclose(result, torch.ones_like(result))
+
 
 class TestImageScaleDownByNode:
     """Test the ComfyUI node implementation."""
@@ -143,6 +192,23 @@ class TestImageScaleDownByNode:
         with pytest.raises(ValueError, match="scale_by must be between"):
             node.validate_inputs(images=images, scale_by=1.5)
 
+    def test_input_validation_invalid_precision(self, node):
+        """Test validation with an unknown precision."""
+        images = torch.randn(1, 512, 512, 3)
+
+        with pytest.raises(ValueError, match="precision must be one of"):
+            node.validate_inputs(images=images, scale_by=0.5, precision="fp8")
+
+    def test_input_validation_invalid_method(self, node):
+        """Test validation with an unknown method."""
+        images = torch.randn(1, 64, 64, 3)
+
+        with pytest.raises(ValueError, match="method must be one of"):
+            node.validate_inputs(images=images, scale_by=0.5, method="nearest")
+
+        with pytest.raises(ValueError, match="max_memory_mb must be"):
+            node.validate_inputs(images=images, scale_by=0.5, max_memory_mb=-1)
+
     def test_category_is_comfyassets(self):
         """Test that the node is in the ComfyAssets category."""
         assert ImageScaleDownByNode.CATEGORY == "🫶 ComfyAssets/🖼️ Resolution"
@@ -2,6 +2,7 @@
 
 import pytest
 import torch
+import torch.nn.functional as F
 
 import sys
 from pathlib import Path
@@ -11,6 +12,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from kikotools.tools.image_to_multiple_of.logic import (
     calculate_dimensions_to_multiple,
+    calculate_padded_dimensions,
+    pad_image_to_multiple_of,
     process_image_to_multiple_of,
 )
 from kikotools.tools.image_to_multiple_of.node import ImageToMultipleOfNode
@@ -88,6 +91,110 @@ class TestImageToMultipleOfLogic:
         result = process_image_to_multiple_of(image_rgba, 64, "rescale")
         assert result.shape == (1, 256, 384, 4)
 
+    def test_process_image_rescale_half_precision(self):
+        """Test reduced-precision rescale stays within its error bound."""
+        image = torch.rand(2, 300, 400, 3)
+
+        reference = process_image_to_multiple_of(image, 64, "rescale")
+        result = process_image_to_multiple_of(image, 64, "rescale", "bf16")
+
+        assert result.dtype == image.dtype
+        assert result.is_contiguous()
+        assert (result - reference).abs().max() < 1.6e-2
+
+    def test_process_image_rescale_antialias(self):
+        """Test the default matches plain bilinear and antialias is opt-in."""
+        image = torch.rand(2, 300, 400, 3)
+
+        result = process_image_to_multiple_of(image, 64, "rescale")
+        expected = F.interpolate(
+            image.permute(0, 3, 1, 2),
+            size=(256, 384),
+            mode="bilinear",
+            align_corners=False,
+        ).permute(0, 2, 3, 1)
+
+        assert torch.allclose(result, expected, atol=1e-6)
+
+        antialiased = process_image_to_multiple_of(image, 64, "rescale", antialias=True)
+        expected = F.interpolate(
+            image.permute(0, 3, 1, 2),
+            size=(256, 384),
+            mode="bilinear",
+            align_corners=False,
+            antialias=True,
+        ).permute(0, 2, 3, 1)
+
+        assert torch.allclose(antialiased, expected, atol=1e-6)
+
+    def test_process_image_rescale_chunked(self):
+        """Test chunked rescale matches the whole-batch rescale."""
+        image = torch.rand(4, 150, 200, 3)
+
+        whole = process_image_to_multiple_of(image, 32, "rescale")
+        chunked = process_image_to_multiple_of(image, 32, "rescale", max_memory_mb=0.5)
+
+        assert torch.allclose(chunked, whole, atol=1e-6)
+
+    def test_calculate_padded_dimensions(self):
+        """Test padded dimensions round up to the multiple."""
+        assert calculate_padded_dimensions(256, 512, 64) == (256, 512)
+        assert calculate_padded_dimensions(300, 400, 64) == (320, 448)
+        assert calculate_padded_dimensions(10, 20, 8) == (16, 24)
+
+    def test_pad_reflect_matches_reflection_padding(self):
+        """Test reflect padding mirrors the edges around a centered image."""
+        image = torch.rand(2, 300, 400, 3)
+
+        result = process_image_to_multiple_of(image, 64, "pad reflect")
+        expected = F.pad(
+            image.permute(0, 3, 1, 2), (24, 24, 10, 10), mode="reflect"
+        ).permute(0, 2, 3, 1)
+
+        assert result.shape == (2, 320, 448, 3)
+        assert torch.equal(result, expected)
+
+    def test_pad_reflect_wider_than_image(self):
+        """Test reflect padding works when the padding exceeds the image."""
+        image = torch.rand(1, 5, 3, 1)
+
+        result = pad_image_to_multiple_of(image, 16, "reflect")
+
+        assert result.shape == (1, 16, 16, 1)
+        assert torch.equal(result[:, 5:10, 6:9], image)
+        assert set(result.unique().tolist()) <= set(image.unique().tolist())
+
+    def test_pad_constant(self):
+        """Test constant padding fills around a centered copy."""
+        image = torch.rand(1, 30, 40, 4)
+
+        result = process_image_to_multiple_of(image, 64, "pad constant", pad_value=0.5)
+
+        assert result.shape == (1, 64, 64, 4)
+        assert torch.equal(result[:, 17:47, 12:52], image)
+        assert torch.all(result[:, :17] == 0.5)
+        assert torch.all(result[:, :, 52:] == 0.5)
+
+    def test_pad_already_multiple_returns_input(self):
+        """Test padding is a no-op for sizes that already fit."""
+        image = torch.rand(1, 64, 128, 3)
+
+        assert pad_image_to_multiple_of(image, 64) is image
+
+    def test_contiguity_policy(self):
+        """Test center crop is a view by default and packed on request."""
+        image = torch.rand(2, 300, 400, 3)
+
+        view = process_image_to_multiple_of(image, 64, "center crop")
+        packed = process_image_to_multiple_of(
+            image, 64, "center crop", contiguity="contiguous"
+        )
+
+        assert not view.is_contiguous()
+        assert view.untyped_storage().data_ptr() == image.data_ptr()
+        assert packed.is_contiguous()
+        assert torch.equal(packed, view)
+
 
 class TestImageToMultipleOfNode:
     """Test ComfyUI node implementation."""
@@ -166,6 +273,24 @@ class TestImageToMultipleOfNode:
         with pytest.raises(ValueError, match="Invalid method"):
             node.validate_inputs(image=image, multiple_of=64, method="invalid")
 
+        # Test with invalid precision
+        with pytest.raises(ValueError, match="precision must be one of"):
+            node.validate_inputs(
+                image=image, multiple_of=64, method="rescale", precision="fp8"
+            )
+
+        # Test with invalid contiguity policy
+        with pytest.raises(ValueError, match="contiguity must be one of"):
+            node.validate_inputs(
+                image=image, multiple_of=64, method="rescale", contiguity="packed"
+            )
+
+        # Test with negative memory budget
+        with pytest.raises(ValueError, match="max_memory_mb must be"):
+            node.validate_inputs(
+                image=image, multiple_of=64, method="rescale", max_memory_mb=-1
+            )
+
         # Test with image too small
         small_image = torch.rand(1, 30, 40, 3)
         with pytest.raises(ValueError, match="too small to be adjusted"):
@@ -191,3 +316,8 @@ class TestImageToMultipleOfNode:
         image = torch.rand(1, 1024, 1024, 3)
         result = node.process(image, 256, "rescale")
         assert result[0].shape == (1, 1024, 1024, 3)
+
+        # Test padding an image smaller than multiple_of
+        image = torch.rand(1, 30, 40, 3)
+        result = node.process(image, 64, "pad reflect")
+        assert result[0].shape == (1, 64, 64, 3)
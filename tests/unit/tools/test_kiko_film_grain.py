@@ -3,12 +3,29 @@ import torch
 import numpy as np
 from unittest.mock import MagicMock
 
+from kikotools.tools.kiko_film_grain import logic
+from kikotools.tools.kiko_film_grain.grain_cache import GrainAtlasCache
+from kikotools.tools.kiko_film_grain.tiling import (
+    apply_film_grain_tiled,
+    generate_cell_noise,
+    plan_tiles,
+)
 from kikotools.tools.kiko_film_grain.logic import (
     apply_film_grain,
     generate_grain_texture,
     rgb_to_ycbcr,
     ycbcr_to_rgb,
     apply_gaussian_blur,
+    blend_grain_,
+    blur_grain,
+    blur_planes,
+    build_grain_atlas,
+    build_grain_multiplier,
+    iter_temporal_grain,
+    make_generator,
+    sample_grain_atlas,
+    gaussian_kernel_1d,
+    resize_grain,
 )
 
 
@@ -66,6 +83,104 @@ class TestGaussianBlur:
             assert blurred.shape == image.shape
 
 
+def dense_gaussian_blur(image, kernel_size):
+    gauss = gaussian_kernel_1d(kernel_size, torch.float32, torch.device("cpu"))
+    kernel = (gauss[:, None] * gauss[None, :]).expand(image.shape[-1], 1, -1, -1)
+    planes = image.permute(0, 3, 1, 2)
+    blurred = torch.nn.functional.conv2d(
+        planes, kernel, padding=kernel_size // 2, groups=image.shape[-1]
+    )
+    return blurred.permute(0, 2, 3, 1)
+
+
+class TestBlurMethods:
+    @pytest.mark.parametrize("kernel_size", [3, 11, 15, 31])
+    @pytest.mark.parametrize("method", ["separable", "fft"])
+    def test_exact_methods_match_dense_kernel(self, method, kernel_size):
+        image = torch.rand(2, 40, 56, 3)
+
+        blurred = apply_gaussian_blur(image, kernel_size, method=method)
+
+        expected = dense_gaussian_blur(image, kernel_size)
+        assert torch.allclose(blurred, expected, atol=1e-5)
+
+    def test_box_method_approximates_gaussian(self):
+        image = torch.rand(1, 64, 64, 1)
+
+        blurred = apply_gaussian_blur(image, 15, method="box")
+
+        expected = dense_gaussian_blur(image, 15)
+        interior = (blurred - expected)[:, 15:-15, 15:-15]
+        assert interior.abs().mean() < 0.01
+
+    def test_auto_uses_fft_for_large_kernels(self, mocker):
+        spy = mocker.spy(torch.fft, "rfft")
+        planes = torch.rand(1, 1, 32, 32)
+
+        blur_planes(planes, 15)
+        assert spy.call_count == 0
+
+        blur_planes(planes, 41)
+        assert spy.call_count > 0
+
+    def test_kernel_cache(self):
+        device = torch.device("cpu")
+        first = gaussian_kernel_1d(15, torch.float32, device)
+
+        assert gaussian_kernel_1d(15, torch.float32, device) is first
+        assert gaussian_kernel_1d(15, torch.float64, device).dtype == torch.float64
+        assert torch.isclose(first.sum(), torch.tensor(1.0))
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError, match="Blur method must be one of"):
+            blur_planes(torch.rand(1, 1, 8, 8), 3, method="median")
+
+    @pytest.mark.parametrize("scale", [1.5, 2.0])
+    def test_coarse_grain_exact_by_default(self, scale):
+        image = torch.rand(1, 96, 96, 3)
+
+        result = apply_film_grain(image, scale=scale, strength=0.5, seed=5)
+
+        # Same grain through the Gaussian blurs of the original implementation
+        grain = generate_grain_texture(1, 96, 96, scale, 5)
+        ycbcr = rgb_to_ycbcr(grain)
+        ycbcr = torch.cat(
+            [
+                dense_gaussian_blur(ycbcr[..., 0:1], 3),
+                dense_gaussian_blur(ycbcr[..., 1:2], 15),
+                dense_gaussian_blur(ycbcr[..., 2:3], 11),
+            ],
+            dim=-1,
+        )
+        grain = (ycbcr_to_rgb(ycbcr) - 0.5) * 0.5
+        grain = grain * torch.tensor([2.0, 1.0, 3.0]) + 1.0
+        grain = grain * 0.7 + grain[..., 1:2] * 0.3
+        expected = blend_grain_(image.clone(), resize_grain(grain, 96, 96))
+
+        assert torch.allclose(result, expected, atol=1e-5)
+
+    def test_invalid_blur_quality(self):
+        with pytest.raises(ValueError, match="blur_quality must be one of"):
+            apply_film_grain(torch.rand(1, 8, 8, 3), blur_quality="draft")
+
+    def test_coarse_grain_within_tolerance(self):
+        image = torch.rand(1, 96, 96, 3)
+
+        coarse = apply_film_grain(
+            image, scale=2.0, strength=0.5, seed=5, blur_quality="fast"
+        )
+        assert not torch.allclose(
+            coarse, apply_film_grain(image, scale=2.0, strength=0.5, seed=5)
+        )
+
+        # Same grain through the exact blur path
+        grain = generate_grain_texture(1, 96, 96, 2.0, 5)
+        grain = build_grain_multiplier(grain, 0.5, 0.7, 0.0, coarse=False)
+        exact = blend_grain_(image.clone(), resize_grain(grain, 96, 96))
+
+        assert (coarse - exact).abs().mean() < 0.01
+
+
 class TestGrainGeneration:
     def test_generate_grain_texture_shape(self):
         batch_size = 2
@@ -214,6 +329,317 @@ class TestFilmGrainApplication:
         assert var_fine != var_coarse  # They should be different
 
 
+class TestFusedGrainPath:
+    def test_does_not_touch_global_rng(self):
+        image = torch.rand(1, 16, 16, 3)
+        state = torch.get_rng_state()
+
+        apply_film_grain(image, scale=1.0, strength=0.5, seed=42)
+
+        assert torch.equal(state, torch.get_rng_state())
+
+    def test_inplace_matches_out_of_place(self):
+        image = torch.rand(2, 24, 24, 4)
+        expected = apply_film_grain(image, scale=0.5, strength=1.0, toe=0.1, seed=3)
+
+        target = image.clone()
+        result = apply_film_grain(
+            target, scale=0.5, strength=1.0, toe=0.1, seed=3, inplace=True
+        )
+
+        assert result.data_ptr() == target.data_ptr()
+        assert torch.allclose(result, expected)
+
+    def test_out_of_place_leaves_input_unchanged(self):
+        image = torch.rand(1, 16, 16, 3)
+        original = image.clone()
+
+        apply_film_grain(image, scale=1.0, strength=1.0, seed=42)
+
+        assert torch.equal(image, original)
+
+    def test_matches_unfused_reference(self):
+        image = torch.rand(1, 20, 30, 3)
+        strength, saturation, toe = 1.5, 0.6, 0.2
+
+        ycbcr = rgb_to_ycbcr(generate_grain_texture(1, 20, 30, 1.0, 9))
+        ycbcr = torch.cat(
+            [
+                apply_gaussian_blur(ycbcr[..., 0:1], 3),
+                apply_gaussian_blur(ycbcr[..., 1:2], 15),
+                apply_gaussian_blur(ycbcr[..., 2:3], 11),
+            ],
+            dim=-1,
+        )
+        grain = (ycbcr_to_rgb(ycbcr) - 0.5) * strength
+        grain = grain * torch.tensor([2.0, 1.0, 3.0]) + 1.0
+        grain = grain * saturation + grain[..., 1:2] * (1 - saturation)
+        expected = (1 - (1 - image) * grain) * (1 - toe) + toe
+
+        result = apply_film_grain(
+            image, scale=1.0, strength=strength, saturation=saturation, toe=toe, seed=9
+        )
+
+        assert torch.allclose(result, expected.clamp(0, 1), atol=1e-5)
+
+    @pytest.mark.parametrize("grain_dtype", [torch.float32, torch.float16])
+    def test_blend_grain_in_place(self, grain_dtype):
+        image = torch.rand(2, 16, 16, 4)
+        grain = (torch.rand(2, 16, 16, 3) * 2.5).to(grain_dtype)
+        expected = (1 - (1 - image[..., :3]) * grain.float()).clamp(0, 1)
+        alpha = image[..., 3].clone()
+
+        rgb = image[..., :3]
+        assert blend_grain_(rgb, grain) is rgb
+        assert torch.allclose(image[..., :3], expected, atol=1e-6)
+        assert torch.equal(image[..., 3], alpha)
+
+    @pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA not available")
+    def test_grain_generated_on_image_device(self):
+        image = torch.rand(1, 32, 32, 3, device="cuda")
+
+        result = apply_film_grain(image, scale=1.0, strength=0.5, seed=42)
+
+        assert result.device == image.device
+
+
+class TestGrainAtlas:
+    def test_atlas_tiles_seamlessly(self):
+        atlas = build_grain_atlas(3, False, torch.device("cpu"), tile_size=32, tiles=1)
+
+        # Blurring a 3x3 repetition of the same noise must match the tile
+        noise = torch.rand(1, 32, 32, 3, generator=make_generator(3))
+        expected = blur_grain(noise.repeat(1, 3, 3, 1))[:, 32:64, 32:64]
+
+        assert torch.allclose(atlas, expected, atol=1e-6)
+
+    def test_sample_grain_atlas(self):
+        atlas = torch.rand(2, 16, 16, 3)
+
+        grain = sample_grain_atlas(atlas, 4, 40, 24, seed=1)
+
+        assert grain.shape == (4, 40, 24, 3)
+        assert torch.equal(grain, sample_grain_atlas(atlas, 4, 40, 24, seed=1))
+        assert not torch.equal(grain[0], grain[1])
+
+    def test_large_field_does_not_repeat(self):
+        atlas = build_grain_atlas(7, False, torch.device("cpu"), tile_size=32)
+
+        grain = sample_grain_atlas(atlas, 1, 128, 128, seed=2)[0]
+
+        # A single wrapped tile would repeat exactly with a period of 32
+        for shift in (32, 64, 96):
+            assert not torch.allclose(grain[shift:], grain[:-shift], atol=1e-3)
+            assert not torch.allclose(grain[:, shift:], grain[:, :-shift], atol=1e-3)
+
+    def test_large_field_keeps_grain_variance(self):
+        atlas = build_grain_atlas(7, False, torch.device("cpu"), tile_size=32)
+
+        grain = sample_grain_atlas(atlas, 8, 160, 160, seed=3)
+
+        # Cross-faded bands around the cell edges (pitch 28, band 4)
+        bands = torch.zeros(160, dtype=torch.bool)
+        for edge in range(28, 160, 28):
+            bands[edge : edge + 4] = True
+        band_std = grain[:, bands][:, :, bands].std()
+        assert abs(band_std / atlas.std() - 1) < 0.15
+        assert abs(grain.mean() - atlas.mean()) < 0.01
+
+    def test_spatial_tiles_match_whole_field(self):
+        atlas = torch.rand(2, 16, 16, 3)
+
+        whole = sample_grain_atlas(atlas, 2, 50, 40, seed=4, first_frame=3)
+        tile = sample_grain_atlas(
+            atlas, 2, 20, 17, seed=4, first_frame=3, row_start=13, col_start=11
+        )
+
+        assert torch.allclose(tile, whole[:, 13:33, 11:28], atol=1e-6)
+
+    def test_atlas_mode_applies_grain(self):
+        image = torch.ones(3, 48, 48, 3) * 0.5
+
+        result = apply_film_grain(
+            image, scale=1.0, strength=1.0, seed=42, grain_mode="atlas"
+        )
+
+        assert result.shape == image.shape
+        assert result.min() >= 0.0
+        assert result.max() <= 1.0
+        assert not torch.allclose(result[0], result[1])
+
+    def test_atlas_reused_across_calls(self, mocker):
+        build = mocker.spy(logic, "build_grain_atlas")
+        image = torch.rand(1, 32, 32, 3)
+
+        apply_film_grain(image, strength=0.5, seed=1234567, grain_mode="atlas")
+        apply_film_grain(image, strength=2.0, seed=1234567, grain_mode="atlas")
+
+        assert build.call_count == 1
+
+    def test_invalid_grain_mode(self):
+        with pytest.raises(ValueError, match="grain_mode must be one of"):
+            apply_film_grain(torch.rand(1, 8, 8, 3), grain_mode="bogus")
+
+
+class TestGrainAtlasCache:
+    def test_lru_eviction_by_bytes(self):
+        cache = GrainAtlasCache(max_bytes=3 * 400)
+        for key in range(3):
+            cache.put(key, torch.zeros(100))  # 400 bytes each
+
+        cache.get(0)  # Mark as recently used
+        cache.put(3, torch.zeros(100))
+
+        assert cache.get(1) is None
+        assert cache.get(0) is not None
+        assert cache.current_bytes == 1200
+
+    def test_oversized_entry_not_stored(self):
+        cache = GrainAtlasCache(max_bytes=100)
+
+        atlas = cache.get_or_build("big", lambda: torch.zeros(1000))
+
+        assert atlas.numel() == 1000
+        assert len(cache) == 0
+
+
+def frame_correlation(first, second):
+    first = first - first.mean()
+    second = second - second.mean()
+    return ((first * second).mean() / (first.std() * second.std())).item()
+
+
+class TestTemporalGrain:
+    def test_coherence_controls_frame_correlation(self):
+        image = torch.full((4, 64, 64, 3), 0.5)
+
+        coherent = apply_film_grain(
+            image, scale=1.0, seed=3, grain_mode="temporal", temporal_coherence=0.9
+        )
+        independent = apply_film_grain(
+            image, scale=1.0, seed=3, grain_mode="temporal", temporal_coherence=0.0
+        )
+
+        assert frame_correlation(coherent[1], coherent[2]) > 0.8
+        assert abs(frame_correlation(independent[1], independent[2])) < 0.2
+
+    def test_grain_variance_stays_constant(self):
+        atlas = build_grain_atlas(1, False, torch.device("cpu"), tile_size=64)
+
+        stds = [
+            field.std().item()
+            for field in iter_temporal_grain(atlas, 30, 64, 64, seed=1, coherence=0.95)
+        ]
+
+        assert max(stds) / min(stds) < 1.5
+
+    def test_tiled_temporal_matches_whole(self):
+        image = torch.rand(3, 100, 140, 3)
+        kwargs = dict(scale=1.0, seed=3, grain_mode="temporal")
+
+        whole = apply_film_grain(image, **kwargs)
+        tiled = apply_film_grain_tiled(image, max_memory_mb=0.1, **kwargs)
+
+        assert torch.allclose(whole, tiled, atol=1e-5)
+
+    def test_invalid_coherence(self):
+        with pytest.raises(ValueError, match="temporal_coherence must be in"):
+            apply_film_grain(
+                torch.rand(2, 8, 8, 3), grain_mode="temporal", temporal_coherence=1.0
+            )
+
+
+class TestTiledFilmGrain:
+    @pytest.mark.parametrize("scale", [0.5, 1.0, 2.0])
+    @pytest.mark.parametrize("grain_mode", ["per_frame", "atlas"])
+    @pytest.mark.parametrize("blur_quality", ["exact", "fast"])
+    def test_output_independent_of_tile_size(self, scale, grain_mode, blur_quality):
+        image = torch.rand(3, 150, 210, 3)
+        kwargs = dict(
+            scale=scale,
+            strength=0.8,
+            seed=5,
+            grain_mode=grain_mode,
+            blur_quality=blur_quality,
+        )
+
+        whole = apply_film_grain_tiled(image, max_memory_mb=512, **kwargs)
+        tiled = apply_film_grain_tiled(image, max_memory_mb=0.25, **kwargs)
+
+        assert plan_tiles(3, 150, 210, scale, 0.25)[1] < 150
+        assert torch.allclose(whole, tiled, atol=1e-5)
+
+    def test_matches_whole_field_grain(self):
+        image = torch.rand(2, 90, 120, 3)
+        scale = 0.7
+        field = (int(90 / scale), int(120 / scale))
+
+        noise = generate_cell_noise(9, 0, 2, (0, 0) + field, field, image.device)
+        grain = build_grain_multiplier(noise, 0.5, 0.7, 0.1)
+        expected = blend_grain_(image.clone(), resize_grain(grain, 90, 120))
+
+        result = apply_film_grain_tiled(
+            image, scale=scale, strength=0.5, toe=0.1, seed=9, max_memory_mb=0.25
+        )
+
+        assert torch.allclose(result, expected, atol=1e-5)
+
+    def test_preserves_alpha_and_range(self):
+        image = torch.rand(1, 100, 100, 4)
+
+        result = apply_film_grain_tiled(
+            image, scale=1.0, strength=5.0, seed=1, max_memory_mb=0.25
+        )
+
+        assert torch.equal(result[..., 3], image[..., 3])
+        assert result.min() >= 0.0
+        assert result.max() <= 1.0
+
+    def test_plan_tiles_prefers_whole_frames(self):
+        frames, tile_h, tile_w = plan_tiles(16, 512, 512, 1.0, 256)
+
+        assert (tile_h, tile_w) == (512, 512)
+        assert 1 < frames <= 16
+
+    def test_invalid_budget(self):
+        with pytest.raises(ValueError, match="max_memory_mb must be positive"):
+            apply_film_grain_tiled(torch.rand(1, 8, 8, 3), max_memory_mb=0)
+
+
+class TestGrainPrecision:
+    @pytest.mark.parametrize("precision, tolerance", [("fp16", 3e-3), ("bf16", 2e-2)])
+    @pytest.mark.parametrize("grain_mode", ["per_frame", "atlas", "temporal"])
+    def test_half_precision_error_bounds(self, precision, tolerance, grain_mode):
+        image = torch.rand(2, 96, 128, 4)
+        kwargs = dict(scale=0.5, strength=1.0, seed=3, grain_mode=grain_mode)
+
+        reference = apply_film_grain(image, **kwargs)
+        result = apply_film_grain(image, precision=precision, **kwargs)
+
+        assert result.dtype == image.dtype
+        assert torch.equal(result[..., 3], image[..., 3])
+        assert (result - reference).abs().max() < tolerance
+
+    def test_tiled_half_precision_error_bound(self):
+        image = torch.rand(2, 150, 210, 3)
+        kwargs = dict(scale=0.7, strength=1.0, seed=3, max_memory_mb=0.25)
+
+        reference = apply_film_grain_tiled(image, **kwargs)
+        result = apply_film_grain_tiled(image, precision="fp16", **kwargs)
+
+        assert (result - reference).abs().max() < 3e-3
+
+    def test_fp32_keeps_resize_layout(self):
+        grain = torch.rand(2, 40, 30, 3)
+        resized = resize_grain(grain, 80, 60)
+
+        assert resized.is_contiguous()
+
+    def test_invalid_precision(self):
+        with pytest.raises(ValueError, match="precision must be one of"):
+            apply_film_grain(torch.rand(1, 8, 8, 3), precision="fp8")
+
+
 class TestEdgeCases:
     def test_handles_empty_batch(self):
         image = torch.rand(0, 32, 32, 3)
@@ -7,6 +7,8 @@ import pytest
 import torch
 import tempfile
 import os
+import json
+import numpy as np
 from PIL import Image
 from unittest.mock import patch
 
@@ -19,7 +21,20 @@ from kikotools.tools.kiko_save_image.logic import (
     get_save_image_path,
     create_png_metadata,
     get_next_counter,
+    reserve_counter_range,
+    quantize_batch_to_uint8,
+    get_png_metadata,
+    iter_uint8_frames,
+    save_animation,
 )
+from kikotools.tools.kiko_save_image.encoders import (
+    ImageEncoder,
+    get_available_formats,
+    get_encoder,
+    insert_png_chunks,
+    register_encoder,
+)
+from kikotools.tools.kiko_save_image.writer import BackgroundWriterPool
 
 
 class TestKikoSaveImageLogic:
@@ -49,6 +64,45 @@ class TestKikoSaveImageLogic:
         assert pil_image.size == (32, 32)
         assert pil_image.mode == "RGBA"
 
+    def test_quantize_batch_to_uint8(self):
+        """Test batch quantization matches per-pixel rounding"""
+        import numpy as np
+
+        images = torch.rand(3, 16, 24, 3)
+        images[0, 0, 0] = torch.tensor([-0.5, 1.5, 0.5])
+
+        quantized = quantize_batch_to_uint8(images)
+
+        assert quantized.dtype == np.uint8
+        assert quantized.shape == (3, 16, 24, 3)
+        expected = np.clip(np.round(images.numpy() * 255.0), 0, 255).astype(np.uint8)
+        assert np.array_equal(quantized, expected)
+        assert list(quantized[0, 0, 0]) == [0, 255, 128]
+
+    def test_iter_uint8_frames_chunks(self):
+        """Test streaming quantizes one fixed-size chunk at a time"""
+        import numpy as np
+
+        images = torch.rand(7, 8, 8, 3)
+
+        with patch(
+            "kikotools.tools.kiko_save_image.logic.quantize_batch_to_uint8",
+            wraps=quantize_batch_to_uint8,
+        ) as mock_quantize:
+            frames = list(iter_uint8_frames(images, chunk_frames=3))
+
+        assert len(frames) == 7
+        chunk_sizes = [call.args[0].shape[0] for call in mock_quantize.call_args_list]
+        assert chunk_sizes == [3, 3, 1]
+        assert np.array_equal(np.stack(frames), quantize_batch_to_uint8(images))
+
+    def test_convert_tensor_to_pil_grayscale(self):
+        """Test single-channel tensors convert to L mode"""
+        pil_image = convert_tensor_to_pil(torch.rand(16, 16, 1))
+
+        assert pil_image.mode == "L"
+        assert pil_image.size == (16, 16)
+
     def test_get_next_counter_creates_file(self):
         """Test counter file creation"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -128,6 +182,46 @@ class TestKikoSaveImageLogic:
             assert ":" not in counter_files[0]
             assert "*" not in counter_files[0]
 
+    def test_reserve_counter_range(self):
+        """Test a whole batch range is reserved at once"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = reserve_counter_range(temp_dir, "batch", 8)
+            second = reserve_counter_range(temp_dir, "batch", 2)
+
+            assert first == 1
+            assert second == 9
+            with open(os.path.join(temp_dir, ".batch_counter.txt")) as f:
+                assert f.read().strip() == "10"
+
+    def test_reserve_counter_range_concurrent(self):
+        """Test concurrent reservations never overlap"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                starts = list(
+                    executor.map(
+                        lambda _: reserve_counter_range(temp_dir, "race", 4),
+                        range(32),
+                    )
+                )
+
+            counters = [start + i for start in starts for i in range(4)]
+            assert len(set(counters)) == 128
+            assert sorted(counters) == list(range(1, 129))
+
+    def test_counter_repaired_from_existing_files(self):
+        """Test a missing counter file is rebuilt from saved filenames"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.makedirs(os.path.join(temp_dir, "renders"))
+            for counter in (3, 17):
+                open(
+                    os.path.join(temp_dir, "renders", f"shot_{counter:05d}.png"), "w"
+                ).close()
+
+            counter = get_next_counter(temp_dir, "renders/shot")
+            assert counter == 18
+
     def test_get_save_image_path(self):
         """Test save path generation with counter"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -165,6 +259,75 @@ class TestKikoSaveImageLogic:
 
         assert isinstance(metadata, PngInfo)
 
+    def test_get_png_metadata_cached_per_execution(self):
+        """Test metadata is serialized once for the same prompt objects"""
+        prompt = {"1": {"class_type": "KikoSaveImage"}}
+        extra = {"workflow": {"nodes": []}}
+
+        with patch(
+            "kikotools.tools.kiko_save_image.logic.json.dumps", wraps=json.dumps
+        ) as mock_dumps:
+            first, _ = get_png_metadata(prompt, extra)
+            second, _ = get_png_metadata(prompt, extra)
+
+        assert first is second
+        assert mock_dumps.call_count == 2  # prompt + workflow, once each
+
+        # A new execution (new prompt object) is serialized again
+        third, _ = get_png_metadata(dict(prompt), extra)
+        assert third is not first
+
+    def test_get_png_metadata_invalid_mode(self):
+        """Test unknown metadata modes are rejected"""
+        with pytest.raises(ValueError, match="png_metadata must be one of"):
+            get_png_metadata({"a": 1}, None, "gzip")
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_process_image_batch_compressed_metadata(self, mock_folder_paths):
+        """Test compressed metadata round-trips through zTXt chunks"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            prompt = {"1": {"inputs": {"text": "a cat"}}}
+
+            results, _ = process_image_batch(
+                images=torch.rand(1, 16, 16, 3),
+                filename_prefix="ztxt",
+                prompt=prompt,
+                png_metadata="compressed",
+            )
+
+            saved = Image.open(os.path.join(temp_dir, results[0]["filename"]))
+            assert json.loads(saved.text["prompt"]) == prompt
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_process_image_batch_sidecar_metadata(self, mock_folder_paths):
+        """Test sidecar mode writes the workflow once and references it"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            prompt = {"1": {"inputs": {"seed": 7}}}
+            extra = {"workflow": {"nodes": [1, 2, 3]}}
+
+            results, _ = process_image_batch(
+                images=torch.rand(3, 16, 16, 3),
+                filename_prefix="sidecar",
+                prompt=prompt,
+                extra_pnginfo=extra,
+                png_metadata="sidecar",
+            )
+
+            sidecars = [f for f in os.listdir(temp_dir) if f.endswith(".json")]
+            assert len(sidecars) == 1
+
+            for result in results:
+                saved = Image.open(os.path.join(temp_dir, result["filename"]))
+                assert "workflow" not in saved.text
+                reference = json.loads(saved.text["kiko_metadata"])
+                assert reference["sidecar"] == sidecars[0]
+
+            with open(os.path.join(temp_dir, sidecars[0])) as f:
+                sidecar = json.load(f)
+            assert sidecar == {"prompt": prompt, "workflow": extra["workflow"]}
+
     @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
     def test_process_image_batch_png(self, mock_folder_paths):
         """Test batch processing with PNG format"""
@@ -207,6 +370,24 @@ class TestKikoSaveImageLogic:
                 saved_img = Image.open(filepath)
                 assert saved_img.size == (32, 32)
 
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_process_image_batch_streaming(self, mock_folder_paths):
+        """Test chunked streaming saves every frame in order"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+
+            results, _ = process_image_batch(
+                images=torch.rand(5, 16, 16, 3),
+                filename_prefix="stream",
+                format_type="PNG",
+                chunk_frames=2,
+            )
+
+            filenames = [result["filename"] for result in results]
+            assert filenames == [f"stream_{i:05d}.png" for i in range(1, 6)]
+            for filename in filenames:
+                assert os.path.exists(os.path.join(temp_dir, filename))
+
     @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
     def test_process_image_batch_jpeg(self, mock_folder_paths):
         """Test batch processing with JPEG format"""
@@ -369,6 +550,447 @@ class TestKikoSaveImageLogic:
                 os.unlink(temp_path)
 
 
+class TestEncoderRegistry:
+    """Test pluggable encoder registry"""
+
+    def test_builtin_formats_available(self):
+        """Test core formats are always registered"""
+        formats = get_available_formats()
+        for name in ["PNG", "JPEG", "WEBP", "PNG_FAST"]:
+            assert name in formats
+
+    def test_unknown_format_rejected(self):
+        """Test unknown formats raise ValueError"""
+        with pytest.raises(ValueError, match="Unsupported format"):
+            get_encoder("BMP")
+
+    def test_encode_reports_throughput(self):
+        """Test encoders report time, bytes/sec and compression ratio"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            img = Image.new("RGB", (64, 64), color="blue")
+            info = get_encoder("PNG").encode(img, os.path.join(temp_dir, "a.png"))
+
+            assert info["format"] == "PNG"
+            assert info["encode_seconds"] >= 0
+            assert info["bytes_per_second"] > 0
+            # A flat colour compresses far below the 12 KB raw size
+            assert info["compression_ratio"] > 10
+
+    def test_fast_png_lossless_with_metadata(self):
+        """Test PNG_FAST round-trips pixels and keeps workflow metadata"""
+        import numpy as np
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pixels = (np.random.rand(32, 48, 4) * 255).astype(np.uint8)
+            img = Image.fromarray(pixels)
+            metadata = create_png_metadata(prompt={"seed": 42})
+            path = os.path.join(temp_dir, "fast.png")
+
+            info = get_encoder("PNG_FAST").encode(img, path, metadata=metadata)
+
+            saved = Image.open(path)
+            assert info["lossless"] is True
+            assert np.array_equal(np.array(saved), pixels)
+            assert json.loads(saved.text["prompt"]) == {"seed": 42}
+
+    def test_insert_png_chunks(self):
+        """Test text chunks are spliced in after IHDR with valid CRCs"""
+        import io
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (8, 8)).save(buffer, "PNG")
+        metadata = create_png_metadata(extra_pnginfo={"workflow": {"id": 1}})
+
+        png_bytes = insert_png_chunks(buffer.getvalue(), metadata)
+
+        saved = Image.open(io.BytesIO(png_bytes))
+        saved.load()
+        assert json.loads(saved.text["workflow"]) == {"id": 1}
+
+    def test_register_custom_encoder(self):
+        """Test third-party encoders can be registered"""
+        from kikotools.tools.kiko_save_image import encoders
+
+        class TiffEncoder(ImageEncoder):
+            name = "TIFF_TEST"
+            extension = ".tif"
+
+            def _save(self, img, filepath, quality, level, lossless, metadata):
+                img.save(filepath, "TIFF")
+                return {"quality": None, "compress_level": None, "lossless": True}
+
+        register_encoder(TiffEncoder())
+        try:
+            assert "TIFF_TEST" in get_available_formats()
+            assert get_encoder("TIFF_TEST").extension == ".tif"
+        finally:
+            del encoders._ENCODERS["TIFF_TEST"]
+
+    def test_encoder_without_save_cannot_be_instantiated(self):
+        """Test a missing _save override fails at construction, not at save"""
+
+        class IncompleteEncoder(ImageEncoder):
+            name = "INCOMPLETE"
+            extension = ".bin"
+
+        with pytest.raises(TypeError):
+            IncompleteEncoder()
+
+    def test_optional_lossless_jxl(self):
+        """Test the JPEG XL encoder when its Pillow plugin exists"""
+        if "JXL" not in get_available_formats():
+            pytest.skip("JXL plugin not installed")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            encoder = get_encoder("JXL")
+            path = os.path.join(temp_dir, f"out{encoder.extension}")
+            info = encoder.encode(
+                Image.new("RGB", (32, 32), "red"), path, lossless=True
+            )
+
+            assert info["lossless"] is True
+            assert Image.open(path).size == (32, 32)
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_avif_lossless_request_reported_as_lossy(self, mock_folder_paths):
+        """Test AVIF lossless requests report quality 100, not lossless"""
+        if "AVIF" not in get_available_formats():
+            pytest.skip("AVIF support not installed")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            encoder = get_encoder("AVIF")
+            path = os.path.join(temp_dir, f"out{encoder.extension}")
+            info = encoder.encode(
+                Image.new("RGB", (32, 32), "red"), path, quality=60, lossless=True
+            )
+
+            assert info["lossless"] is False
+            assert info["quality"] == 100
+            assert Image.open(path).size == (32, 32)
+
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            _, enhanced = process_image_batch(
+                images=torch.rand(1, 16, 16, 3),
+                format_type="AVIF",
+                quality=60,
+                webp_lossless=True,
+            )
+            assert enhanced[0]["lossless"] is False
+            assert enhanced[0]["quality"] == 100
+
+
+class TestDeduplication:
+    """Test content-hash deduplication"""
+
+    @pytest.mark.parametrize("mode", ["hardlink", "reference"])
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_duplicates_reuse_existing_file(self, mock_folder_paths, mode):
+        """Test identical frames are linked or referenced, not re-encoded"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            image = torch.rand(1, 16, 16, 3)
+
+            first, _ = process_image_batch(
+                images=image, filename_prefix="dup", dedup=mode
+            )
+            with patch(
+                "kikotools.tools.kiko_save_image.logic.save_image_with_format"
+            ) as mock_save:
+                second, enhanced = process_image_batch(
+                    images=image, filename_prefix="dup", dedup=mode
+                )
+                mock_save.assert_not_called()
+
+            assert enhanced[0]["deduplicated"] is True
+            first_path = os.path.join(temp_dir, first[0]["filename"])
+            second_path = os.path.join(
+                temp_dir, second[0]["subfolder"], second[0]["filename"]
+            )
+            assert os.path.exists(second_path)
+
+            if mode == "hardlink":
+                assert second_path != first_path
+                assert os.path.samefile(first_path, second_path)
+            else:
+                assert second_path == first_path
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_different_settings_not_deduplicated(self, mock_folder_paths):
+        """Test the same pixels with different settings are encoded again"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            image = torch.rand(1, 16, 16, 3)
+
+            process_image_batch(images=image, filename_prefix="d", dedup="reference")
+            _, enhanced = process_image_batch(
+                images=image,
+                filename_prefix="d",
+                png_compress_level=9,
+                dedup="reference",
+            )
+
+            assert "deduplicated" not in enhanced[0]
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_different_metadata_not_deduplicated(self, mock_folder_paths):
+        """Test the same pixels under another prompt get their own metadata"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            image = torch.rand(1, 16, 16, 3)
+
+            process_image_batch(
+                images=image,
+                filename_prefix="meta",
+                prompt={"text": "first"},
+                dedup="hardlink",
+            )
+            second, enhanced = process_image_batch(
+                images=image,
+                filename_prefix="meta",
+                prompt={"text": "second"},
+                dedup="hardlink",
+            )
+
+            assert "deduplicated" not in enhanced[0]
+            with Image.open(os.path.join(temp_dir, second[0]["filename"])) as img:
+                assert json.loads(img.info["prompt"]) == {"text": "second"}
+
+            _, enhanced = process_image_batch(
+                images=image,
+                filename_prefix="meta",
+                prompt={"text": "second"},
+                png_metadata="compressed",
+                dedup="hardlink",
+            )
+            assert "deduplicated" not in enhanced[0]
+
+            _, enhanced = process_image_batch(
+                images=image,
+                filename_prefix="meta",
+                prompt={"text": "second"},
+                dedup="hardlink",
+            )
+            assert enhanced[0]["deduplicated"] is True
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_deleted_original_is_encoded_again(self, mock_folder_paths):
+        """Test stale index entries are ignored"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            image = torch.rand(1, 16, 16, 3)
+
+            first, _ = process_image_batch(
+                images=image, filename_prefix="gone", dedup="reference"
+            )
+            os.remove(os.path.join(temp_dir, first[0]["filename"]))
+
+            second, enhanced = process_image_batch(
+                images=image, filename_prefix="gone", dedup="reference"
+            )
+
+            assert "deduplicated" not in enhanced[0]
+            assert os.path.exists(os.path.join(temp_dir, second[0]["filename"]))
+
+
+class TestAnimation:
+    """Test animated batch output"""
+
+    @pytest.mark.parametrize(
+        "animation,extension", [("WEBP", ".webp"), ("APNG", ".png"), ("GIF", ".gif")]
+    )
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_save_animation_formats(self, mock_folder_paths, animation, extension):
+        """Test a batch is written as one animated file with every frame"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            images = torch.rand(5, 24, 32, 3)
+
+            results, enhanced = save_animation(
+                images=images,
+                filename_prefix="anim",
+                animation=animation,
+                frame_duration=80,
+                loop_count=2,
+                chunk_frames=2,
+            )
+
+            assert len(results) == 1
+            assert results[0]["filename"].endswith(extension)
+            info = enhanced[0]
+            assert info["animated"] is True
+            assert info["frames"] == 5
+            assert info["dimensions"] == "32x24"
+            assert info["file_size"] > 0
+            assert info["encode_seconds"] >= 0
+
+            with Image.open(os.path.join(temp_dir, results[0]["filename"])) as img:
+                assert img.n_frames == 5
+                img.seek(1)
+                img.load()
+                assert img.info["duration"] == 80
+                assert img.info["loop"] == 2
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_apng_embeds_metadata(self, mock_folder_paths):
+        """Test APNG output carries the workflow metadata"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+
+            results, _ = save_animation(
+                images=torch.rand(2, 8, 8, 3),
+                filename_prefix="anim",
+                animation="APNG",
+                prompt={"1": {"class_type": "KSampler"}},
+            )
+
+            with Image.open(os.path.join(temp_dir, results[0]["filename"])) as img:
+                assert json.loads(img.text["prompt"])["1"]["class_type"] == "KSampler"
+
+    @pytest.mark.parametrize("frames", [1, 5])
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_apng_frames_match_batch(self, mock_folder_paths, frames):
+        """Test streamed frames reach the file unchanged and in order"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            images = torch.rand(frames, 8, 12, 3)
+
+            results, _ = save_animation(images=images, animation="APNG", chunk_frames=2)
+
+            expected = quantize_batch_to_uint8(images)
+            with Image.open(os.path.join(temp_dir, results[0]["filename"])) as img:
+                assert getattr(img, "n_frames", 1) == frames
+                for index in range(frames):
+                    img.seek(index)
+                    assert np.array_equal(np.array(img.convert("RGB")), expected[index])
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_save_animation_empty_batch(self, mock_folder_paths):
+        """Test an empty batch is rejected before anything is written"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+
+            with pytest.raises(ValueError, match="at least one frame"):
+                save_animation(images=torch.rand(0, 8, 8, 3), animation="WEBP")
+            assert os.listdir(temp_dir) == []
+
+    def test_save_animation_invalid_format(self):
+        """Test unknown animation formats are rejected"""
+        with pytest.raises(ValueError, match="animation must be one of"):
+            save_animation(images=torch.rand(2, 8, 8, 3), animation="MP4")
+
+
+class TestBackgroundWriterPool:
+    """Test background writer pool"""
+
+    def test_submit_and_flush(self):
+        """Test queued jobs complete after flush"""
+        pool = BackgroundWriterPool(max_workers=2)
+        results = []
+
+        for i in range(5):
+            pool.submit(results.append, i, label=f"job_{i}")
+
+        assert pool.flush(timeout=5)
+        assert sorted(results) == [0, 1, 2, 3, 4]
+        assert pool.pending_count == 0
+        pool.shutdown()
+
+    def test_failures_are_drained(self):
+        """Test failed jobs are reported once"""
+        pool = BackgroundWriterPool(max_workers=1)
+
+        def fail():
+            raise IOError("disk full")
+
+        pool.submit(fail, label="broken.png")
+        pool.flush(timeout=5)
+
+        errors = pool.drain_errors()
+        assert errors == [{"filename": "broken.png", "error": "disk full"}]
+        assert pool.drain_errors() == []
+        pool.shutdown()
+
+    def test_backpressure_limits_pending(self):
+        """Test submit blocks once max_pending jobs are in flight"""
+        import threading
+
+        pool = BackgroundWriterPool(max_workers=1, max_pending=2)
+        release = threading.Event()
+
+        pool.submit(release.wait, label="a")
+        pool.submit(release.wait, label="b")
+        assert pool.pending_count == 2
+
+        third = threading.Thread(target=pool.submit, args=(lambda: None,))
+        third.start()
+        third.join(timeout=0.2)
+        assert third.is_alive()  # Blocked waiting for a free slot
+
+        release.set()
+        third.join(timeout=5)
+        assert not third.is_alive()
+        pool.flush(timeout=5)
+        pool.shutdown()
+
+    def test_batch_wait_returns_its_failures(self):
+        """Test a batch reports its own failures and leaves the pool's alone"""
+        pool = BackgroundWriterPool(max_workers=2)
+        results = []
+
+        def fail():
+            raise IOError("disk full")
+
+        batch = pool.batch()
+        batch.submit(results.append, 1, label="ok.png")
+        batch.submit(fail, label="broken.png")
+
+        assert len(batch) == 2
+        assert batch.wait() == [{"filename": "broken.png", "error": "disk full"}]
+        assert results == [1]
+        pool.flush(timeout=5)
+        assert pool.drain_errors() == []
+        pool.shutdown()
+
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_process_image_batch_async(self, mock_folder_paths):
+        """Test async batch returns only once its files exist"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+
+            results, enhanced_data = process_image_batch(
+                images=torch.rand(3, 16, 16, 3),
+                filename_prefix="async_test",
+                format_type="PNG",
+                async_save=True,
+            )
+
+            assert len(results) == 3
+            for result, data in zip(results, enhanced_data):
+                filepath = os.path.join(temp_dir, result["filename"])
+                assert os.path.exists(filepath)
+                assert data["file_size"] == os.path.getsize(filepath)
+                assert "encode_seconds" in data
+                assert "error" not in data
+
+    @patch("kikotools.tools.kiko_save_image.logic.save_image_with_format")
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_process_image_batch_async_failure(self, mock_folder_paths, mock_save):
+        """Test a failed background write is reported by the same run"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            mock_save.side_effect = IOError("disk full")
+
+            results, enhanced_data = process_image_batch(
+                images=torch.rand(2, 16, 16, 3),
+                filename_prefix="async_fail",
+                format_type="PNG",
+                async_save=True,
+            )
+
+            assert results == []
+            assert [data["error"] for data in enhanced_data] == ["disk full"] * 2
+
+
 class TestKikoSaveImageNode:
     """Test KikoSaveImageNode class"""
 
@@ -398,6 +1020,10 @@ class TestKikoSaveImageNode:
         assert "png_compress_level" in optional
         assert "webp_lossless" in optional
         assert "popup" in optional
+        assert "async_save" in optional
+        assert "png_metadata" in optional
+        assert "chunk_frames" in optional
+        assert "dedup" in optional
 
         # Check hidden inputs
         hidden = input_types["hidden"]
@@ -456,6 +1082,27 @@ class TestKikoSaveImageNode:
         assert result["ui"]["images"] == mock_results
         assert result["ui"]["kiko_enhanced"] == mock_enhanced
 
+    @patch("kikotools.tools.kiko_save_image.logic.save_image_with_format")
+    @patch("kikotools.tools.kiko_save_image.logic.folder_paths")
+    def test_save_images_async_failure_reported(self, mock_folder_paths, mock_save):
+        """Test failed background writes are reported, not previewed"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_folder_paths.get_output_directory.return_value = temp_dir
+            mock_save.side_effect = IOError("disk full")
+
+            result = self.node.save_images(
+                images=torch.rand(1, 16, 16, 3),
+                filename_prefix="node_fail",
+                format="PNG",
+                async_save=True,
+            )
+
+        ui = result["ui"]
+        assert ui["images"] == []
+        assert ui["kiko_enhanced"] == []
+        assert len(ui["kiko_errors"]) == 1
+        assert ui["kiko_errors"][0]["error"] == "disk full"
+
     def test_validate_inputs_success(self):
         """Test input validation with valid inputs"""
         images = torch.rand(1, 32, 32, 3)
@@ -499,6 +1146,49 @@ class TestKikoSaveImageNode:
                 popup="not_boolean",
             )
 
+    def test_validate_inputs_invalid_animation(self):
+        """Test validation of animation options"""
+        images = torch.rand(2, 32, 32, 3)
+        base = dict(
+            images=images,
+            format="PNG",
+            quality=90,
+            png_compress_level=4,
+            webp_lossless=False,
+            popup=True,
+        )
+
+        with pytest.raises(ValueError, match="animation must be one of"):
+            self.node.validate_inputs(**base, animation="MP4")
+        with pytest.raises(ValueError, match="frame_duration must be"):
+            self.node.validate_inputs(**base, animation="GIF", frame_duration=0)
+        with pytest.raises(ValueError, match="loop_count must be"):
+            self.node.validate_inputs(**base, animation="GIF", loop_count=-1)
+
+    @patch("kikotools.tools.kiko_save_image.node.save_animation")
+    def test_save_images_animation(self, mock_save_animation):
+        """Test animation mode saves one file instead of per-image files"""
+        mock_save_animation.return_value = (
+            [{"filename": "anim_00001_.gif", "subfolder": "", "type": "output"}],
+            [
+                {
+                    "filename": "anim_00001_.gif",
+                    "file_size": 2048,
+                    "encode_seconds": 0.1,
+                    "animated": True,
+                }
+            ],
+        )
+
+        result = self.node.save_images(
+            images=torch.rand(3, 16, 16, 3), animation="GIF", frame_duration=40
+        )
+
+        assert result["ui"]["kiko_enhanced"][0]["animated"] is True
+        kwargs = mock_save_animation.call_args[1]
+        assert kwargs["animation"] == "GIF"
+        assert kwargs["frame_duration"] == 40
+
     @patch("kikotools.tools.kiko_save_image.node.process_image_batch")
     def test_save_images_error_handling(self, mock_process):
         """Test error handling in save_images method"""
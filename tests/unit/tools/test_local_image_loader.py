@@ -1,7 +1,12 @@
 """Unit tests for Local Image Loader tool."""
 
+import asyncio
+import io
 import json
 import os
+import struct
+import threading
+import time
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
@@ -10,13 +15,48 @@ import pytest
 import torch
 from PIL import Image, PngImagePlugin
 
+from kikotools.tools.local_image_loader.directory_index import (
+    DirectoryIndex,
+    DirectoryIndexRegistry,
+)
+from kikotools.tools.local_image_loader.executor import (
+    ClientDisconnectedError,
+    EndpointMetrics,
+    ExecutorBusyError,
+    RouteExecutor,
+    RouteMetrics,
+    get_route_executor,
+)
 from kikotools.tools.local_image_loader.logic import (
     create_empty_tensor,
     get_supported_extensions,
+    list_subdirectories,
     load_image_from_path,
     scan_directory,
+    search_files,
+)
+from kikotools.tools.local_image_loader.metadata import (
+    MetadataCache,
+    decode_user_comment,
+    read_metadata,
+)
+from kikotools.tools.local_image_loader.node import (
+    LocalImageLoaderNode,
+    check_view_file,
+    list_images,
+    set_selection,
+)
+from kikotools.tools.local_image_loader.search_index import SearchIndex
+from kikotools.tools.local_image_loader.store import JsonStore
+from kikotools.tools.local_image_loader.thumbnails import (
+    ThumbnailCache,
+    decode_reduced,
+    exif_thumbnail,
+    is_not_modified,
+    render_thumbnail,
+    thumbnail_dimensions,
+    thumbnail_key,
 )
-from kikotools.tools.local_image_loader.node import LocalImageLoaderNode
 
 
 class TestLocalImageLoaderLogic:
@@ -288,3 +328,966 @@ class TestLocalImageLoaderNode:
         ):
             result = LocalImageLoaderNode.IS_CHANGED()
             assert result == 12345.0
+
+
+class TestThumbnailCache:
+    """Test the content-addressed thumbnail cache."""
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        path = tmp_path / "photo.jpg"
+        Image.new("RGB", (800, 600), color="blue").save(path)
+        return str(path)
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return ThumbnailCache(cache_dir=str(tmp_path / "cache"))
+
+    def test_generates_bounded_thumbnail(self, cache, source):
+        """Test a miss renders a thumbnail within the bounding box."""
+        thumbnail = cache.get(source, 320)
+
+        assert thumbnail.content_type == "image/jpeg"
+        with Image.open(io.BytesIO(thumbnail.data)) as img:
+            assert img.size == (320, 240)
+
+    def test_alpha_images_become_png(self, cache, tmp_path):
+        """Test transparent sources keep their alpha channel."""
+        path = tmp_path / "alpha.png"
+        Image.new("RGBA", (64, 64), (255, 0, 0, 128)).save(path)
+
+        thumbnail = cache.get(str(path), 32)
+
+        assert thumbnail.content_type == "image/png"
+        with Image.open(io.BytesIO(thumbnail.data)) as img:
+            assert img.mode == "RGBA"
+
+    def test_memory_hit_skips_decoding(self, cache, source):
+        """Test a repeated request is served without rendering."""
+        first = cache.get(source, 320)
+        with patch(
+            "kikotools.tools.local_image_loader.thumbnails.render_thumbnail"
+        ) as render:
+            second = cache.get(source, 320)
+
+        render.assert_not_called()
+        assert second.data == first.data
+        assert second.etag == first.etag
+
+    def test_disk_store_survives_new_cache(self, cache, source):
+        """Test thumbnails are reloaded from disk by a fresh cache."""
+        first = cache.get(source, 320)
+        fresh = ThumbnailCache(cache_dir=cache.cache_dir)
+        with patch(
+            "kikotools.tools.local_image_loader.thumbnails.render_thumbnail"
+        ) as render:
+            second = fresh.get(source, 320)
+
+        render.assert_not_called()
+        assert second.data == first.data
+
+    def test_modified_source_changes_key(self, cache, source):
+        """Test a rewritten source gets a new ETag and a new thumbnail."""
+        first = cache.get(source, 320)
+        Image.new("RGB", (400, 400), color="green").save(source)
+        stats = os.stat(source)
+        os.utime(source, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1_000_000))
+
+        second = cache.get(source, 320)
+
+        assert second.etag != first.etag
+        assert second.data != first.data
+
+    def test_key_includes_thumbnail_size(self, source):
+        """Test different thumbnail sizes are cached separately."""
+        stats = os.stat(source)
+        assert thumbnail_key(source, stats, 320) != thumbnail_key(source, stats, 160)
+
+    def test_memory_budget_evicts_oldest(self, tmp_path):
+        """Test the memory LRU stays within its byte budget."""
+        cache = ThumbnailCache(cache_dir=str(tmp_path / "cache"), max_memory_bytes=1)
+        cache._remember("a", b"x", ".jpg")
+        cache._remember("b", b"y", ".jpg")
+
+        assert len(cache) == 1
+        assert cache._recall("a") is None
+        assert cache._recall("b") == (b"y", ".jpg")
+
+    def test_disk_budget_prunes_store(self, tmp_path, source):
+        """Test the on-disk store is pruned when over budget."""
+        cache = ThumbnailCache(cache_dir=str(tmp_path / "cache"), max_disk_bytes=1)
+        cache.get(source, 320)
+
+        assert list(cache._scan_disk()) == []
+
+    def test_conditional_request_returns_no_data(self, cache, source):
+        """Test a matching If-None-Match skips reading the thumbnail."""
+        etag = cache.get(source, 320).etag
+        with patch(
+            "kikotools.tools.local_image_loader.thumbnails.render_thumbnail"
+        ) as render:
+            thumbnail = cache.get(source, 320, {"If-None-Match": etag})
+
+        render.assert_not_called()
+        assert thumbnail.data is None
+        assert thumbnail.etag == etag
+
+    def test_response_headers(self, cache, source):
+        """Test responses carry cache validators."""
+        headers = cache.get(source, 320).headers
+
+        assert headers["ETag"].startswith('"')
+        assert headers["Last-Modified"].endswith("GMT")
+        assert headers["Cache-Control"] == "no-cache"
+
+    def test_is_not_modified(self, cache, source):
+        """Test conditional header evaluation."""
+        thumbnail = cache.get(source, 320)
+        last_modified = thumbnail.headers["Last-Modified"]
+
+        assert is_not_modified(thumbnail, {"If-None-Match": thumbnail.etag})
+        assert is_not_modified(thumbnail, {"If-None-Match": f'"x", {thumbnail.etag}'})
+        assert not is_not_modified(thumbnail, {"If-None-Match": '"other"'})
+        assert is_not_modified(thumbnail, {"If-Modified-Since": last_modified})
+        assert not is_not_modified(
+            thumbnail, {"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}
+        )
+        assert not is_not_modified(thumbnail, {"If-Modified-Since": "garbage"})
+        assert not is_not_modified(thumbnail, {})
+
+
+def exif_with_thumbnail(thumbnail: Image.Image) -> bytes:
+    """Build EXIF data whose IFD1 embeds a JPEG thumbnail."""
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format="JPEG")
+    jpeg = buffer.getvalue()
+
+    # TIFF header, empty IFD0 pointing at IFD1, IFD1 with offset/length tags
+    ifd1_offset = 8 + 2 + 4
+    data_offset = ifd1_offset + 2 + 2 * 12 + 4
+    tiff = b"II*\x00" + struct.pack("<I", 8)
+    tiff += struct.pack("<H", 0) + struct.pack("<I", ifd1_offset)
+    tiff += struct.pack("<H", 2)
+    tiff += struct.pack("<HHII", 0x0201, 4, 1, data_offset)
+    tiff += struct.pack("<HHII", 0x0202, 4, 1, len(jpeg))
+    tiff += struct.pack("<I", 0)
+    return b"Exif\x00\x00" + tiff + jpeg
+
+
+class TestThumbnailDecoding:
+    """Test reduced-resolution thumbnail decoding."""
+
+    def test_thumbnail_dimensions(self):
+        """Test images are fitted to the box without upscaling."""
+        assert thumbnail_dimensions(6000, 4000, 320) == (320, 213)
+        assert thumbnail_dimensions(400, 1600, 320) == (80, 320)
+        assert thumbnail_dimensions(100, 50, 320) == (100, 50)
+        assert thumbnail_dimensions(5000, 2, 320) == (320, 1)
+
+    def test_jpeg_uses_dct_scaling(self, tmp_path):
+        """Test large JPEGs are decoded at a fraction of full size."""
+        path = tmp_path / "large.jpg"
+        Image.new("RGB", (4000, 3000), color="red").save(path)
+
+        with Image.open(path) as img:
+            decoded = decode_reduced(img, (320, 240), "RGB")
+            assert decoded.size == (1000, 750)
+
+    def test_png_is_reduced_before_resampling(self, tmp_path):
+        """Test large PNGs are box-reduced to near twice the target."""
+        path = tmp_path / "large.png"
+        Image.new("RGB", (3200, 2400), color="red").save(path)
+
+        with Image.open(path) as img:
+            decoded = decode_reduced(img, (320, 240), "RGB")
+            assert decoded.size == (640, 480)
+
+    def test_palette_images_are_converted(self, tmp_path):
+        """Test modes reduce() cannot handle are converted first."""
+        path = tmp_path / "palette.png"
+        Image.new("P", (1600, 1600)).save(path)
+
+        with Image.open(path) as img:
+            decoded = decode_reduced(img, (320, 320), "RGB")
+            assert decoded.mode == "RGB"
+            assert decoded.size == (800, 800)
+
+    def test_small_images_are_not_reduced(self, tmp_path):
+        """Test images near the target size are decoded as-is."""
+        path = tmp_path / "small.jpg"
+        Image.new("RGB", (500, 400)).save(path)
+
+        with Image.open(path) as img:
+            assert decode_reduced(img, (320, 256), "RGB").size == (500, 400)
+
+    def test_rendered_size_and_color(self, tmp_path):
+        """Test reduced decoding still produces the right thumbnail."""
+        path = tmp_path / "large.jpg"
+        Image.new("RGB", (4000, 3000), color=(200, 30, 30)).save(path)
+
+        data, extension = render_thumbnail(str(path), 320)
+
+        assert extension == ".jpg"
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.size == (320, 240)
+            red, green, blue = img.getpixel((160, 120))
+            assert abs(red - 200) < 8 and green < 40 and blue < 40
+
+    def test_uses_embedded_exif_thumbnail(self, tmp_path):
+        """Test a large enough EXIF thumbnail replaces decoding."""
+        path = tmp_path / "camera.jpg"
+        embedded = Image.new("RGB", (400, 300), color=(0, 200, 0))
+        Image.new("RGB", (4000, 3000), color=(200, 0, 0)).save(
+            path, exif=exif_with_thumbnail(embedded)
+        )
+
+        with patch(
+            "kikotools.tools.local_image_loader.thumbnails.decode_reduced"
+        ) as decode:
+            data, _ = render_thumbnail(str(path), 320)
+
+        decode.assert_not_called()
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.size == (320, 240)
+            red, green, _ = img.getpixel((160, 120))
+            assert green > 150 and red < 50
+
+    def test_small_exif_thumbnail_is_ignored(self, tmp_path):
+        """Test EXIF thumbnails smaller than the target are not upscaled."""
+        path = tmp_path / "camera.jpg"
+        embedded = Image.new("RGB", (160, 120))
+        Image.new("RGB", (4000, 3000)).save(path, exif=exif_with_thumbnail(embedded))
+
+        with Image.open(path) as img:
+            assert exif_thumbnail(img, (320, 240)) is None
+            assert exif_thumbnail(img, (160, 120)).size == (160, 120)
+
+    def test_letterboxed_exif_thumbnail_is_ignored(self, tmp_path):
+        """Test EXIF thumbnails with a different aspect ratio are not used."""
+        path = tmp_path / "camera.jpg"
+        embedded = Image.new("RGB", (640, 480))
+        Image.new("RGB", (6000, 4000)).save(path, exif=exif_with_thumbnail(embedded))
+
+        with Image.open(path) as img:
+            assert exif_thumbnail(img, (320, 213)) is None
+
+    def test_missing_exif_thumbnail(self, tmp_path):
+        """Test images without EXIF thumbnails fall back to decoding."""
+        path = tmp_path / "plain.jpg"
+        Image.new("RGB", (400, 300)).save(path)
+
+        with Image.open(path) as img:
+            assert exif_thumbnail(img, (320, 240)) is None
+
+
+class TestDirectoryIndex:
+    """Test the incrementally maintained directory index."""
+
+    @pytest.fixture
+    def directory(self, tmp_path):
+        for i, name in enumerate(["sub_b", "Sub_a", ".hidden"]):
+            (tmp_path / name).mkdir()
+            os.utime(tmp_path / name, (2000 + i, 2000 - i))
+        for i, name in enumerate(["c.png", "A.jpg", "b.webp", ".dot.png"]):
+            path = tmp_path / name
+            path.write_bytes(b"x" * (10 * (i + 1)))
+            os.utime(path, (1000 + i, 1000 + (7 * i) % 4))
+        (tmp_path / "clip.mp4").write_bytes(b"x" * 5)
+        (tmp_path / "notes.txt").write_bytes(b"x")
+        return tmp_path
+
+    def _names(self, items):
+        return [item["name"] for item in items]
+
+    @pytest.mark.parametrize("sort_by", ["name", "date", "size"])
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_view_matches_scan_directory(self, directory, sort_by, sort_order):
+        """Test presorted views list what a full scan would."""
+        index = DirectoryIndex(str(directory))
+        for show_videos in (False, True):
+            for hide_dot_folders in (False, True):
+                expected = scan_directory(
+                    str(directory),
+                    show_videos=show_videos,
+                    sort_by=sort_by,
+                    sort_order=sort_order,
+                    hide_dot_folders=hide_dot_folders,
+                )
+                view = index.view(
+                    sort_by,
+                    sort_order,
+                    show_videos=show_videos,
+                    hide_dot_folders=hide_dot_folders,
+                )
+                if sort_by == "size":
+                    # Directories tie on size; a full scan keeps listing order
+                    assert [(i["type"], i["size"]) for i in view] == [
+                        (i["type"], i["size"]) for i in expected
+                    ]
+                    assert sorted(self._names(view)) == sorted(self._names(expected))
+                else:
+                    assert view == expected
+
+    def test_directories_first_when_descending(self, directory):
+        """Test descending order keeps directories ahead of files."""
+        index = DirectoryIndex(str(directory))
+        names = self._names(index.view("name", "desc"))
+
+        assert names == ["sub_b", "Sub_a", "c.png", "b.webp", "A.jpg"]
+
+    def test_page(self, directory):
+        """Test pages are slices of the sorted view."""
+        index = DirectoryIndex(str(directory))
+
+        items, total = index.page(2, 2)
+        assert total == 5
+        assert self._names(items) == ["A.jpg", "b.webp"]
+
+        items, total = index.page(4, 2)
+        assert items == []
+
+    def test_view_is_cached_until_change(self, directory):
+        """Test unchanged listings are served without rescanning."""
+        index = DirectoryIndex(str(directory))
+        first = index.view()
+
+        with patch(
+            "kikotools.tools.local_image_loader.directory_index.scan_entries"
+        ) as scan:
+            assert index.view() is first
+        scan.assert_not_called()
+
+    def test_added_and_removed_files(self, directory):
+        """Test directory changes are picked up from its mtime."""
+        index = DirectoryIndex(str(directory))
+        index.view()
+
+        (directory / "d.png").write_bytes(b"x")
+        (directory / "c.png").unlink()
+        stats = os.stat(directory)
+        os.utime(directory, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1_000_000))
+
+        names = self._names(index.view())
+        assert "d.png" in names
+        assert "c.png" not in names
+        assert names == self._names(scan_directory(str(directory)))
+
+    def test_rewritten_file_is_revalidated(self, directory):
+        """Test in-place rewrites are found once the listing expires."""
+        index = DirectoryIndex(str(directory), revalidate_interval=0)
+        index.view()
+
+        (directory / "c.png").write_bytes(b"x" * 1000)
+
+        sizes = {item["name"]: item["size"] for item in index.view()}
+        assert sizes["c.png"] == 1000
+
+    def test_watcher_changes_skip_rescan(self, directory):
+        """Test watched changes update single entries without a scan."""
+        index = DirectoryIndex(str(directory), revalidate_interval=3600)
+        index.view()
+        index._watch = object()
+
+        (directory / "e.jpg").write_bytes(b"x")
+        (directory / "A.jpg").unlink()
+        index.mark_changed(str(directory / "e.jpg"))
+        index.mark_changed(str(directory / "A.jpg"))
+        index.mark_changed(str(directory / "sub_b" / "nested.png"))
+
+        with patch(
+            "kikotools.tools.local_image_loader.directory_index.scan_entries"
+        ) as scan:
+            names = self._names(index.view())
+
+        scan.assert_not_called()
+        assert names == ["Sub_a", "sub_b", "b.webp", "c.png", "e.jpg"]
+        assert names == self._names(scan_directory(str(directory)))
+
+    def test_missing_directory(self, tmp_path):
+        """Test a removed directory raises NotADirectoryError."""
+        index = DirectoryIndex(str(tmp_path / "gone"))
+
+        with pytest.raises(NotADirectoryError):
+            index.view()
+
+    def test_registry_reuses_and_evicts(self, tmp_path):
+        """Test the registry keeps recent directories only."""
+        registry = DirectoryIndexRegistry(max_directories=2, watch=False)
+        first = registry.get(str(tmp_path))
+
+        assert registry.get(str(tmp_path) + os.sep) is first
+
+        registry.get(str(tmp_path / "a"))
+        registry.get(str(tmp_path / "b"))
+        assert registry.get(str(tmp_path)) is not first
+
+
+class TestRouteExecutor:
+    """Test the bounded executor used by the API routes."""
+
+    @pytest.fixture
+    def metrics(self):
+        return RouteMetrics()
+
+    def _run(self, executor, *args, **kwargs):
+        return asyncio.run(executor.run(*args, **kwargs))
+
+    def test_runs_off_the_event_loop(self, metrics):
+        """Test jobs run in worker threads and their results are returned."""
+        executor = RouteExecutor(2, 4, metrics=metrics)
+        main_thread = threading.get_ident()
+
+        result = self._run(executor, "images", threading.get_ident)
+
+        assert result != main_thread
+        snapshot = metrics.snapshot()["images"]
+        assert snapshot["ok"] == 1
+        assert snapshot["in_flight"] == 0
+        assert executor.pending == 0
+
+    def test_errors_propagate(self, metrics):
+        """Test job exceptions reach the caller and are counted."""
+        executor = RouteExecutor(1, 4, metrics=metrics)
+
+        with pytest.raises(FileNotFoundError):
+            self._run(executor, "images", os.listdir, "/nonexistent/directory")
+
+        assert metrics.snapshot()["images"]["error"] == 1
+
+    def test_timeout(self, metrics):
+        """Test slow jobs time out and still release their slot."""
+        executor = RouteExecutor(1, 4, metrics=metrics)
+
+        with pytest.raises(TimeoutError):
+            self._run(executor, "images", time.sleep, 0.3, timeout=0.05)
+
+        assert metrics.snapshot()["images"]["timeout"] == 1
+        assert executor.pending == 1
+        time.sleep(0.4)
+        assert executor.pending == 0
+
+    def test_disconnect_cancels_queued_job(self, metrics):
+        """Test a disconnected client's queued job never runs."""
+        executor = RouteExecutor(1, 4, metrics=metrics)
+        release = threading.Event()
+        ran = []
+        blocker = executor.submit(release.wait, 5)
+
+        with pytest.raises(ClientDisconnectedError):
+            self._run(
+                executor,
+                "thumbnail",
+                ran.append,
+                True,
+                is_disconnected=lambda: True,
+            )
+
+        release.set()
+        blocker.result()
+        assert ran == []
+        assert metrics.snapshot()["thumbnail"]["cancelled"] == 1
+        assert executor.pending == 0
+
+    def test_rejects_when_saturated(self, metrics):
+        """Test submissions beyond max_pending are rejected immediately."""
+        executor = RouteExecutor(1, 1, metrics=metrics)
+        release = threading.Event()
+        blocker = executor.submit(release.wait, 5)
+
+        with pytest.raises(ExecutorBusyError):
+            self._run(executor, "images", len, "")
+
+        release.set()
+        blocker.result()
+        assert metrics.snapshot()["images"]["rejected"] == 1
+        assert self._run(executor, "images", len, "abc") == 3
+
+    def test_latency_percentiles(self):
+        """Test latency percentiles over the recorded window."""
+        metrics = EndpointMetrics(window=100)
+        for milliseconds in range(1, 101):
+            metrics.start()
+            metrics.record("ok", milliseconds / 1000)
+
+        snapshot = metrics.snapshot()
+        assert snapshot["requests"] == 100
+        assert snapshot["p50_ms"] == pytest.approx(51)
+        assert snapshot["p95_ms"] == pytest.approx(96)
+        assert snapshot["p99_ms"] == pytest.approx(100)
+        assert snapshot["max_ms"] == pytest.approx(100)
+        assert snapshot["mean_ms"] == pytest.approx(50.5)
+
+    def test_unknown_pool(self):
+        """Test requesting an unknown pool raises ValueError."""
+        with pytest.raises(ValueError, match="pool must be one of"):
+            get_route_executor("gpu")
+
+
+class TestRouteHelpers:
+    """Test the blocking work behind the API routes."""
+
+    @pytest.fixture
+    def directory(self, tmp_path):
+        for name in ["Beta", "alpha", "apple", ".git"]:
+            (tmp_path / name).mkdir()
+        for name in ["a.png", "b.jpg", "c.png"]:
+            (tmp_path / name).write_bytes(b"x")
+        return tmp_path
+
+    def test_list_subdirectories_of_directory(self, directory):
+        """Test a trailing separator lists every subdirectory."""
+        result = list_subdirectories(str(directory) + os.sep)
+
+        names = [os.path.basename(path) for path in result["directories"]]
+        assert names == [".git", "alpha", "apple", "Beta"]
+
+    def test_list_subdirectories_by_prefix(self, directory):
+        """Test partial names match subdirectories case-insensitively."""
+        result = list_subdirectories(str(directory / "A"))
+
+        names = [os.path.basename(path) for path in result["directories"]]
+        assert names == ["alpha", "apple"]
+
+    def test_list_subdirectories_edge_cases(self, directory):
+        """Test empty, relative and missing paths."""
+        if os.name != "nt":
+            assert list_subdirectories("") == {"directories": ["/"]}
+        assert list_subdirectories("relative") == {"directories": []}
+        assert list_subdirectories(str(directory / "missing" / "x")) == {
+            "directories": []
+        }
+
+    def test_list_images(self, directory):
+        """Test a listing page and the remembered directory."""
+        store = JsonStore(str(directory / "config.json"))
+        with patch(
+            "kikotools.tools.local_image_loader.node.get_config_store",
+            return_value=store,
+        ):
+            result = list_images(str(directory) + os.sep, page=2, per_page=2)
+
+        assert [item["name"] for item in result["items"]] == ["Beta", "a.png"]
+        assert result["total_pages"] == 3
+        assert result["current_page"] == 2
+        assert result["current_directory"] == str(directory)
+        assert result["parent_directory"] == str(directory.parent)
+        assert store.get("last_path") == str(directory)
+
+    def test_list_images_missing_directory(self, tmp_path):
+        """Test a missing directory raises NotADirectoryError."""
+        with pytest.raises(NotADirectoryError):
+            list_images(str(tmp_path / "missing"))
+
+    def test_check_view_file(self, directory):
+        """Test only existing regular files are served."""
+        assert check_view_file(str(directory / "a.png")) == str(directory / "a.png")
+        with pytest.raises(FileNotFoundError):
+            check_view_file(str(directory / "missing.png"))
+        with pytest.raises(FileNotFoundError):
+            check_view_file(str(directory / "alpha"))
+
+
+class TestSearchIndex:
+    """Test the persistent filename search index."""
+
+    @pytest.fixture
+    def tree(self, tmp_path):
+        root = tmp_path / "outputs"
+        (root / "portraits" / "2024").mkdir(parents=True)
+        (root / "landscapes").mkdir()
+        for path in [
+            "cat.png",
+            "portraits/black_cat_sitting.png",
+            "portraits/2024/catalog.jpg",
+            "landscapes/mountain.webp",
+            "landscapes/cat_video.mp4",
+            "landscapes/notes.txt",
+        ]:
+            (root / path).write_bytes(b"x")
+        return root
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = SearchIndex(str(tmp_path / "index.sqlite3"))
+        yield index
+        index.close()
+
+    def _names(self, results):
+        return [result["name"] for result in results]
+
+    def test_ranked_substring_search(self, index, tree):
+        """Test exact, prefix and substring matches in rank order."""
+        results = index.search(str(tree), "cat")
+
+        assert self._names(results) == [
+            "cat.png",
+            "catalog.jpg",
+            "black_cat_sitting.png",
+        ]
+        first = results[0]
+        assert first["path"] == str(tree / "cat.png")
+        assert first["directory"] == str(tree)
+        assert first["type"] == "image"
+        assert first["size"] == 1
+
+    def test_case_insensitive(self, index, tree):
+        """Test queries match regardless of case."""
+        assert self._names(index.search(str(tree), "MOUNTAIN")) == ["mountain.webp"]
+
+    def test_short_queries(self, index, tree):
+        """Test queries shorter than a trigram still match."""
+        assert "mountain.webp" in self._names(index.search(str(tree), "mo"))
+
+    def test_media_filters_and_directories(self, index, tree):
+        """Test videos are opt-in and matching directories are included."""
+        assert "cat_video.mp4" not in self._names(index.search(str(tree), "cat"))
+        assert "cat_video.mp4" in self._names(
+            index.search(str(tree), "cat", show_videos=True)
+        )
+        assert self._names(index.search(str(tree), "portrait")) == ["portraits"]
+        assert index.search(str(tree), "notes") == []
+
+    def test_search_is_limited_to_root(self, index, tree):
+        """Test results come only from below the searched directory."""
+        index.search(str(tree), "cat")
+
+        results = index.search(str(tree / "portraits"), "cat")
+        assert self._names(results) == ["catalog.jpg", "black_cat_sitting.png"]
+
+    def test_max_results(self, index, tree):
+        """Test the number of results is limited."""
+        assert len(index.search(str(tree), "cat", max_results=2)) == 2
+
+    def test_incremental_refresh(self, index, tree):
+        """Test only directories whose mtime changed are re-listed."""
+        index.refresh(str(tree))
+        (tree / "landscapes" / "cathedral.png").write_bytes(b"x")
+        (tree / "cat.png").unlink()
+        for directory in (tree, tree / "landscapes"):
+            stats = os.stat(directory)
+            os.utime(directory, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1_000_000))
+
+        listed = []
+        original = index._index_directory
+
+        def record(directory, mtime_ns):
+            listed.append(directory)
+            return original(directory, mtime_ns)
+
+        with patch.object(index, "_index_directory", side_effect=record):
+            index.refresh(str(tree))
+
+        assert sorted(listed) == [str(tree), str(tree / "landscapes")]
+        names = self._names(index.search(str(tree), "cat"))
+        assert "cathedral.png" in names
+        assert "cat.png" not in names
+
+    def test_removed_directories_are_dropped(self, index, tree):
+        """Test entries below a deleted directory disappear."""
+        index.refresh(str(tree))
+        (tree / "portraits" / "2024" / "catalog.jpg").unlink()
+        (tree / "portraits" / "2024").rmdir()
+
+        index.refresh(str(tree))
+
+        assert "catalog.jpg" not in self._names(index.search(str(tree), "cat"))
+
+    def test_index_persists(self, tmp_path, tree):
+        """Test a reopened index answers without re-listing directories."""
+        index_file = str(tmp_path / "index.sqlite3")
+        SearchIndex(index_file).refresh(str(tree))
+
+        reopened = SearchIndex(index_file)
+        with patch.object(reopened, "_index_directory") as index_directory:
+            results = reopened.search(str(tree), "mountain")
+
+        index_directory.assert_not_called()
+        assert self._names(results) == ["mountain.webp"]
+        reopened.close()
+
+    def test_corrupt_index_is_rebuilt(self, tmp_path, tree):
+        """Test a corrupt database and its WAL files are replaced."""
+        index_file = tmp_path / "index.sqlite3"
+        index_file.write_bytes(b"not a database" * 100)
+        (tmp_path / "index.sqlite3-wal").write_bytes(b"stale wal")
+        (tmp_path / "index.sqlite3-shm").write_bytes(b"stale shm")
+
+        index = SearchIndex(str(index_file))
+
+        assert not (tmp_path / "index.sqlite3-shm").read_bytes().startswith(b"stale")
+        assert self._names(index.search(str(tree), "mountain")) == ["mountain.webp"]
+        index.close()
+
+    def test_discard_tolerates_missing_files(self, tmp_path):
+        """Test discarding an index whose files are already gone."""
+        index = SearchIndex(str(tmp_path / "index.sqlite3"))
+        index._discard()
+        index._discard()
+
+        memory = SearchIndex(":memory:")
+        memory._discard()
+
+    def test_max_depth(self, tmp_path, tree):
+        """Test directories below max_depth are not indexed."""
+        index = SearchIndex(str(tmp_path / "index.sqlite3"), max_depth=1)
+
+        assert "catalog.jpg" not in self._names(index.search(str(tree), "cat"))
+        index.close()
+
+    def test_search_files(self, tree):
+        """Test search_files validates input before using the index."""
+        with pytest.raises(NotADirectoryError):
+            search_files(str(tree / "missing"), "cat")
+        assert search_files(str(tree), "   ") == []
+
+
+class TestJsonStore:
+    """Test the in-memory settings store with debounced atomic writes."""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps({"last_path": "/old", "saved_paths": ["/a"]}))
+        return path
+
+    def test_reads_from_memory(self, path):
+        """Test the file is read once and later reads stay in memory."""
+        store = JsonStore(str(path))
+        assert store.get("last_path") == "/old"
+
+        path.write_text(json.dumps({"last_path": "/changed"}))
+        assert store.get("last_path") == "/old"
+        assert store.snapshot() == {"last_path": "/old", "saved_paths": ["/a"]}
+
+    def test_missing_or_invalid_file(self, tmp_path):
+        """Test unreadable files start an empty document."""
+        (tmp_path / "bad.json").write_text("{not json")
+
+        assert JsonStore(str(tmp_path / "missing.json")).snapshot() == {}
+        assert JsonStore(str(tmp_path / "bad.json")).snapshot() == {}
+
+    def test_returned_values_are_copies(self, path):
+        """Test callers cannot modify the document without a write."""
+        store = JsonStore(str(path))
+        store.get("saved_paths").append("/b")
+        store.snapshot()["last_path"] = "/c"
+
+        assert store.snapshot() == {"last_path": "/old", "saved_paths": ["/a"]}
+        assert not store.flush()
+
+    def test_writes_are_coalesced(self, path):
+        """Test many changes within the debounce window become one write."""
+        store = JsonStore(str(path), debounce=0.05, indent=4)
+        for i in range(20):
+            store.set("last_path", f"/path/{i}")
+
+        assert json.loads(path.read_text())["last_path"] == "/old"
+        time.sleep(0.3)
+        assert store.writes == 1
+        assert json.loads(path.read_text())["last_path"] == "/path/19"
+
+    def test_unchanged_values_are_not_written(self, path):
+        """Test setting the current value schedules no write."""
+        store = JsonStore(str(path), debounce=0.01)
+        store.set("last_path", "/old")
+        store.update(lambda data: data.setdefault("saved_paths", []))
+
+        assert not store.flush()
+        assert store.writes == 0
+
+    def test_flush_writes_atomically(self, path):
+        """Test flushing replaces the file and leaves no temporary files."""
+        store = JsonStore(str(path), debounce=60)
+        store.set("last_path", "/new")
+
+        with patch("os.replace", wraps=os.replace) as replace:
+            assert store.flush()
+
+        replace.assert_called_once()
+        assert replace.call_args[0][1] == str(path)
+        assert json.loads(path.read_text())["last_path"] == "/new"
+        assert os.listdir(path.parent) == ["config.json"]
+
+    def test_failed_write_is_retried(self, path):
+        """Test a failed write keeps the change pending."""
+        store = JsonStore(str(path), debounce=60)
+        store.set("last_path", "/new")
+
+        with patch("os.replace", side_effect=OSError("disk full")):
+            assert not store.flush()
+        assert os.listdir(path.parent) == ["config.json"]
+
+        assert store.flush()
+        assert json.loads(path.read_text())["last_path"] == "/new"
+
+    def test_concurrent_updates_are_not_lost(self, tmp_path):
+        """Test concurrent selections from several tabs are all kept."""
+        store = JsonStore(str(tmp_path / "selections.json"), debounce=0.01)
+
+        def select(node_id):
+            for media_type in ("image", "video", "audio"):
+                with patch(
+                    "kikotools.tools.local_image_loader.node.get_selection_store",
+                    return_value=store,
+                ):
+                    set_selection(node_id, media_type, f"/{node_id}/{media_type}")
+
+        threads = [threading.Thread(target=select, args=(str(i),)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush()
+
+        saved = json.loads((tmp_path / "selections.json").read_text())
+        assert len(saved) == 16
+        assert saved["7"]["video"] == {"path": "/7/video"}
+
+
+class TestImageMetadata:
+    """Test header-only metadata extraction and its cache."""
+
+    @pytest.fixture
+    def png_path(self, tmp_path):
+        path = tmp_path / "generated.png"
+        pnginfo = PngImagePlugin.PngInfo()
+        pnginfo.add_text("parameters", "a cat, steps: 20")
+        pnginfo.add_text("prompt", json.dumps({"3": {"class_type": "KSampler"}}))
+        pnginfo.add_text("workflow", json.dumps({"nodes": [1, 2]}))
+        Image.new("RGB", (64, 48), color="blue").save(path, pnginfo=pnginfo)
+        return path
+
+    def test_reads_png_text_without_decoding(self, png_path):
+        """Test PNG text chunks are read without loading pixel data."""
+        with patch(
+            "PIL.ImageFile.ImageFile.load", side_effect=AssertionError("decoded")
+        ):
+            metadata = read_metadata(str(png_path))
+
+        assert metadata.to_dict() == {
+            "filename": "generated.png",
+            "width": 64,
+            "height": 48,
+            "mode": "RGB",
+            "format": "PNG",
+            "parameters": "a cat, steps: 20",
+            "prompt": {"3": {"class_type": "KSampler"}},
+            "workflow": {"nodes": [1, 2]},
+        }
+
+    def test_workflow_is_optional_and_json_parsed_once(self, png_path):
+        """Test the workflow can be left out and JSON is parsed lazily."""
+        metadata = read_metadata(str(png_path))
+        with patch(
+            "kikotools.tools.local_image_loader.metadata.json.loads",
+            wraps=json.loads,
+        ) as loads:
+            assert "workflow" not in metadata.to_dict(include_workflow=False)
+            assert loads.call_count == 1
+
+            metadata.to_dict(include_workflow=False)
+            metadata.to_dict()
+            assert loads.call_count == 2
+
+    def test_invalid_json_is_kept_as_text(self, tmp_path):
+        """Test embedded fields that are not JSON are returned as text."""
+        path = tmp_path / "broken.png"
+        pnginfo = PngImagePlugin.PngInfo()
+        pnginfo.add_text("prompt", "{not json")
+        Image.new("RGB", (8, 8)).save(path, pnginfo=pnginfo)
+
+        assert read_metadata(str(path)).to_dict()["prompt"] == "{not json"
+
+    def test_reads_exif_fields(self, tmp_path):
+        """Test ComfyUI EXIF tags and A1111 user comments are read."""
+        exif = Image.Exif()
+        exif[0x0110] = "prompt:" + json.dumps({"1": {"class_type": "Loader"}})
+        exif[0x010F] = "workflow:" + json.dumps({"nodes": []})
+        exif.get_ifd(0x8769)[0x9286] = b"UNICODE\x00" + "a dog, steps: 30".encode(
+            "utf-16-be"
+        )
+        path = tmp_path / "photo.jpg"
+        Image.new("RGB", (32, 16)).save(path, exif=exif)
+
+        metadata = read_metadata(str(path)).to_dict()
+        assert metadata["format"] == "JPEG"
+        assert metadata["parameters"] == "a dog, steps: 30"
+        assert metadata["prompt"] == {"1": {"class_type": "Loader"}}
+        assert metadata["workflow"] == {"nodes": []}
+
+    def test_decode_user_comment(self):
+        """Test the EXIF UserComment charset codes."""
+        assert decode_user_comment(b"ASCII\x00\x00\x00steps: 5") == "steps: 5"
+        assert decode_user_comment(b"UNICODE\x00" + "é".encode("utf-16-be")) == "é"
+        assert decode_user_comment(b"\x00" * 8) is None
+        assert decode_user_comment(None) is None
+
+    def test_cache_reuses_until_file_changes(self, png_path):
+        """Test the cache reads a header once per file version."""
+        cache = MetadataCache()
+        first = cache.get(str(png_path))
+        assert cache.get(str(png_path)) is first
+        assert cache.reads == 1
+
+        pnginfo = PngImagePlugin.PngInfo()
+        pnginfo.add_text("parameters", "changed")
+        Image.new("RGB", (10, 10)).save(png_path, pnginfo=pnginfo)
+        stats = png_path.stat()
+        os.utime(png_path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 10**9))
+
+        changed = cache.get(str(png_path))
+        assert cache.reads == 2
+        assert changed.to_dict()["parameters"] == "changed"
+        assert changed.info["width"] == 10
+        assert len(cache) == 1
+
+    def test_cache_evicts_beyond_budget(self, tmp_path):
+        """Test least recently used entries are evicted by size."""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"{i}.png"
+            pnginfo = PngImagePlugin.PngInfo()
+            pnginfo.add_text("parameters", "x" * 1000)
+            Image.new("RGB", (4, 4)).save(path, pnginfo=pnginfo)
+            paths.append(str(path))
+
+        cache = MetadataCache(max_memory_bytes=3500)
+        for path in paths:
+            cache.get(path)
+        assert len(cache) == 2
+
+        cache.get(paths[0])
+        assert cache.reads == 4
+
+    def test_get_many(self, png_path, tmp_path):
+        """Test a batch returns metadata or an error for every path."""
+        (tmp_path / "clip.mp4").write_bytes(b"")
+        (tmp_path / "corrupt.png").write_bytes(b"not an image")
+        paths = [
+            str(png_path),
+            str(tmp_path / "missing.png"),
+            str(tmp_path / "clip.mp4"),
+            str(tmp_path / "corrupt.png"),
+            str(tmp_path / ".." / "generated.png"),
+        ]
+
+        results = MetadataCache().get_many(paths)
+
+        assert results[paths[0]]["prompt"] == {"3": {"class_type": "KSampler"}}
+        assert "workflow" not in results[paths[0]]
+        assert results[paths[1]] == {"error": "File not found"}
+        assert results[paths[2]] == {"error": "Unsupported file"}
+        assert "error" in results[paths[3]]
+        assert results[paths[4]] == {"error": "Unsupported file"}
+
+        with_workflow = MetadataCache().get_many(paths[:1], include_workflow=True)
+        assert with_workflow[paths[0]]["workflow"] == {"nodes": [1, 2]}
+
+    def test_get_many_validates_input(self):
+        """Test invalid batches are rejected."""
+        with pytest.raises(ValueError):
+            MetadataCache().get_many("image.png")
+        with pytest.raises(ValueError):
+            MetadataCache().get_many([1, 2])
+        with pytest.raises(ValueError):
+            MetadataCache().get_many(["a.png"] * 201)
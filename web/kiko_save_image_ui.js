@@ -5,6 +5,9 @@
 
 import { app } from "../../scripts/app.js";
 
+// Formats whose quality setting applies (mirrors LOSSY_FORMATS in logic.py)
+const QUALITY_FORMATS = ['JPEG', 'WEBP', 'JXL', 'AVIF'];
+
 // CSS styles for enhanced image previews and web component
 const KIKO_SAVE_IMAGE_STYLES = `
 /* Custom Web Component Styles - Floating Draggable Window */
@@ -293,6 +296,11 @@ kiko-image-viewer.rolled-up .kiko-viewer-header {
 .kiko-format-png { background-color: #2196F3; }
 .kiko-format-jpeg { background-color: #FF9800; }
 .kiko-format-webp { background-color: #4CAF50; }
+.kiko-format-png_fast { background-color: #1976D2; }
+.kiko-format-jxl { background-color: #9C27B0; }
+.kiko-format-avif { background-color: #E91E63; }
+.kiko-format-apng { background-color: #00ACC1; }
+.kiko-format-gif { background-color: #795548; }
 
 .kiko-image-stats {
     font-size: 9px;
@@ -806,10 +814,12 @@ class KikoImageViewer extends HTMLElement {
 
         // Build quality info
         let qualityInfo = '';
-        if (data.format === 'PNG' && data.compress_level !== undefined) {
+        if (data.animated) {
+            qualityInfo = `${data.frames}f`;
+        } else if (data.format === 'PNG' && data.compress_level !== undefined) {
             qualityInfo = `C${data.compress_level}`;
-        } else if ((data.format === 'JPEG' || data.format === 'WEBP') && data.quality !== undefined) {
-            if (data.format === 'WEBP' && data.lossless) {
+        } else if (QUALITY_FORMATS.includes(data.format) && data.quality !== undefined) {
+            if (data.lossless) {
                 qualityInfo = 'Lossless';
             } else {
                 qualityInfo = `Q${data.quality}`;
@@ -896,12 +906,12 @@ function createImagePreview(imageData) {
     info.appendChild(sizeSpan);
     info.appendChild(fileSizeSpan);
 
-    // Add quality info for JPEG/WebP
-    if (imageData.quality && (imageData.format === 'JPEG' || imageData.format === 'WEBP')) {
+    // Add quality info for JPEG/WebP/JXL/AVIF
+    if (imageData.quality && QUALITY_FORMATS.includes(imageData.format)) {
         const qualitySpan = document.createElement('span');
         qualitySpan.className = 'kiko-save-image-quality';
         let qualityText = ` • Q${imageData.quality}`;
-        if (imageData.format === 'WEBP' && imageData.lossless) {
+        if (imageData.lossless) {
             qualityText = ' • Lossless';
         }
         qualitySpan.textContent = qualityText;
@@ -1014,6 +1024,22 @@ app.registerExtension({
             nodeType.prototype.onExecuted = function(message) {
                 console.log('KikoSaveImage: onExecuted called with message:', message);
 
+                // Report failed background (async_save) writes of this run
+                if (message && message.kiko_errors && message.kiko_errors.length > 0) {
+                    for (const failure of message.kiko_errors) {
+                        console.error(`KikoSaveImage: background write failed for ${failure.filename}: ${failure.error}`);
+                    }
+                    const summary = `${message.kiko_errors.length} background image write(s) failed`;
+                    if (app.extensionManager && app.extensionManager.toast) {
+                        app.extensionManager.toast.add({
+                            severity: "error",
+                            summary: "Kiko Save Image",
+                            detail: summary,
+                            life: 5000,
+                        });
+                    }
+                }
+
                 // Skip the original ComfyUI preview system
                 // Don't call originalOnExecuted to prevent default image display
 